@@ -1,16 +1,43 @@
 ﻿import sys
 import re
-import random
+import math
+import threading
 from PySide6.QtWidgets import (
     QWidget, QPushButton, QFrame, QApplication, 
     QMainWindow, QMenu, QVBoxLayout, QHBoxLayout, 
     QSizePolicy, QMessageBox, QSlider, QLabel,
     QComboBox, QGroupBox, QGridLayout, QTabWidget,
-    QSplitter, QSpinBox, QToolButton
+    QSplitter, QSpinBox, QToolButton, QFileDialog, QInputDialog,
+    QCheckBox
 )
-from PySide6.QtGui import QColor, QPalette, QIcon, QFont
+from PySide6.QtGui import QColor, QPalette, QIcon, QFont, QPainter
 from PySide6.QtCore import Qt, QTimer, Signal, QPropertyAnimation, QEasingCurve, QSize
 
+from softbox.sequence import ColorSequence, SequencePlayer
+from softbox.controller import SoftBoxController, _Waker
+from softbox.server import RemoteServer
+from softbox.osc import OscListener
+from softbox.dmx import DmxOutput
+from softbox.effects import CYCLE_NAMES, EFFECT_NAMES, FLICKER_NAMES, EffectEngine, check_seed, local_clock
+from softbox.sync import SYNC_PORT, ClockLeader, SyncClock
+from softbox.multiscreen import MultiScreenOutput
+from softbox.zones import Zone
+from softbox.shapes import SHAPE_NAMES, ShapeCache
+from softbox.images import ImagePlayer, ImageSequence
+from softbox.video import VideoColorSource, VideoPlayer
+from softbox.audio import AudioEnvelope, analyze_async
+from softbox.palette import extract_palette
+from softbox.kelvin import kelvin_to_rgb
+from softbox.calibration import Calibration, profile_for_screen
+from softbox.patterns import PatternWindow
+from softbox.dimmer import Dimmer
+from softbox.flashguard import FlashGuard
+from softbox.layers import BLEND_MODES, LayerStack
+from softbox.modulation import MODULATION_TARGETS, MODULATOR_SHAPES
+from softbox.presets import PresetLibrary
+from softbox.browser import PresetBrowser
+from softbox.colornames import ColorNames
+
 class ColorSlider(QWidget):
     """A custom widget that combines a slider with its label and direct input."""
     def __init__(self, label, value=255, parent=None):
@@ -129,116 +156,519 @@ class SpeedSlider(QWidget):
 
 
 class ColorDisplay(QFrame):
-    """Enhanced color display widget with animation capabilities."""
+    """Enhanced color display widget with animation capabilities.
+
+    Emits ``music_failed`` with the error message when a track passed to
+    ``load_music`` cannot be analyzed, and ``image_failed`` when an image
+    passed to ``set_image`` cannot be loaded.
+    """
+    music_failed = Signal(str)
+    image_failed = Signal(str)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setFrameShape(QFrame.Box)
         self.setMinimumHeight(180)
         self.color = QColor(255, 255, 255)
         self._effect_timer = QTimer(self)
+        self._effect_timer.setSingleShot(True)
+        self._effect_timer.setTimerType(Qt.PreciseTimer)
         self._effect_timer.timeout.connect(self._update_effect)
         self._current_effect = "None"
-        self._effect_colors = []
-        self._effect_step = 0
         self._effect_base_color = QColor(255, 255, 255)
+        self.engine = EffectEngine()
+        self.layers = LayerStack()
+        self.layers.add_listener(self._layers_changed)
+        self._base_color = QColor(self.color)
+        self.music = None
+        self.palette = None
+        self._effect_speed = 500
+        self.seed = 0
+        self.luminance = None
+        self._music_future = None
+        self._music_waker = _Waker(self._music_loaded, self)
+        self._presented = QColor(self.color)
+        self.calibration = None
+        self._output = QColor(self.color)
+        self.dimmer = None
+        self.flash_guard = None
+        self._dither_timer = QTimer(self)
+        self._dither_timer.setTimerType(Qt.PreciseTimer)
+        self._dither_timer.timeout.connect(self.update)
+        self._player = None
+        self._stopped_player = None
+        self._image = None
+        self._image_source = None
+        self._image_future = None
+        self._image_waker = _Waker(self._image_loaded, self)
+        self._frame_listeners = []
+        self._shape = "Flat"
+        self._shape_params = {}
+        self._shape_cache = ShapeCache()
+        self._zones = []
+        self._zone_timer = QTimer(self)
+        self._zone_timer.setSingleShot(True)
+        self._zone_timer.setTimerType(Qt.PreciseTimer)
+        self._zone_timer.timeout.connect(self._update_zones)
     
     def setColor(self, color):
         """Set a static color."""
         self.color = color
         self._effect_base_color = QColor(color)  # Store the base color for effects
         
-        if self._current_effect == "None":
-            self.setStyleSheet(f"background-color: {self.color.name()}")
+        if self._current_effect == "None" and not self.is_playing():
+            self.engine.show((color.red(), color.green(), color.blue()))
+            self._present(self.color)
+    
+    def show_rgb(self, r, g, b):
+        """Present a raw frame color without changing the base color."""
+        self.engine.show((r, g, b))
+        self._present(QColor(r, g, b))
+    
+    def _present(self, color, output=None):
+        """Show a frame color, repainting only when it actually changes.
+        
+        ``output`` is the calibrated color if the caller already has it.
+        Frame listeners always get the uncalibrated color. A frame the
+        flash guard holds back is not shown at all. With layers, ``color``
+        is the backdrop they are composited over.
+        """
+        self._base_color = QColor(color)
+        if self.layers:
+            color = QColor(*self.layers.composite([(color.red(), color.green(), color.blue())])[0].tolist())
+            output = None
+        if color != self._presented:
+            if self.flash_guard is not None and not self.flash_guard.check(
+                    (color.red(), color.green(), color.blue())):
+                return
+            self._presented = QColor(color)
+            self._output = QColor(output) if output is not None else self._calibrated(color)
+            self.update()
+            self._update_dither()
+            for callback in self._frame_listeners:
+                callback(color.red(), color.green(), color.blue())
+    
+    def _calibrated(self, color):
+        if self.calibration is None:
+            return QColor(color)
+        return QColor(*self.calibration.apply((color.red(), color.green(), color.blue())))
+    
+    def set_calibration(self, calibration):
+        """Correct everything painted (except images) with a Calibration, or None."""
+        self.calibration = calibration
+        self.engine.set_calibration(calibration)
+        for zone in self._zones:
+            zone.engine.set_calibration(calibration)
+        self._output = self._calibrated(self._presented)
+        self.update()
+        self._update_dither()
+    
+    def set_flash_guard(self, guard):
+        """Check every presented frame with a FlashGuard, or None to stop checking.
+        
+        Each zone flashes on its own, so each gets a copy of ``guard``.
+        """
+        self.flash_guard = guard
+        for zone in self._zones:
+            zone.flash_guard = None if guard is None else guard.copy()
+    
+    def set_dimmer(self, level, dither=True):
+        """Dim everything painted to a perceptual ``level`` (0-1).
+        
+        With ``dither`` levels between two 8-bit codes are shown by
+        alternating the codes on successive display frames. This is an
+        approximation: the phase comes from the clock and repaints are
+        driven by a timer at the screen's refresh interval, not by actual
+        frame presentation, so a late or dropped frame skips a phase.
+        
+        Only painting is dimmed. Frame listeners (DMX, remote state) and
+        sync followers get undimmed frames; SoftBox.update_dimmer also
+        dims its full-screen windows.
+        """
+        self.dimmer = None if level >= 1.0 else Dimmer(level, dither)
+        self.update()
+        self._update_dither()
+    
+    def _dither_phase(self):
+        # Phase follows the display refresh, so each frame shows one phase
+        return int(self.engine.clock() * self._refresh_rate())
+    
+    def _refresh_rate(self):
+        screen = self.screen()
+        return (screen.refreshRate() if screen is not None else 0.0) or 60.0
+    
+    def _dimmed(self, color, phase):
+        if self.dimmer is None:
+            return color
+        return QColor(*self.dimmer.apply((color.red(), color.green(), color.blue()), phase))
+    
+    def _update_dither(self):
+        """Repaint every display frame while a painted color needs dithering."""
+        colors = [self._output] + [zone.presented for zone in self._zones if zone.presented is not None]
+        if self.dimmer is not None and self._image is None and any(
+                self.dimmer.needs_dither((c.red(), c.green(), c.blue())) for c in colors):
+            if not self._dither_timer.isActive():
+                self._dither_timer.start(max(1, int(1000 / self._refresh_rate())))
+        else:
+            self._dither_timer.stop()
+    
+    def output_color(self):
+        """The calibrated color painted, before the master dimmer."""
+        return QColor(self._output)
+    
+    def presented_color(self):
+        """The color currently on screen, including effect frames."""
+        return QColor(self._presented)
+    
+    def add_frame_listener(self, callback):
+        """Call ``callback(r, g, b)`` for every newly presented frame."""
+        self._frame_listeners.append(callback)
+    
+    def remove_frame_listener(self, callback):
+        if callback in self._frame_listeners:
+            self._frame_listeners.remove(callback)
+    
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        phase = self._dither_phase() if self.dimmer is not None else 0
+        if self._image is not None:
+            painter.drawImage(self.rect(), self._image)
+            if self.dimmer is not None:
+                # Images are dimmed with an overlay (gamma 2.2 approximation), without dithering
+                painter.fillRect(self.rect(), QColor(0, 0, 0, round(255 * (1 - self.dimmer.factor ** (1 / 2.2)))))
+        else:
+            painter.fillRect(self.rect(), self._dimmed(self._output, phase))
+        if self._shape != "Flat" and self._image is None:
+            # Tint the cached mask with the frame color instead of re-rendering it
+            mask = self._shape_cache.get(self._shape, self._shape_params, self.width(),
+                                         self.height(), self.devicePixelRatioF())
+            painter.setCompositionMode(QPainter.CompositionMode_Multiply)
+            painter.drawPixmap(self.rect(), mask)
+            painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+        # Zones paint over the display color in the order they were added
+        bounds = self.rect()
+        for zone in self._zones:
+            if zone.presented is not None:
+                rect = zone.pixel_rect(bounds)
+                if rect.intersects(event.rect()):
+                    painter.fillRect(rect, self._dimmed(zone.presented, phase))
+        painter.end()
+        super().paintEvent(event)
+    
+    def set_shape(self, shape, **params):
+        """Shape the light with a falloff mask ("Flat", "Radial", "Linear", "Ring" or "Gaussian")."""
+        if shape not in SHAPE_NAMES:
+            raise ValueError(f"unknown shape: {shape}")
+        self._shape = shape
+        self._shape_params = params
+        self.update()
+    
+    def add_zone(self, name, rect, color=None):
+        """Add a zone covering ``rect`` (fractions x, y, width, height) and return it."""
+        if self.zone(name) is not None:
+            raise ValueError(f"zone already exists: {name}")
+        zone = Zone(name, rect, color)
+        zone.engine.set_clock(self.engine.clock, self.engine.shared_clock)
+        zone.engine.set_calibration(self.calibration)
+        zone.flash_guard = None if self.flash_guard is None else self.flash_guard.copy()
+        zone.display = self
+        zone.engine.add_listener(self._zones_changed)
+        self._zones.append(zone)
+        self._zones_changed()
+        return zone
+    
+    def zone(self, name):
+        """Return the zone called ``name``, or None."""
+        for zone in self._zones:
+            if zone.name == name:
+                return zone
+        return None
+    
+    def _restart_zones(self, effect_names):
+        # Zones running one of ``effect_names`` pick up the display's new data
+        for zone in self._zones:
+            effect = zone.engine.effect
+            if effect is not None and effect.name in effect_names:
+                zone.start_effect(effect.name, effect.speed)
+
+    def zones(self):
+        return list(self._zones)
+    
+    def remove_zone(self, name):
+        zone = self.zone(name)
+        if zone is not None:
+            zone.engine.remove_listener(self._zones_changed)
+            self._zones.remove(zone)
+            self.update(zone.pixel_rect(self.rect()))
+            self._zones_changed()
+    
+    def _layers_changed(self):
+        # Recomposite the backdrop (and zones) and follow the layers' steps
+        self._present(self._base_color)
+        self._update_effect()
+        if self._zones:
+            self._zones_changed()
+    
+    def _zones_changed(self):
+        # Resample every zone on the next event loop pass
+        self._zone_timer.start(0)
+    
+    def _update_zones(self):
+        """Invalidate only the zones whose frame changed and sleep until the next step."""
+        now = self.engine.clock()
+        bounds = self.rect()
+        next_change = self.layers.ms_until_next_change(now)
+        if self.layers:
+            # One vectorized composite for every zone
+            frames = list(map(tuple, self.layers.composite(
+                [zone.engine.frame_at(now) for zone in self._zones], now).tolist()))
+            colors = [QColor(*self.calibration.apply(rgb) if self.calibration is not None else rgb)
+                      for rgb in frames]
+        else:
+            frames = [zone.engine.frame_at(now) for zone in self._zones]
+            colors = [QColor(*zone.engine.output_at(now)) for zone in self._zones]
+        for zone, frame, color in zip(self._zones, frames, colors):
+            # Zone frames pass the flash guard like the display's own frames
+            if color != zone.presented and (zone.flash_guard is None or zone.flash_guard.check(frame)):
+                zone.presented = color
+                zone.updates += 1
+                self.update(zone.pixel_rect(bounds))
+            until = zone.engine.ms_until_next_change(now, 1000.0 / self._refresh_rate())
+            if until is not None and (next_change is None or until < next_change):
+                next_change = until
+        if next_change is not None:
+            self._zone_timer.start(max(1, math.ceil(next_change)))
+        self._update_dither()
+    
+    def play_sequence(self, sequence, loop=False):
+        """Play a ColorSequence (or any source with rgb_at) and return its player."""
+        self._stop_effect()
+        return self._start_player(SequencePlayer(self, sequence, loop))
+    
+    def _start_player(self, player):
+        # The previous player is stopped by now and none of its signals are
+        # running, so it can be released right away
+        if self._stopped_player is not None:
+            self._stopped_player.setParent(None)
+            self._stopped_player = None
+        self._player = player
+        player.finished.connect(self.stop_sequence)
+        player.start()
+        return player
+    
+    def stop_sequence(self):
+        """Stop sequence playback and go back to the static color."""
+        if self._player is not None:
+            self._player.stop()
+            # Keep it until the next player starts: this may run inside the
+            # player's own finished signal, where deleting it is unsafe
+            self._stopped_player, self._player = self._player, None
+            self.clear_image()
+            self.show_rgb(self.color.red(), self.color.green(), self.color.blue())
+    
+    def play_images(self, sequence, loop=False):
+        """Play an ImageSequence as the light surface and return its player."""
+        self._stop_effect()
+        self._image_source = sequence
+        return self._start_player(ImagePlayer(self, sequence, loop))
+    
+    def play_video(self, path, loop=False, mode="mean", fps=24.0):
+        """Follow the mean (or dominant) color of a Y4M file or image directory."""
+        self._stop_effect()
+        return self._start_player(VideoPlayer(self, VideoColorSource(path, mode, fps=fps), loop))
+    
+    def set_image(self, path):
+        """Show an image file as the light surface.
+        
+        The image is decoded on a background thread and shown once it is
+        ready. Returns a Future for the ImageSequence; if loading fails,
+        ``image_failed`` is emitted instead.
+        """
+        self._stop_effect()
+        future = ImageSequence.load_async(path)
+        self._image_future = future
+        future.add_done_callback(lambda _: self._image_waker.wake())
+        return future
+    
+    def _image_loaded(self):
+        future = self._image_future
+        # Ignore loads replaced by a newer set_image call or cleared since
+        if future is not None and future.done():
+            self._image_future = None
+            error = future.exception()
+            if error is not None:
+                self.image_failed.emit(str(error) or type(error).__name__)
+                return
+            self._image_source = future.result()
+            self.show_image(self._image_source.image_at(0), self._image_source.mean_rgb(0))
+    
+    def show_image(self, image, rgb=None):
+        """Present an image frame; ``rgb`` is its average color for frame listeners."""
+        self._image = image
+        if rgb is not None:
+            self.engine.show(rgb)
+            self._present(QColor(*rgb))
+        self.update()
+    
+    def clear_image(self):
+        """Go back to a solid fill, also dropping an image still loading."""
+        self._image_future = None
+        if self._image is not None:
+            self._image = None
+            self._image_source = None
+            self.update()
+    
+    def is_playing(self):
+        return self._player is not None and self._player.isActive()
     
     def _stop_effect(self):
         """Stop any running effect."""
-        if self._effect_timer.isActive():
-            self._effect_timer.stop()
+        self._effect_timer.stop()
+        self.engine.stop()
         self._current_effect = "None"
-        self.setStyleSheet(f"background-color: {self.color.name()}")
+        self.stop_sequence()
+        self.clear_image()
+        self.show_rgb(self.color.red(), self.color.green(), self.color.blue())
+        # Layers keep running over the static color
+        self._update_effect()
+    
+    def set_clock(self, clock, shared=True):
+        """Sample effects from ``clock``, a callable returning seconds.
+        
+        With a shared clock the effect phase comes from the clock itself
+        instead of from when the effect started, so every display sharing
+        that clock shows the same frame.
+        """
+        self.engine.set_clock(clock, shared)
+        self.layers.set_clock(clock, shared)
+        for zone in self._zones:
+            zone.engine.set_clock(clock, shared)
+        self._update_effect()
     
     def start_effect(self, effect_name, speed=500):
         """Start a lighting effect."""
-        old_effect = self._current_effect
         self._stop_effect()
         
         if effect_name == "None":
             return
             
         self._current_effect = effect_name
-        self._effect_step = 0
-        
-        # Setup effect-specific parameters
-        if effect_name == "Strobe":
-            self._effect_colors = [self._effect_base_color, QColor(0, 0, 0)]
-        elif effect_name == "Police":
-            self._effect_colors = [QColor(255, 0, 0), QColor(0, 0, 255)]
-        elif effect_name == "Ambulance":
-            self._effect_colors = [QColor(255, 0, 0), QColor(255, 255, 255)]
-        elif effect_name == "Neon":
-            self._effect_colors = [
-                QColor(255, 0, 0), QColor(255, 165, 0), 
-                QColor(255, 255, 0), QColor(0, 255, 0),
-                QColor(0, 0, 255), QColor(75, 0, 130), 
-                QColor(238, 130, 238)
-            ]
-        elif effect_name == "Sun":
-            self._effect_colors = [QColor(255, 200, 0), QColor(255, 160, 0)]
-        elif effect_name == "Moon":
-            self._effect_colors = [QColor(200, 200, 255), QColor(160, 160, 200)]
-        elif effect_name == "Custom":
-            # Use the base color for custom effects
-            self._effect_colors = [self._effect_base_color, QColor(max(0, self._effect_base_color.red()-100), 
-                                                                 max(0, self._effect_base_color.green()-100), 
-                                                                 max(0, self._effect_base_color.blue()-100))]
-        
-        # Start the effect timer
-        self._effect_timer.setInterval(speed)
-        self._effect_timer.start()
+        self._effect_speed = speed
+        if (effect_name == "Music" and self.music is None) or (effect_name == "Palette" and not self.palette):
+            # Starts once load_music or set_palette provides its data
+            return
+        base = self._effect_base_color
+        self.engine.start(effect_name, (base.red(), base.green(), base.blue()), speed,
+                          self.music, self.palette, self.seed, self.luminance)
+        self._update_effect()
+    
+    def set_seed(self, seed):
+        """Seed the flicker effects; the same seed replays the same flicker.
+
+        Raises ValueError unless ``seed`` is a non-negative integer.
+        """
+        self.seed = check_seed(seed)
+        if self._current_effect in FLICKER_NAMES:
+            self.start_effect(self._current_effect, self._effect_speed)
+        self._restart_zones(FLICKER_NAMES)
+        self._restart_layers(FLICKER_NAMES)
+    
+    def set_luminance(self, luminance):
+        """Keep color cycles at one relative luminance (0-1 or "auto"), or None for off."""
+        self.luminance = luminance
+        if self._current_effect in CYCLE_NAMES:
+            self.start_effect(self._current_effect, self._effect_speed)
+        self._restart_zones(CYCLE_NAMES)
+    
+    def set_palette(self, palette):
+        """Use a list of (r, g, b) colors for the Palette effect."""
+        self.palette = list(palette)
+        if self._current_effect == "Palette":
+            self.start_effect("Palette", self._effect_speed)
+        self._restart_zones(["Palette"])
+        self._restart_layers(["Palette"])
+    
+    def load_music(self, path):
+        """Analyze a WAV file in the background for the Music effect.
+        
+        Returns a Future for the AudioEnvelope. The Music effect restarts
+        with the new track once the analysis is done; if it fails,
+        ``music_failed`` is emitted instead.
+        """
+        future = analyze_async(path)
+        self._music_future = future
+        future.add_done_callback(lambda _: self._music_waker.wake())
+        return future
+    
+    def _music_loaded(self):
+        future = self._music_future
+        # Ignore analyses replaced by a newer load_music call
+        if future is not None and future.done():
+            self._music_future = None
+            error = future.exception()
+            if error is None:
+                self.set_music(future.result())
+            else:
+                self.music_failed.emit(str(error) or type(error).__name__)
+    
+    def set_music(self, envelope):
+        """Use an AudioEnvelope for the Music effect."""
+        self.music = envelope
+        if self._current_effect == "Music":
+            self.start_effect("Music")
+        self._restart_zones(["Music"])
     
     def set_speed(self, speed):
-        """Set the speed of the current effect."""
-        if self._effect_timer.isActive():
-            self._effect_timer.setInterval(speed)
+        """Set the speed of the current effect and of the layers."""
+        self._effect_speed = speed
+        self.engine.set_speed(speed)
+        for layer in self.layers:
+            self.layers.update(layer, speed=speed)
+        self._update_effect()
+    
+    def add_layer(self, effect_name, speed=500, opacity=1.0, blend="Normal"):
+        """Composite an effect over the display and its zones; returns the Layer.
+        
+        ``blend`` is one of BLEND_MODES. Layers stack in the order added.
+        """
+        base = self._effect_base_color
+        return self.layers.add(effect_name, (base.red(), base.green(), base.blue()), speed, opacity, blend,
+                               self.palette, self.seed)
+    
+    def remove_layer(self, layer):
+        self.layers.remove(layer)
+    
+    def _restart_layers(self, effect_names):
+        # Layers running one of ``effect_names`` pick up the display's new palette or seed
+        for layer in list(self.layers):
+            if layer.effect.name in effect_names:
+                self.layers.restart(layer, self.palette, self.seed)
+    
+    def modulate(self, target, shape, rate=1.0, depth=0.5, **params):
+        """Drive an effect parameter with a modulator (see EffectEngine.modulate); returns its slot."""
+        slot = self.engine.modulate(target, shape, rate, depth, **params)
+        self._update_effect()
+        return slot
+    
+    def unmodulate(self, slot=None):
+        """Remove one modulator, or all of them."""
+        self.engine.unmodulate(slot)
+        self._update_effect()
     
     def _update_effect(self):
-        """Update the visual state of the current effect."""
-        if self._current_effect == "None":
+        """Present the current effect frame (under any layers) and wake up at the next step."""
+        if self.engine.effect is None and not self.layers:
             return
-            
-        if self._current_effect in ["Strobe", "Police", "Ambulance", "Custom"]:
-            # Simple alternating effect
-            color = self._effect_colors[self._effect_step % len(self._effect_colors)]
-            self.setStyleSheet(f"background-color: {color.name()}")
-            self._effect_step += 1
-            
-        elif self._current_effect == "Neon":
-            # Smooth transition through colors
-            color = self._effect_colors[self._effect_step % len(self._effect_colors)]
-            self.setStyleSheet(f"background-color: {color.name()}")
-            self._effect_step += 1
-            
-        elif self._current_effect == "Sun":
-            # Pulsing effect
-            intensity = abs(50 - (self._effect_step % 100)) / 50.0  # 0.0 to 1.0
-            base_color = self._effect_colors[0]
-            r = max(0, min(255, base_color.red() - int(40 * intensity)))
-            g = max(0, min(255, base_color.green() - int(40 * intensity)))
-            b = max(0, min(255, base_color.blue()))
-            color = QColor(r, g, b)
-            self.setStyleSheet(f"background-color: {color.name()}")
-            self._effect_step += 1
-            
-        elif self._current_effect == "Moon":
-            # Subtle glow effect
-            intensity = abs(50 - (self._effect_step % 100)) / 50.0  # 0.0 to 1.0
-            base_color = self._effect_colors[0]
-            r = max(0, min(255, base_color.red() - int(30 * intensity)))
-            g = max(0, min(255, base_color.green() - int(30 * intensity)))
-            b = max(0, min(255, base_color.blue() - int(30 * intensity)))
-            color = QColor(r, g, b)
-            self.setStyleSheet(f"background-color: {color.name()}")
-            self._effect_step += 1
+        
+        now = self.engine.clock()
+        if self.engine.effect is None:
+            self._present(self._base_color)
+        else:
+            self._present(QColor(*self.engine.frame_at(now)), QColor(*self.engine.output_at(now)))
+        frame_ms = 1000.0 / self._refresh_rate()
+        changes = [ms for ms in (self.engine.ms_until_next_change(now, frame_ms),
+                                 self.layers.ms_until_next_change(now)) if ms is not None]
+        self._effect_timer.start(max(1, math.ceil(min(changes))))
 
 
 class ToggleButton(QToolButton):
@@ -281,9 +711,16 @@ class ToggleButton(QToolButton):
 class SoftBox(QMainWindow):
     """Main application window for color selection and light effects."""
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, presets=None):
         super().__init__(parent)
         self.setWindowTitle('SoftBox - Advanced Light Controller')
+        self.presets = presets if presets is not None else PresetLibrary()
+        self.color_names = ColorNames.css()
+        self.sync_clock = None
+        self.multi_screen = None
+        self.calibration_dir = None
+        self._follows_screen = False
+        self.pattern_window = None
         self.setup_ui()
         
     def setup_ui(self):
@@ -295,6 +732,8 @@ class SoftBox(QMainWindow):
         
         # Create the color display area
         self.color_display = ColorDisplay()
+        self.color_display.music_failed.connect(self.show_music_error)
+        self.color_display.image_failed.connect(self.show_image_error)
         main_layout.addWidget(self.color_display, 1)
         
         # Create a container for toggle button and controls
@@ -354,56 +793,54 @@ class SoftBox(QMainWindow):
         rgb_group_layout.addWidget(self.slider_g)
         rgb_group_layout.addWidget(self.slider_b)
         
-        # Add the preset buttons
+        # Nearest named color, updated live with the sliders
+        self.color_name_label = QLabel()
+        rgb_group_layout.addWidget(self.color_name_label)
+        self.update_color_name()
+        
+        # Color temperature and tint, applied through the RGB sliders
+        self.kelvin_slider = SpeedSlider("Kelvin", 1000, 20000, 6500)
+        self.kelvin_slider.spin_box.setSuffix(" K")
+        self.kelvin_slider.slider.setPageStep(500)
+        self.tint_slider = SpeedSlider("Tint", -100, 100, 0)
+        self.tint_slider.spin_box.setSuffix("")
+        for control in (self.kelvin_slider, self.tint_slider):
+            control.slider.valueChanged.connect(self.apply_kelvin)
+            control.spin_box.valueChanged.connect(self.apply_kelvin)
+            rgb_group_layout.addWidget(control)
+        
+        # Add the preset browser
         presets_layout = QVBoxLayout()
         
-        # Standard presets
-        standard_presets_layout = QHBoxLayout()
-        presets_label = QLabel("Standard Presets:")
-        standard_presets_layout.addWidget(presets_label)
-        
-        self.preset_buttons = []
-        standard_preset_colors = [
-            ("White", QColor(255, 255, 255)),
-            ("Red", QColor(255, 0, 0)),
-            ("Green", QColor(0, 255, 0)),
-            ("Blue", QColor(0, 0, 255)),
-            ("Warm", QColor(255, 180, 100)),
-            ("Cool", QColor(180, 200, 255))
-        ]
+        library_layout = QHBoxLayout()
+        presets_label = QLabel("Presets:")
+        library_layout.addWidget(presets_label)
+        library_layout.addStretch(1)
         
-        for name, color in standard_preset_colors:
-            btn = QPushButton(name)
-            btn.setStyleSheet(f"background-color: {color.name()}; color: {'black' if color.lightness() > 128 else 'white'}")
-            btn.setFixedHeight(25)
-            btn.clicked.connect(lambda checked=False, c=color: self.apply_preset(c))
-            self.preset_buttons.append(btn)
-            standard_presets_layout.addWidget(btn)
-        
-        presets_layout.addLayout(standard_presets_layout)
-        
-        # Designer presets
-        designer_presets_layout = QHBoxLayout()
-        designer_label = QLabel("Designer Colors:")
-        designer_presets_layout.addWidget(designer_label)
-        
-        designer_preset_colors = [
-            ("Prussian", QColor(0, 49, 83)),   # 普鲁士蓝
-            ("Hermès", QColor(255, 88, 0)),    # 爱马仕橙色
-            ("LV Brown", QColor(101, 67, 33)), # LV棕色
-            ("Tiffany", QColor(0, 175, 152)),  # 蒂芙尼蓝
-            ("Louboutin", QColor(224, 23, 58)) # 鲁布托红底色
-        ]
+        # Save the current color to the preset library
+        save_preset_btn = QPushButton("Save Current...")
+        save_preset_btn.setFixedHeight(25)
+        save_preset_btn.clicked.connect(self.ask_save_preset)
+        library_layout.addWidget(save_preset_btn)
         
-        for name, color in designer_preset_colors:
-            btn = QPushButton(name)
-            btn.setStyleSheet(f"background-color: {color.name()}; color: {'black' if color.lightness() > 128 else 'white'}")
-            btn.setFixedHeight(25)
-            btn.clicked.connect(lambda checked=False, c=color: self.apply_preset(c))
-            self.preset_buttons.append(btn)
-            designer_presets_layout.addWidget(btn)
+        presets_layout.addLayout(library_layout)
+        
+        self.preset_browser = PresetBrowser(self.presets)
+        self.preset_browser.chosen.connect(lambda preset: self.apply_preset(QColor(*preset.rgb)))
+        presets_layout.addWidget(self.preset_browser)
+        
+        # Palette extracted from a reference photo
+        self.palette_layout = QHBoxLayout()
+        palette_label = QLabel("Photo Palette:")
+        self.palette_layout.addWidget(palette_label)
         
-        presets_layout.addLayout(designer_presets_layout)
+        palette_btn = QPushButton("From Image...")
+        palette_btn.setFixedHeight(25)
+        palette_btn.clicked.connect(self.choose_palette_image)
+        self.palette_layout.addWidget(palette_btn)
+        self.palette_buttons = []
+        
+        presets_layout.addLayout(self.palette_layout)
         
         rgb_group_layout.addLayout(presets_layout)
         rgb_layout.addWidget(rgb_group)
@@ -420,20 +857,93 @@ class SoftBox(QMainWindow):
         effect_selection_layout = QHBoxLayout()
         effect_label = QLabel("Effect:")
         self.effect_combo = QComboBox()
-        self.effect_combo.addItems(["None", "Strobe", "Police", "Ambulance", 
-                                   "Neon", "Sun", "Moon", "Custom"])
+        self.effect_combo.addItems(EFFECT_NAMES)
         self.effect_combo.currentTextChanged.connect(self.change_effect)
         
         effect_selection_layout.addWidget(effect_label)
         effect_selection_layout.addWidget(self.effect_combo)
         
+        # Light shape combo
+        shape_label = QLabel("Shape:")
+        self.shape_combo = QComboBox()
+        self.shape_combo.addItems(SHAPE_NAMES)
+        self.shape_combo.currentTextChanged.connect(self.color_display.set_shape)
+        
+        effect_selection_layout.addWidget(shape_label)
+        effect_selection_layout.addWidget(self.shape_combo)
+        
         # Speed control
         self.speed_slider = SpeedSlider("Speed", 50, 1000, 500)
         self.speed_slider.slider.valueChanged.connect(self.update_speed)
         self.speed_slider.spin_box.valueChanged.connect(self.update_speed)
         
+        # Master dimmer, perceptual and dithered
+        self.dimmer_slider = SpeedSlider("Dimmer", 0, 100, 100)
+        self.dimmer_slider.spin_box.setSuffix(" %")
+        self.dimmer_slider.slider.valueChanged.connect(self.update_dimmer)
+        self.dimmer_slider.spin_box.valueChanged.connect(self.update_dimmer)
+        
         effects_group_layout.addLayout(effect_selection_layout)
         effects_group_layout.addWidget(self.speed_slider)
+        effects_group_layout.addWidget(self.dimmer_slider)
+        
+        # Same brightness for every color of a cycle
+        self.luminance_check = QCheckBox("Constant Luminance")
+        self.luminance_check.toggled.connect(
+            lambda checked: self.color_display.set_luminance("auto" if checked else None))
+        
+        # Hold back frames that would flash more than three times a second
+        self.flash_guard_check = QCheckBox("Flash Guard")
+        self.flash_guard_check.toggled.connect(self.set_flash_guard)
+        
+        # One effect layered over the main effect
+        layer_layout = QHBoxLayout()
+        layer_label = QLabel("Layer:")
+        self.layer_combo = QComboBox()
+        self.layer_combo.addItems([name for name in EFFECT_NAMES if name != "Music"])
+        self.blend_combo = QComboBox()
+        self.blend_combo.addItems(BLEND_MODES)
+        self.layer_combo.currentTextChanged.connect(self.change_layer)
+        self.blend_combo.currentTextChanged.connect(self.change_layer)
+        layer_layout.addWidget(layer_label)
+        layer_layout.addWidget(self.layer_combo)
+        layer_layout.addWidget(self.blend_combo)
+        
+        self.opacity_slider = SpeedSlider("Opacity", 0, 100, 100)
+        self.opacity_slider.spin_box.setSuffix(" %")
+        self.opacity_slider.slider.valueChanged.connect(self.change_layer)
+        self.opacity_slider.spin_box.valueChanged.connect(self.change_layer)
+        effects_group_layout.addLayout(layer_layout)
+        effects_group_layout.addWidget(self.opacity_slider)
+        
+        # One modulator on an effect parameter
+        lfo_layout = QHBoxLayout()
+        lfo_label = QLabel("LFO:")
+        self.lfo_combo = QComboBox()
+        self.lfo_combo.addItems(["None"] + MODULATOR_SHAPES)
+        self.lfo_target_combo = QComboBox()
+        self.lfo_target_combo.addItems(MODULATION_TARGETS)
+        self.lfo_combo.currentTextChanged.connect(self.change_lfo)
+        self.lfo_target_combo.currentTextChanged.connect(self.change_lfo)
+        lfo_layout.addWidget(lfo_label)
+        lfo_layout.addWidget(self.lfo_combo)
+        lfo_layout.addWidget(self.lfo_target_combo)
+        
+        self.lfo_period_slider = SpeedSlider("Period", 100, 20000, 2000)
+        self.lfo_depth_slider = SpeedSlider("Depth", 0, 100, 50)
+        self.lfo_depth_slider.spin_box.setSuffix(" %")
+        for control in (self.lfo_period_slider, self.lfo_depth_slider):
+            control.slider.valueChanged.connect(self.change_lfo)
+            control.spin_box.valueChanged.connect(self.change_lfo)
+        effects_group_layout.addLayout(lfo_layout)
+        effects_group_layout.addWidget(self.lfo_period_slider)
+        effects_group_layout.addWidget(self.lfo_depth_slider)
+        
+        options_layout = QHBoxLayout()
+        options_layout.addWidget(self.luminance_check)
+        options_layout.addWidget(self.flash_guard_check)
+        options_layout.addStretch(1)
+        effects_group_layout.addLayout(options_layout)
         
         # Effect quick buttons
         effects_buttons_layout = QGridLayout()
@@ -503,25 +1013,226 @@ class SoftBox(QMainWindow):
         
         # Update the color display
         self.color_display.setColor(self.color)
+        self.update_color_name()
         
         # If current effect is Custom, update it with new color
         if self.effect_combo.currentText() == "Custom":
             self.color_display.start_effect("Custom", self.speed_slider.value())
         
+    def update_color_name(self):
+        """Show the named color closest to the slider color."""
+        name, rgb, distance = self.color_names.nearest(
+            (self.slider_r.value(), self.slider_g.value(), self.slider_b.value()))
+        self.color_name_label.setText(f"Nearest: {name} ({QColor(*rgb).name()}, ΔE {distance:.1f})")
+    
+    def load_color_names(self, path):
+        """Name colors from a ``name,#rrggbb`` or ``name,r,g,b`` CSV file instead of CSS names."""
+        self.set_color_names(ColorNames.from_csv(path))
+    
+    def set_color_names(self, names):
+        self.color_names = names
+        self.update_color_name()
+    
+    def show_music_error(self, message):
+        """Tell the user that the chosen track could not be analyzed."""
+        QMessageBox.warning(self, "Music", f"Could not analyze the track:\n{message}")
+    
+    def show_image_error(self, message):
+        """Tell the user that the chosen image could not be loaded."""
+        QMessageBox.warning(self, "Image", f"Could not load the image:\n{message}")
+    
     def change_effect(self, effect_name):
         """Change the current light effect."""
+        if effect_name == "Music" and self.color_display.music is None:
+            path, _ = QFileDialog.getOpenFileName(self, "Choose a Track", "", "WAV files (*.wav)")
+            if path:
+                self.color_display.load_music(path)
         self.color_display.start_effect(effect_name, self.speed_slider.value())
     
     def update_speed(self):
         """Update the speed of the current effect."""
         self.color_display.set_speed(self.speed_slider.value())
         
+    def change_layer(self):
+        """Apply the layer controls: one effect over the main effect."""
+        layers = self.color_display.layers
+        name = self.layer_combo.currentText()
+        opacity = self.opacity_slider.value() / 100.0
+        blend = self.blend_combo.currentText()
+        current = next(iter(layers), None)
+        if name == "None":
+            layers.clear()
+        elif current is not None and current.effect.name == name:
+            layers.update(current, opacity, blend)
+        else:
+            # Build the new layer first, so a failure keeps the current one
+            try:
+                layer = self.color_display.add_layer(name, self.speed_slider.value(), opacity, blend)
+            except ValueError as exc:
+                self.layer_combo.blockSignals(True)
+                self.layer_combo.setCurrentText("None" if current is None else current.effect.name)
+                self.layer_combo.blockSignals(False)
+                QMessageBox.warning(self, "Layer", str(exc))
+                return
+            for old in list(layers):
+                if old is not layer:
+                    layers.remove(old)
+    
+    def change_lfo(self):
+        """Apply the LFO controls: one modulator on the chosen parameter."""
+        display = self.color_display
+        display.unmodulate()
+        shape = self.lfo_combo.currentText()
+        if shape != "None":
+            target = self.lfo_target_combo.currentText()
+            depth = self.lfo_depth_slider.value() / 100.0
+            if target == "speed":
+                # The step rate has to stay above zero
+                depth = min(depth, 0.95)
+            display.modulate(target, shape, 1000.0 / self.lfo_period_slider.value(), depth)
+    
+    def update_dimmer(self):
+        """Apply the master dimmer level."""
+        self.color_display.set_dimmer(self.dimmer_slider.value() / 100.0)
+        if self.multi_screen is not None:
+            self.multi_screen.set_dimmer(self.color_display.dimmer)
+        
+    def apply_kelvin(self):
+        """Set the color from the Kelvin and tint controls."""
+        self.apply_preset(QColor(*kelvin_to_rgb(self.kelvin_slider.value(), self.tint_slider.value())))
+    
+    def choose_palette_image(self):
+        """Ask for a reference photo and extract its palette."""
+        path, _ = QFileDialog.getOpenFileName(self, "Choose a Reference Photo", "",
+                                              "Images (*.jpg *.jpeg *.png *.bmp *.tif *.tiff *.webp)")
+        if path:
+            try:
+                self.load_palette(path)
+            except ValueError as exc:
+                QMessageBox.warning(self, "Photo Palette", str(exc))
+    
+    def load_palette(self, path, count=5):
+        """Extract ``count`` dominant colors from a photo as a preset row and Palette effect."""
+        palette = extract_palette(path, count)
+        self.color_display.set_palette(palette)
+        
+        # Replace the previous palette buttons
+        for btn in self.palette_buttons:
+            self.palette_layout.removeWidget(btn)
+            btn.deleteLater()
+        self.palette_buttons = []
+        for r, g, b in palette:
+            color = QColor(r, g, b)
+            btn = QPushButton(color.name())
+            btn.setStyleSheet(f"background-color: {color.name()}; color: {'black' if color.lightness() > 128 else 'white'}")
+            btn.setFixedHeight(25)
+            btn.clicked.connect(lambda checked=False, c=color: self.apply_preset(c))
+            self.palette_buttons.append(btn)
+            self.palette_layout.addWidget(btn)
+        return palette
+    
+    def ask_save_preset(self):
+        """Ask for a name and tags and save the current color as a preset."""
+        text, ok = QInputDialog.getText(self, "Save Preset", "Name, then tags separated by commas:")
+        if ok and text.strip():
+            name, *tags = [part.strip() for part in text.split(",")]
+            if name:
+                self.save_preset(name, [tag for tag in tags if tag])
+    
+    def save_preset(self, name, tags=(), favorite=False):
+        """Save the slider color to the preset library."""
+        rgb = (self.slider_r.value(), self.slider_g.value(), self.slider_b.value())
+        return self.presets.add(name, rgb, tags, favorite)
+    
     def apply_preset(self, color):
         """Apply a preset color."""
         self.slider_r.setValue(color.red())
         self.slider_g.setValue(color.green())
         self.slider_b.setValue(color.blue())
         self.update_color()
+    
+    def start_sync(self, leader=False, host=None, port=SYNC_PORT):
+        """Share effect phase with other instances, as clock leader or follower."""
+        self.stop_sync()
+        if leader:
+            self.sync_clock = ClockLeader(port=port).start()
+        else:
+            # Without a host the leader is found by broadcast
+            self.sync_clock = SyncClock(host, port).start()
+        self.color_display.set_clock(self.sync_clock.now)
+    
+    def stop_sync(self):
+        """Go back to this machine's own clock."""
+        if self.sync_clock is not None:
+            self.sync_clock.stop()
+            self.sync_clock = None
+        self.color_display.set_clock(local_clock, shared=False)
+    
+    def start_multi_screen(self, screens=None):
+        """Mirror the display full screen on every screen (or the given ones)."""
+        self.stop_multi_screen()
+        guard = self.color_display.flash_guard
+        self.multi_screen = MultiScreenOutput(self.color_display.engine, screens,
+                                              None if guard is None else guard.copy(), self.color_display.layers)
+        if self.calibration_dir is not None:
+            for index, window in enumerate(self.multi_screen.windows):
+                self.multi_screen.set_calibration(index, profile_for_screen(window.screen(), self.calibration_dir))
+        self.multi_screen.set_dimmer(self.color_display.dimmer)
+        return self.multi_screen.show()
+    
+    def set_flash_guard(self, enabled):
+        """Guard the display, its zones and any running full-screen output against flashing."""
+        guard = FlashGuard() if enabled else None
+        self.color_display.set_flash_guard(guard)
+        if self.multi_screen is not None:
+            self.multi_screen.set_flash_guard(None if guard is None else guard.copy())
+    
+    def load_calibration(self, path):
+        """Calibrate the display with a ``.cube`` file (None to remove calibration)."""
+        self.color_display.set_calibration(None if path is None else Calibration.from_cube(path))
+    
+    def use_calibration_profiles(self, directory):
+        """Calibrate with the ``.cube`` profile of whichever screen the window is on.
+        
+        Profiles in ``directory`` are named after the screen, with
+        ``default.cube`` as the fallback, and are switched when the window
+        moves to another screen.
+        """
+        self.calibration_dir = directory
+        if self.windowHandle() is None:
+            self.winId()  # Create the native window so its screen can be followed
+        if not self._follows_screen:
+            self.windowHandle().screenChanged.connect(self._screen_changed)
+            self._follows_screen = True
+        self._screen_changed(self.windowHandle().screen())
+    
+    def _screen_changed(self, screen):
+        if self.calibration_dir is not None:
+            self.color_display.set_calibration(profile_for_screen(screen, self.calibration_dir))
+    
+    def start_calibration_mode(self, pattern="Gray Ramp", steps=11, screen=None, interval_ms=None,
+                               log_path=None, window=1.0):
+        """Show a test chart full screen for metering and return its PatternWindow.
+        
+        ``pattern`` is one of PATTERN_NAMES. Patches advance every
+        ``interval_ms`` or, without it, on Space/Right. What was shown is
+        logged to ``log_path`` as CSV.
+        """
+        self.stop_calibration_mode()
+        self.pattern_window = PatternWindow(pattern, steps, screen or self.screen(), interval_ms, log_path, window)
+        return self.pattern_window.start()
+    
+    def stop_calibration_mode(self):
+        """Close the test chart window."""
+        if self.pattern_window is not None:
+            self.pattern_window.close()
+            self.pattern_window = None
+    
+    def stop_multi_screen(self):
+        """Close the full-screen windows."""
+        if self.multi_screen is not None:
+            self.multi_screen.close()
+            self.multi_screen = None
 
 
 def main():
@@ -538,6 +1249,52 @@ def begin():
     window.show()
     return app.exec()
 
+def embed(show=True):
+    """Create a SoftBox window without blocking and return its controller.
+
+    An existing QApplication is reused, so SoftBox can live inside another
+    Qt (or QtAsyncio) application. The caller runs the event loop.
+    """
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication(sys.argv)
+        app.setStyle('Fusion')  # Use Fusion style for a modern look
+    window = SoftBox()
+    if show:
+        window.show()
+    return SoftBoxController(window)
+
+def begin_in_thread(show=True, timeout=10):
+    """Run SoftBox in a background thread and return its controller.
+
+    For applications without a Qt event loop of their own. Qt requires the
+    GUI to stay on the thread that created the QApplication, so this cannot
+    be combined with a QApplication elsewhere in the process.
+    """
+    if QApplication.instance() is not None:
+        raise RuntimeError("a QApplication already exists, use embed() instead")
+
+    ready = threading.Event()
+    result = {}
+
+    def run():
+        try:
+            result["controller"] = embed(show)
+        except Exception as exc:
+            result["error"] = exc
+            ready.set()
+            return
+        ready.set()
+        QApplication.instance().exec()
+
+    thread = threading.Thread(target=run, name="SoftBox", daemon=True)
+    thread.start()
+    if not ready.wait(timeout):
+        raise TimeoutError("SoftBox did not start in time")
+    if "error" in result:
+        raise result["error"]
+    return result["controller"]
+
 
 if __name__ == '__main__':
     sys.argv[0] = re.sub(r'(-script\.pyw?|\.exe)?$', '', sys.argv[0])
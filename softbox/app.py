@@ -2,10 +2,19 @@ import toga
 from toga.style import Pack
 from toga.style.pack import COLUMN, ROW
 from toga.colors import rgb
-import random
 import threading
 import time
 
+from softbox.controller import CommandQueue
+from softbox.server import RemoteServer
+from softbox.effects import EFFECT_NAMES, Effect, local_clock
+from softbox.sync import SYNC_PORT, ClockLeader, SyncClock
+from softbox.presets import PresetLibrary
+
+# The Toga front end has no track or photo pickers, so Music and Palette are
+# only reachable from code through set_music and set_palette
+SELECTABLE_EFFECTS = [name for name in EFFECT_NAMES if name not in ("Music", "Palette")]
+
 
 class ColorSlider(toga.Box):
     """A custom widget that combines a slider with its label and direct input."""
@@ -143,10 +152,14 @@ class ColorDisplay(toga.Box):
         self.color = rgb(255, 255, 255)
         self._effect_base_color = self.color
         self._current_effect = "None"
-        self._effect_colors = []
-        self._effect_step = 0
-        self._effect_running = False
-        self._effect_speed = 500
+        self._effect = None
+        self.music = None
+        self.palette = None
+        self._effect_epoch = 0.0
+        self._effect_token = None
+        self._sequence_token = None
+        self._clock = local_clock
+        self._shared_clock = False
         
         # Apply initial background
         self.style.background_color = self.color
@@ -161,101 +174,108 @@ class ColorDisplay(toga.Box):
 
     def _stop_effect(self):
         """Stop any running effect."""
-        self._effect_running = False
+        self._effect_token = None
+        self._effect = None
+        self._sequence_token = None
         self._current_effect = "None"
         self.style.background_color = self.color
     
+    def play_sequence(self, sequence, loop=False, interval=0.016):
+        """Play a ColorSequence (or any source with rgb_at) in a background thread."""
+        self._stop_effect()
+        # A fresh token lets an older playback thread notice it was replaced
+        token = object()
+        self._sequence_token = token
+        self._effect_thread = threading.Thread(target=self._run_sequence, args=(sequence, loop, interval, token))
+        self._effect_thread.daemon = True
+        self._effect_thread.start()
+    
+    def is_playing(self):
+        return self._sequence_token is not None
+    
+    def _run_sequence(self, sequence, loop, interval, token):
+        """Present sequence frames by elapsed time until stopped or finished."""
+        start = time.monotonic()
+        last = None
+        while self._sequence_token is token:
+            frame = sequence.rgb_at(time.monotonic() - start, loop)
+            if frame is None:
+                self._sequence_token = None
+                self._apply_color(self.color)
+                break
+            if frame != last:
+                last = frame
+                self._apply_color(rgb(*frame))
+            time.sleep(interval)
+    
+    def set_clock(self, clock, shared=True):
+        """Sample effects from ``clock``, a callable returning seconds.
+        
+        With a shared clock the effect phase comes from the clock itself
+        instead of from when the effect started, so every display sharing
+        that clock shows the same frame.
+        """
+        self._clock = clock
+        self._shared_clock = shared
+        if self._effect is not None:
+            self._effect_epoch = 0.0 if shared else clock()
+    
     def start_effect(self, effect_name, speed=500):
         """Start a lighting effect."""
         # Stop previous effect
-        old_effect = self._current_effect
         self._stop_effect()
         
         if effect_name == "None":
             return
             
         self._current_effect = effect_name
-        self._effect_step = 0
-        self._effect_speed = speed
-        
-        # Setup effect-specific parameters
-        if effect_name == "Strobe":
-            self._effect_colors = [self._effect_base_color, rgb(0, 0, 0)]
-        elif effect_name == "Police":
-            self._effect_colors = [rgb(255, 0, 0), rgb(0, 0, 255)]
-        elif effect_name == "Ambulance":
-            self._effect_colors = [rgb(255, 0, 0), rgb(255, 255, 255)]
-        elif effect_name == "Neon":
-            self._effect_colors = [
-                rgb(255, 0, 0), rgb(255, 165, 0), 
-                rgb(255, 255, 0), rgb(0, 255, 0),
-                rgb(0, 0, 255), rgb(75, 0, 130), 
-                rgb(238, 130, 238)
-            ]
-        elif effect_name == "Sun":
-            self._effect_colors = [rgb(255, 200, 0), rgb(255, 160, 0)]
-        elif effect_name == "Moon":
-            self._effect_colors = [rgb(200, 200, 255), rgb(160, 160, 200)]
-        elif effect_name == "Custom":
-            # Use the base color for custom effects
-            r, g, b = self._effect_base_color.r, self._effect_base_color.g, self._effect_base_color.b
-            self._effect_colors = [
-                self._effect_base_color, 
-                rgb(max(0, r-100), max(0, g-100), max(0, b-100))
-            ]
+        if (effect_name == "Music" and self.music is None) or (effect_name == "Palette" and not self.palette):
+            # Starts once set_music or set_palette provides its data
+            return
+        base = self._effect_base_color
+        self._effect = Effect(effect_name, (base.r, base.g, base.b), speed, self.music, self.palette)
+        self._effect_epoch = 0.0 if self._shared_clock else self._clock()
         
         # Start the effect in a background thread
-        self._effect_running = True
-        self._effect_thread = threading.Thread(target=self._run_effect)
+        token = object()
+        self._effect_token = token
+        self._effect_thread = threading.Thread(target=self._run_effect, args=(token,))
         self._effect_thread.daemon = True
         self._effect_thread.start()
     
+    def set_music(self, envelope):
+        """Use an AudioEnvelope (see softbox.audio) for the Music effect."""
+        self.music = envelope
+        if self._current_effect == "Music":
+            self.start_effect("Music")
+    
+    def set_palette(self, palette):
+        """Use a list of (r, g, b) colors for the Palette effect."""
+        self.palette = list(palette)
+        if self._current_effect == "Palette":
+            self.start_effect("Palette")
+    
     def set_speed(self, speed):
         """Set the speed of the current effect."""
-        self._effect_speed = speed
-    
-    def _run_effect(self):
-        """Run the effect in a background thread."""
-        while self._effect_running:
-            self._update_effect()
-            time.sleep(self._effect_speed / 1000)
+        if self._effect is not None and self._effect.envelope is None:
+            self._effect.speed = speed
     
-    def _update_effect(self):
-        """Update the visual state of the current effect."""
-        if self._current_effect == "None" or not self._effect_running:
-            return
-            
-        if self._current_effect in ["Strobe", "Police", "Ambulance", "Custom"]:
-            # Simple alternating effect
-            color = self._effect_colors[self._effect_step % len(self._effect_colors)]
-            self._apply_color(color)
-            self._effect_step += 1
-            
-        elif self._current_effect == "Neon":
-            # Cycle through colors
-            color = self._effect_colors[self._effect_step % len(self._effect_colors)]
-            self._apply_color(color)
-            self._effect_step += 1
-            
-        elif self._current_effect == "Sun":
-            # Pulsing effect
-            intensity = abs(50 - (self._effect_step % 100)) / 50.0  # 0.0 to 1.0
-            base_color = self._effect_colors[0]
-            r = max(0, min(255, base_color.r - int(40 * intensity)))
-            g = max(0, min(255, base_color.g - int(40 * intensity)))
-            b = max(0, min(255, base_color.b))
-            self._apply_color(rgb(r, g, b))
-            self._effect_step += 1
-            
-        elif self._current_effect == "Moon":
-            # Subtle glow effect
-            intensity = abs(50 - (self._effect_step % 100)) / 50.0  # 0.0 to 1.0
-            base_color = self._effect_colors[0]
-            r = max(0, min(255, base_color.r - int(30 * intensity)))
-            g = max(0, min(255, base_color.g - int(30 * intensity)))
-            b = max(0, min(255, base_color.b - int(30 * intensity)))
-            self._apply_color(rgb(r, g, b))
-            self._effect_step += 1
+    def _run_effect(self, token):
+        """Run the effect in a background thread, one frame per step."""
+        last = None
+        while True:
+            # Read the effect before checking the token: _stop_effect clears the
+            # token first, so a matching token means this effect is still current
+            effect = self._effect
+            if effect is None or self._effect_token is not token:
+                break
+            t_ms = (self._clock() - self._effect_epoch) * 1000.0
+            frame = effect.rgb_at(t_ms)
+            if frame != last:
+                last = frame
+                self._apply_color(rgb(*frame))
+            # Sleep until the next step boundary, at most 50 ms so speed changes apply quickly
+            time.sleep(min(effect.ms_until_next_step(t_ms), 50) / 1000)
     
     def _apply_color(self, color):
         """Apply color to the display (thread-safe)."""
@@ -350,14 +370,8 @@ class SoftBoxApp(toga.App):
         presets_box.add(standard_presets_label)
         
         # Create standard preset buttons in a grid-like layout
-        standard_presets = [
-            ("White", rgb(255, 255, 255)),
-            ("Red", rgb(255, 0, 0)),
-            ("Green", rgb(0, 255, 0)),
-            ("Blue", rgb(0, 0, 255)),
-            ("Warm", rgb(255, 180, 100)),
-            ("Cool", rgb(180, 200, 255))
-        ]
+        self.presets = PresetLibrary()
+        standard_presets = [(p.name, rgb(*p.rgb)) for p in self.presets.tagged("standard")]
         
         std_presets_row1 = toga.Box(style=Pack(direction=ROW))
         std_presets_row2 = toga.Box(style=Pack(direction=ROW))
@@ -379,13 +393,7 @@ class SoftBoxApp(toga.App):
         designer_presets_label = toga.Label("Designer Colors:", style=Pack(padding=(10, 0)))
         presets_box.add(designer_presets_label)
         
-        designer_presets = [
-            ("Prussian", rgb(0, 49, 83)),
-            ("Hermès", rgb(255, 88, 0)),
-            ("LV Brown", rgb(101, 67, 33)),
-            ("Tiffany", rgb(0, 175, 152)),
-            ("Louboutin", rgb(224, 23, 58))
-        ]
+        designer_presets = [(p.name, rgb(*p.rgb)) for p in self.presets.tagged("designer")]
         
         designer_presets_row1 = toga.Box(style=Pack(direction=ROW))
         designer_presets_row2 = toga.Box(style=Pack(direction=ROW))
@@ -417,9 +425,8 @@ class SoftBoxApp(toga.App):
         effect_label = toga.Label("Effect:", style=Pack(width=50))
         
         # Create selection with correct parameter name (on_change instead of on_select)
-        effect_items = ["None", "Strobe", "Police", "Ambulance", "Neon", "Sun", "Moon", "Custom"]
         self.effect_combo = toga.Selection(
-            items=effect_items,
+            items=SELECTABLE_EFFECTS,
             on_change=self.change_effect
         )
         
@@ -431,6 +438,18 @@ class SoftBoxApp(toga.App):
         self.speed_slider = SpeedSlider("Speed", 50, 1000, 500, on_change=self.update_speed)
         effects_container.add(self.speed_slider)
         
+        # Clock sync with other SoftBox instances on the LAN
+        sync_box = toga.Box(style=Pack(direction=ROW, padding=(5, 0, 0, 0)))
+        sync_label = toga.Label("Sync:", style=Pack(width=50))
+        self.sync_combo = toga.Selection(
+            items=["Off", "Leader", "Follower"],
+            on_change=self.change_sync
+        )
+        sync_box.add(sync_label)
+        sync_box.add(self.sync_combo)
+        effects_container.add(sync_box)
+        self.sync_clock = None
+        
         # Effect quick buttons in a grid-like layout
         effect_buttons_label = toga.Label("Quick Effects:", style=Pack(padding=(10, 0, 5, 0)))
         effects_container.add(effect_buttons_label)
@@ -540,6 +559,87 @@ class SoftBoxApp(toga.App):
         self.update_color()
 
 
+    def change_sync(self, widget):
+        """Switch between standalone, clock leader and follower."""
+        if widget.value == "Leader":
+            self.start_sync(leader=True)
+        elif widget.value == "Follower":
+            self.start_sync(leader=False)
+        else:
+            self.stop_sync()
+    
+    def start_sync(self, leader=False, host=None, port=SYNC_PORT):
+        """Share effect phase with other instances, as clock leader or follower."""
+        self.stop_sync()
+        if leader:
+            self.sync_clock = ClockLeader(port=port).start()
+        else:
+            # Without a host the leader is found by broadcast
+            self.sync_clock = SyncClock(host, port).start()
+        self.color_display.set_clock(self.sync_clock.now)
+    
+    def stop_sync(self):
+        """Go back to this device's own clock."""
+        if self.sync_clock is not None:
+            self.sync_clock.stop()
+            self.sync_clock = None
+        self.color_display.set_clock(local_clock, shared=False)
+    
+    def start_remote_server(self, host="127.0.0.1", port=8765):
+        """Serve the HTTP/WebSocket remote control on the app's own event loop."""
+        self.remote_server = RemoteServer(SoftBoxAppController(self), host, port)
+        self.remote_server.attach(self.loop)
+        return self.remote_server
+
+
+class SoftBoxAppController(CommandQueue):
+    """Thread-safe handle for a SoftBoxApp, with the same commands as the Qt controller."""
+    def __init__(self, app):
+        self.app = app
+        super().__init__()
+
+    def _request_drain(self):
+        self.app.loop.call_soon_threadsafe(self._drain)
+
+    def _snapshot(self):
+        app = self.app
+        return {
+            "color": [app.slider_r.value(), app.slider_g.value(), app.slider_b.value()],
+            "effect": app.effect_combo.value or "None",
+            "speed": app.speed_slider.value(),
+            "playing": app.color_display.is_playing(),
+        }
+
+    def _apply_color(self, r, g, b):
+        self.app.apply_preset(rgb(*self._check_rgb(r, g, b)))
+
+    def _apply_effect(self, effect_name, speed=None):
+        if effect_name not in EFFECT_NAMES:
+            raise ValueError(f"unknown effect: {effect_name}")
+        if effect_name not in SELECTABLE_EFFECTS:
+            raise ValueError(f"{effect_name} is not available in the Toga app")
+        if speed is not None:
+            self._apply_speed(speed)
+        if self.app.effect_combo.value == effect_name:
+            self.app.change_effect(self.app.effect_combo)
+        else:
+            self.app.effect_combo.value = effect_name
+
+    def _apply_speed(self, speed):
+        slider = self.app.speed_slider.slider
+        if not slider.min <= int(speed) <= slider.max:
+            raise ValueError(f"speed must be between {int(slider.min)} and {int(slider.max)} ms")
+        self.app.speed_slider.set_value(int(speed))
+        self.app.update_speed()
+
+    def _apply_cue(self, sequence, loop=False):
+        self.app.color_display.play_sequence(sequence, loop)
+
+    def _apply_stop(self):
+        self.app.effect_combo.value = "None"
+        self.app.color_display.start_effect("None")
+
+
 def main():
     # Use app_id as keyword argument
     return SoftBoxApp(app_id='org.example.softbox', formal_name="SoftBox")
@@ -0,0 +1,232 @@
+"""
+Preset browser for large preset libraries.
+
+The presets are shown by one QListView over a PresetModel rather than by
+a button per preset. The model only holds the ids that match the current
+filter, hands them to the view in batches as it scrolls, and builds an
+item's data when the view asks for it. A SwatchDelegate paints each
+visible item directly. Startup cost and memory therefore do not grow
+with the library: a 2000-color brand library creates the same handful
+of widgets as the default eleven presets.
+"""
+from PySide6.QtCore import QAbstractListModel, QModelIndex, QRectF, QSize, Qt, Signal
+from PySide6.QtGui import QColor, QPen
+from PySide6.QtWidgets import (
+    QComboBox, QHBoxLayout, QLineEdit, QListView, QMenu, QStyle, QStyledItemDelegate, QVBoxLayout, QWidget
+)
+
+ALL_PRESETS = "All Presets"
+FAVORITES = "Favorites"
+
+
+class PresetModel(QAbstractListModel):
+    """Presets of a PresetLibrary that match a search, loaded in batches."""
+    PresetRole = Qt.UserRole + 1
+    BATCH = 256
+
+    def __init__(self, library, parent=None):
+        super().__init__(parent)
+        self.library = library
+        self.query = ""
+        self.tag = None
+        self.favorites_only = False
+        self._ids = []
+        self._loaded = 0
+        library.add_listener(self.refresh)
+        self.destroyed.connect(lambda: library.remove_listener(self.refresh))
+        self.refresh()
+
+    def set_filter(self, query=None, tag=None, favorites_only=None):
+        """Show only presets matching ``query``, carrying ``tag`` or marked favorite."""
+        if query is not None:
+            self.query = query
+        self.tag = tag
+        if favorites_only is not None:
+            self.favorites_only = favorites_only
+        self.refresh()
+
+    def refresh(self):
+        """Search the library again, e.g. after it changed.
+
+        Only a change in which presets match resets the model. Edits that
+        keep the matches repaint the loaded rows, and a new order of the
+        same matches moves them, so the view keeps its scroll position
+        and selection.
+        """
+        ids = [preset.id for preset in self.library.search(self.query, self.tag, self.favorites_only)]
+        if ids == self._ids:
+            if self._loaded:
+                self.dataChanged.emit(self.index(0), self.index(self._loaded - 1))
+        elif sorted(ids) == sorted(self._ids):
+            self.layoutAboutToBeChanged.emit()
+            rows = {preset_id: row for row, preset_id in enumerate(ids)}
+            old = self.persistentIndexList()
+            moved = [rows[self._ids[index.row()]] for index in old]
+            self._ids = ids
+            self.changePersistentIndexList(old, [self.index(row) if row < self._loaded else QModelIndex()
+                                                 for row in moved])
+            self.layoutChanged.emit()
+        else:
+            self.beginResetModel()
+            self._ids = ids
+            self._loaded = min(len(self._ids), self.BATCH)
+            self.endResetModel()
+
+    def matches(self):
+        """Number of matching presets, loaded into the view or not."""
+        return len(self._ids)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self._loaded < len(self._ids)
+
+    def fetchMore(self, parent):
+        count = min(self.BATCH, len(self._ids) - self._loaded)
+        if parent.isValid() or count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def preset(self, row):
+        return self.library.get(self._ids[row])
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self._loaded:
+            return None
+        preset = self.preset(index.row())
+        if role == Qt.DisplayRole:
+            return preset.name
+        if role == Qt.DecorationRole:
+            return QColor(*preset.rgb)
+        if role == Qt.ToolTipRole:
+            tags = f" ({', '.join(preset.tags)})" if preset.tags else ""
+            return f"{preset.name}{tags}\n{QColor(*preset.rgb).name()}"
+        if role == self.PresetRole:
+            return preset
+        return None
+
+
+class SwatchDelegate(QStyledItemDelegate):
+    """Paints a preset as a swatch of its color with its name, starred if a favorite."""
+    def __init__(self, size=QSize(92, 25), parent=None):
+        super().__init__(parent)
+        self.size = size
+
+    def sizeHint(self, option, index):
+        return self.size
+
+    def paint(self, painter, option, index):
+        preset = index.data(PresetModel.PresetRole)
+        if preset is None:
+            return
+        color = QColor(*preset.rgb)
+        rect = QRectF(option.rect).adjusted(1.5, 1.5, -1.5, -1.5)
+        painter.save()
+        painter.setRenderHint(painter.RenderHint.Antialiasing)
+        if option.state & QStyle.State_Selected:
+            painter.setPen(QPen(option.palette.highlight().color(), 2))
+        else:
+            painter.setPen(Qt.NoPen)
+        painter.setBrush(color)
+        painter.drawRoundedRect(rect, 3, 3)
+
+        # Same text color rule as the old preset buttons
+        painter.setPen(QColor("black") if color.lightness() > 128 else QColor("white"))
+        text_rect = rect.adjusted(4, 0, -4, 0)
+        if preset.favorite:
+            painter.drawText(text_rect, Qt.AlignRight | Qt.AlignTop, "★")
+            text_rect.adjust(0, 0, -8, 0)
+        name = option.fontMetrics.elidedText(preset.name, Qt.ElideRight, int(text_rect.width()))
+        painter.drawText(text_rect, Qt.AlignCenter, name)
+        painter.restore()
+
+
+class PresetBrowser(QWidget):
+    """Search field, tag filter and swatch list over a PresetLibrary.
+
+    Emits ``chosen`` with the Preset that was clicked. The context menu of
+    a swatch toggles it as a favorite or deletes it from the library.
+    """
+    chosen = Signal(object)
+
+    def __init__(self, library, parent=None):
+        super().__init__(parent)
+        self.library = library
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        filter_layout = QHBoxLayout()
+        self.search = QLineEdit()
+        self.search.setPlaceholderText("Search presets...")
+        self.search.setClearButtonEnabled(True)
+        self.search.textChanged.connect(self.apply_filter)
+        filter_layout.addWidget(self.search, 1)
+
+        self.tag_combo = QComboBox()
+        self.tag_combo.currentTextChanged.connect(self.apply_filter)
+        filter_layout.addWidget(self.tag_combo)
+        layout.addLayout(filter_layout)
+
+        # Create the swatch view; uniform sizes let it lay out rows without asking every item
+        self.model = PresetModel(library, self)
+        self.view = QListView()
+        self.view.setModel(self.model)
+        self.view.setItemDelegate(SwatchDelegate(parent=self.view))
+        self.view.setFlow(QListView.LeftToRight)
+        self.view.setWrapping(True)
+        self.view.setResizeMode(QListView.Adjust)
+        self.view.setUniformItemSizes(True)
+        self.view.setLayoutMode(QListView.Batched)
+        self.view.setBatchSize(PresetModel.BATCH)
+        self.view.setSpacing(1)
+        self.view.setMinimumHeight(84)
+        self.view.clicked.connect(self._clicked)
+        self.view.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.view.customContextMenuRequested.connect(self._context_menu)
+        layout.addWidget(self.view)
+
+        self._tags = None
+        self.update_tags()
+        library.add_listener(self.update_tags)
+        self.destroyed.connect(lambda: library.remove_listener(self.update_tags))
+
+    def update_tags(self):
+        """Offer every tag of the library in the filter combo."""
+        tags = self.library.tags()
+        if tags == self._tags:
+            return
+        self._tags = tags
+        current = self.tag_combo.currentText() or ALL_PRESETS
+        self.tag_combo.blockSignals(True)
+        self.tag_combo.clear()
+        self.tag_combo.addItems([ALL_PRESETS, FAVORITES] + tags)
+        self.tag_combo.setCurrentText(current if current in [ALL_PRESETS, FAVORITES] + tags else ALL_PRESETS)
+        self.tag_combo.blockSignals(False)
+        if self.tag_combo.currentText() != current:
+            self.apply_filter()
+
+    def apply_filter(self, *args):
+        choice = self.tag_combo.currentText()
+        tag = None if choice in (ALL_PRESETS, FAVORITES, "") else choice
+        self.model.set_filter(self.search.text(), tag, choice == FAVORITES)
+
+    def _clicked(self, index):
+        preset = index.data(PresetModel.PresetRole)
+        if preset is not None:
+            self.chosen.emit(preset)
+
+    def _context_menu(self, pos):
+        preset = self.view.indexAt(pos).data(PresetModel.PresetRole)
+        if preset is None:
+            return
+        menu = QMenu(self)
+        favorite = menu.addAction("Remove from Favorites" if preset.favorite else "Add to Favorites")
+        delete = menu.addAction("Delete Preset")
+        action = menu.exec(self.view.viewport().mapToGlobal(pos))
+        if action is favorite:
+            self.library.set_favorite(preset.id, not preset.favorite)
+        elif action is delete:
+            self.library.remove(preset.id)
@@ -0,0 +1,136 @@
+"""
+Per-display color calibration.
+
+A Calibration is either three 256-entry curves (one per channel) or a
+3D LUT, and can be read from ``.cube`` files as written by DisplayCAL,
+Resolve and most grading tools. Single colors go through ``apply``;
+whole frame tables go through ``apply_frames`` once, when an effect is
+compiled, so playback only looks up already calibrated frames.
+"""
+import os
+import re
+
+import numpy as np
+
+
+class CubeError(ValueError):
+    """Raised for a malformed ``.cube`` file."""
+
+
+class Calibration:
+    """Channel curves (3, 256) or a 3D LUT (N, N, N, 3) indexed [b, g, r], values 0-1."""
+    def __init__(self, curves=None, lut=None, title=""):
+        if (curves is None) == (lut is None):
+            raise ValueError("pass exactly one of curves or lut")
+        self.title = title
+        self.curves = None
+        self.lut = None
+        if curves is not None:
+            curves = np.asarray(curves)
+            if curves.shape != (3, 256):
+                raise ValueError(f"curves must have shape (3, 256), got {curves.shape}")
+            self.curves = np.clip(np.rint(curves), 0, 255).astype(np.uint8)
+        else:
+            lut = np.asarray(lut, dtype=np.float32)
+            if lut.ndim != 4 or lut.shape[3] != 3 or not lut.shape[0] == lut.shape[1] == lut.shape[2] >= 2:
+                raise ValueError(f"lut must have shape (N, N, N, 3), got {lut.shape}")
+            self.lut = lut
+
+    @classmethod
+    def identity(cls):
+        ramp = np.arange(256)
+        return cls(curves=np.stack([ramp, ramp, ramp]))
+
+    @classmethod
+    def from_cube(cls, path):
+        """Read a 1D or 3D ``.cube`` LUT."""
+        title = ""
+        size_1d = size_3d = None
+        domain_min = np.zeros(3)
+        domain_max = np.ones(3)
+        rows = []
+        with open(path, encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                keyword, _, rest = line.partition(" ")
+                try:
+                    if keyword == "TITLE":
+                        title = rest.strip().strip('"')
+                    elif keyword == "LUT_1D_SIZE":
+                        size_1d = int(rest)
+                    elif keyword == "LUT_3D_SIZE":
+                        size_3d = int(rest)
+                    elif keyword == "DOMAIN_MIN":
+                        domain_min = np.array(rest.split(), dtype=np.float64)
+                    elif keyword == "DOMAIN_MAX":
+                        domain_max = np.array(rest.split(), dtype=np.float64)
+                    elif keyword in ("LUT_1D_INPUT_RANGE", "LUT_3D_INPUT_RANGE"):
+                        low, high = (float(v) for v in rest.split())
+                        domain_min, domain_max = np.full(3, low), np.full(3, high)
+                    elif re.match(r"^[-+.\d]", keyword):
+                        rows.append([float(v) for v in line.split()])
+                    # Other keywords are vendor extensions, ignored
+                except ValueError:
+                    raise CubeError(f"{path}:{number}: cannot parse {line!r}") from None
+
+        if (size_1d is None) == (size_3d is None):
+            raise CubeError(f"{path}: need exactly one of LUT_1D_SIZE or LUT_3D_SIZE")
+        data = np.array(rows, dtype=np.float64)
+        expected = size_1d if size_1d is not None else size_3d ** 3
+        if data.shape != (expected, 3):
+            raise CubeError(f"{path}: expected {expected} rows of 3 values, got {data.shape}")
+
+        if size_1d is not None:
+            # Resample the curve at the 256 input codes
+            grid = np.linspace(domain_min, domain_max, size_1d)
+            curves = [np.interp(np.arange(256) / 255.0, grid[:, c], data[:, c]) for c in range(3)]
+            return cls(curves=np.clip(np.array(curves), 0.0, 1.0) * 255.0, title=title)
+        if np.any(domain_min != 0) or np.any(domain_max != 1):
+            raise CubeError(f"{path}: 3D LUTs with a custom domain are not supported")
+        # Red changes fastest in the file, so the array is indexed [b, g, r]
+        return cls(lut=data.reshape(size_3d, size_3d, size_3d, 3), title=title)
+
+    def apply(self, rgb):
+        """Calibrate one (r, g, b) color."""
+        if self.curves is not None:
+            curves = self.curves
+            r, g, b = rgb
+            return int(curves[0, r]), int(curves[1, g]), int(curves[2, b])
+        r, g, b = self.apply_frames(np.array([rgb], dtype=np.uint8))[0].tolist()
+        return r, g, b
+
+    def apply_frames(self, frames):
+        """Calibrate a (K, 3) uint8 frame table."""
+        frames = np.asarray(frames, dtype=np.uint8)
+        if self.curves is not None:
+            return np.stack([self.curves[c][frames[:, c]] for c in range(3)], axis=1)
+
+        # Trilinear interpolation between the 8 surrounding LUT points
+        size = self.lut.shape[0]
+        position = frames.astype(np.float32) * ((size - 1) / 255.0)
+        low = np.minimum(position.astype(np.int64), size - 2)
+        fraction = position - low
+        result = np.zeros(frames.shape, dtype=np.float32)
+        for corner in range(8):
+            offset = np.array([(corner >> c) & 1 for c in range(3)])
+            weight = np.prod(np.where(offset, fraction, 1.0 - fraction), axis=1)
+            index = low + offset
+            result += weight[:, None] * self.lut[index[:, 2], index[:, 1], index[:, 0]]
+        return np.clip(np.rint(result * 255.0), 0, 255).astype(np.uint8)
+
+
+def profile_for_screen(screen, directory):
+    """The Calibration for a QScreen from ``directory``, or None.
+
+    Profiles are named after the screen (``DELL U2720Q.cube``), with
+    ``default.cube`` as the fallback.
+    """
+    name = re.sub(r'[\\/:*?"<>|]', "_", screen.name()) if screen is not None else ""
+    for candidate in (name, screen.model() if screen is not None else "", "default"):
+        if candidate:
+            path = os.path.join(directory, candidate + ".cube")
+            if os.path.exists(path):
+                return Calibration.from_cube(path)
+    return None
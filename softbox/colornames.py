@@ -0,0 +1,194 @@
+"""
+Nearest named color for any RGB value.
+
+A ColorNames database keeps its colors in compact NumPy arrays: names,
+8-bit RGB and CIE L*a*b* (D65). Nearness is the Euclidean distance in
+L*a*b* (Delta E 1976). For lookups the L*a*b* space is cut into cubic
+cells, and every occupied neighbourhood of 3 x 3 x 3 cells gets its
+candidates precomputed. A query converts its color with table lookups,
+finds its cell in a dict and measures only those candidates. Anything
+outside the neighbourhood is at least one cell size away, so a match
+closer than that is exact; otherwise the query falls back to all colors.
+Recent queries are memoized, since a dragged slider revisits colors.
+"""
+import csv
+import math
+
+import numpy as np
+
+from softbox.dimmer import srgb_to_linear
+
+# The CSS named colors, one name per color
+CSS_COLORS = {
+    "aliceblue": "#f0f8ff", "antiquewhite": "#faebd7", "aqua": "#00ffff", "aquamarine": "#7fffd4",
+    "azure": "#f0ffff", "beige": "#f5f5dc", "bisque": "#ffe4c4", "black": "#000000", "blanchedalmond": "#ffebcd",
+    "blue": "#0000ff", "blueviolet": "#8a2be2", "brown": "#a52a2a", "burlywood": "#deb887", "cadetblue": "#5f9ea0",
+    "chartreuse": "#7fff00", "chocolate": "#d2691e", "coral": "#ff7f50", "cornflowerblue": "#6495ed",
+    "cornsilk": "#fff8dc", "crimson": "#dc143c", "darkblue": "#00008b", "darkcyan": "#008b8b",
+    "darkgoldenrod": "#b8860b", "darkgray": "#a9a9a9", "darkgreen": "#006400", "darkkhaki": "#bdb76b",
+    "darkmagenta": "#8b008b", "darkolivegreen": "#556b2f", "darkorange": "#ff8c00", "darkorchid": "#9932cc",
+    "darkred": "#8b0000", "darksalmon": "#e9967a", "darkseagreen": "#8fbc8f", "darkslateblue": "#483d8b",
+    "darkslategray": "#2f4f4f", "darkturquoise": "#00ced1", "darkviolet": "#9400d3", "deeppink": "#ff1493",
+    "deepskyblue": "#00bfff", "dimgray": "#696969", "dodgerblue": "#1e90ff", "firebrick": "#b22222",
+    "floralwhite": "#fffaf0", "forestgreen": "#228b22", "fuchsia": "#ff00ff", "gainsboro": "#dcdcdc",
+    "ghostwhite": "#f8f8ff", "gold": "#ffd700", "goldenrod": "#daa520", "gray": "#808080", "green": "#008000",
+    "greenyellow": "#adff2f", "honeydew": "#f0fff0", "hotpink": "#ff69b4", "indianred": "#cd5c5c",
+    "indigo": "#4b0082", "ivory": "#fffff0", "khaki": "#f0e68c", "lavender": "#e6e6fa", "lavenderblush": "#fff0f5",
+    "lawngreen": "#7cfc00", "lemonchiffon": "#fffacd", "lightblue": "#add8e6", "lightcoral": "#f08080",
+    "lightcyan": "#e0ffff", "lightgoldenrodyellow": "#fafad2", "lightgray": "#d3d3d3", "lightgreen": "#90ee90",
+    "lightpink": "#ffb6c1", "lightsalmon": "#ffa07a", "lightseagreen": "#20b2aa", "lightskyblue": "#87cefa",
+    "lightslategray": "#778899", "lightsteelblue": "#b0c4de", "lightyellow": "#ffffe0", "lime": "#00ff00",
+    "limegreen": "#32cd32", "linen": "#faf0e6", "maroon": "#800000", "mediumaquamarine": "#66cdaa",
+    "mediumblue": "#0000cd", "mediumorchid": "#ba55d3", "mediumpurple": "#9370db", "mediumseagreen": "#3cb371",
+    "mediumslateblue": "#7b68ee", "mediumspringgreen": "#00fa9a", "mediumturquoise": "#48d1cc",
+    "mediumvioletred": "#c71585", "midnightblue": "#191970", "mintcream": "#f5fffa", "mistyrose": "#ffe4e1",
+    "moccasin": "#ffe4b5", "navajowhite": "#ffdead", "navy": "#000080", "oldlace": "#fdf5e6", "olive": "#808000",
+    "olivedrab": "#6b8e23", "orange": "#ffa500", "orangered": "#ff4500", "orchid": "#da70d6",
+    "palegoldenrod": "#eee8aa", "palegreen": "#98fb98", "paleturquoise": "#afeeee", "palevioletred": "#db7093",
+    "papayawhip": "#ffefd5", "peachpuff": "#ffdab9", "peru": "#cd853f", "pink": "#ffc0cb", "plum": "#dda0dd",
+    "powderblue": "#b0e0e6", "purple": "#800080", "red": "#ff0000", "rosybrown": "#bc8f8f", "royalblue": "#4169e1",
+    "saddlebrown": "#8b4513", "salmon": "#fa8072", "sandybrown": "#f4a460", "seagreen": "#2e8b57",
+    "seashell": "#fff5ee", "sienna": "#a0522d", "silver": "#c0c0c0", "skyblue": "#87ceeb", "slateblue": "#6a5acd",
+    "slategray": "#708090", "snow": "#fffafa", "springgreen": "#00ff7f", "steelblue": "#4682b4", "tan": "#d2b48c",
+    "teal": "#008080", "thistle": "#d8bfd8", "tomato": "#ff6347", "turquoise": "#40e0d0", "violet": "#ee82ee",
+    "wheat": "#f5deb3", "white": "#ffffff", "whitesmoke": "#f5f5f5", "yellow": "#ffff00", "yellowgreen": "#9acd32",
+}
+
+# Linear light of every 8-bit code, and sRGB (D65) to XYZ normalized by the white point
+_LINEAR = srgb_to_linear(np.arange(256)).tolist()
+_XYZ = np.array([[0.4124564, 0.3575761, 0.1804375],
+                 [0.2126729, 0.7151522, 0.0721750],
+                 [0.0193339, 0.1191920, 0.9503041]]) / np.array([[0.95047], [1.0], [1.08883]])
+_XYZ_ROWS = _XYZ.tolist()
+_EPSILON = 216 / 24389
+_KAPPA = 24389 / 27
+
+# Rough L*a*b* volume the sRGB gamut occupies, for picking a cell size
+_GAMUT_VOLUME = 100.0 * 180.0 * 200.0
+
+
+def rgb_to_lab(rgb):
+    """(..., 3) 8-bit sRGB to (..., 3) CIE L*a*b* under D65."""
+    xyz = srgb_to_linear(rgb) @ _XYZ.T
+    f = np.where(xyz > _EPSILON, np.cbrt(xyz), (_KAPPA * xyz + 16) / 116)
+    return np.stack([116 * f[..., 1] - 16, 500 * (f[..., 0] - f[..., 1]), 200 * (f[..., 1] - f[..., 2])], axis=-1)
+
+
+def _lab(r, g, b):
+    """rgb_to_lab for one color in plain Python, which is faster than NumPy for a single value."""
+    lr, lg, lb = _LINEAR[r], _LINEAR[g], _LINEAR[b]
+    fx, fy, fz = ((v ** (1 / 3) if v > _EPSILON else (_KAPPA * v + 16) / 116)
+                  for v in (row[0] * lr + row[1] * lg + row[2] * lb for row in _XYZ_ROWS))
+    return 116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)
+
+
+def _parse_hex(text):
+    text = text.strip().lstrip("#")
+    if len(text) != 6:
+        raise ValueError(f"not a #rrggbb color: {text!r}")
+    return tuple(int(text[i:i + 2], 16) for i in (0, 2, 4))
+
+
+class ColorNames:
+    """Named colors with a nearest-match index in L*a*b*.
+
+    ``cell_size`` is the edge of an index cell in Delta E; by default it
+    shrinks as the database grows, keeping a few colors per cell.
+    """
+    def __init__(self, names, colors, cell_size=None):
+        self.names = list(names)
+        self.rgb = np.asarray(colors, dtype=np.uint8).reshape(-1, 3)
+        if len(self.names) != len(self.rgb):
+            raise ValueError("need one color per name")
+        if not self.names:
+            raise ValueError("a color name database needs at least one color")
+        self.lab = rgb_to_lab(self.rgb).astype(np.float32)
+        if cell_size is None:
+            cell_size = max(2.0, (_GAMUT_VOLUME / len(self.names)) ** (1 / 3))
+        self.cell_size = float(cell_size)
+        self._cells = self._build_cells()
+        self._memo = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def css(cls, **kwargs):
+        """The CSS named colors."""
+        return cls(CSS_COLORS, [_parse_hex(value) for value in CSS_COLORS.values()], **kwargs)
+
+    @classmethod
+    def from_presets(cls, library, **kwargs):
+        """Every preset of a PresetLibrary, e.g. a brand color list."""
+        presets = list(library)
+        return cls([preset.name for preset in presets], [preset.rgb for preset in presets], **kwargs)
+
+    @classmethod
+    def from_csv(cls, path, **kwargs):
+        """Read ``name,#rrggbb`` or ``name,r,g,b`` rows; a header row is skipped."""
+        names, colors = [], []
+        with open(path, newline="", encoding="utf-8") as f:
+            for line, row in enumerate(csv.reader(f), 1):
+                row = [cell.strip() for cell in row]
+                if not row or not row[0] or row[0].startswith("#"):
+                    continue
+                try:
+                    color = _parse_hex(row[1]) if len(row) == 2 else tuple(int(v) for v in row[1:4])
+                    if len(color) != 3 or not all(0 <= v <= 255 for v in color):
+                        raise ValueError(f"bad color: {row[1:]}")
+                except (IndexError, ValueError) as exc:
+                    if line == 1 and not names:
+                        continue  # header
+                    raise ValueError(f"{path}:{line}: {exc}") from None
+                names.append(row[0])
+                colors.append(color)
+        return cls(names, colors, **kwargs)
+
+    def _cell(self, lab):
+        size = self.cell_size
+        return math.floor(lab[0] / size), math.floor(lab[1] / size), math.floor(lab[2] / size)
+
+    def _build_cells(self):
+        """{cell: (indices, lab)} of the colors in each cell's 3 x 3 x 3 neighbourhood."""
+        cells = np.floor(self.lab / self.cell_size).astype(np.int64)
+        offsets = np.array([(x, y, z) for x in (-1, 0, 1) for y in (-1, 0, 1) for z in (-1, 0, 1)])
+        # Every color is a candidate of its own cell and the 26 around it
+        neighbours = (cells[:, None, :] + offsets[None, :, :]).reshape(-1, 3)
+        indices = np.repeat(np.arange(len(cells)), len(offsets))
+        keys, inverse = np.unique(neighbours, axis=0, return_inverse=True)
+        order = np.argsort(inverse.ravel(), kind="stable")
+        bounds = np.searchsorted(inverse.ravel()[order], np.arange(len(keys) + 1))
+        result = {}
+        for n, key in enumerate(keys.tolist()):
+            members = indices[order[bounds[n]:bounds[n + 1]]].astype(np.int32)
+            result[tuple(key)] = (members, self.lab[members])
+        return result
+
+    def nearest_index(self, rgb):
+        """(index, Delta E) of the color closest to ``rgb``."""
+        rgb = tuple(int(v) for v in rgb)
+        found = self._memo.get(rgb)
+        if found is not None:
+            return found
+        lab = _lab(*rgb)
+        cell = self._cells.get(self._cell(lab))
+        found = None
+        if cell is not None:
+            members, candidates = cell
+            distances = ((candidates - np.asarray(lab, dtype=np.float32)) ** 2).sum(axis=1)
+            best = int(distances.argmin())
+            if distances[best] <= self.cell_size ** 2:
+                found = int(members[best]), math.sqrt(float(distances[best]))
+        if found is None:
+            distances = ((self.lab - np.asarray(lab, dtype=np.float32)) ** 2).sum(axis=1)
+            best = int(distances.argmin())
+            found = best, math.sqrt(float(distances[best]))
+        if len(self._memo) >= 4096:
+            self._memo.clear()
+        self._memo[rgb] = found
+        return found
+
+    def nearest(self, rgb):
+        """(name, (r, g, b), Delta E) of the named color closest to ``rgb``."""
+        index, distance = self.nearest_index(rgb)
+        return self.names[index], tuple(int(v) for v in self.rgb[index]), distance
@@ -0,0 +1,222 @@
+"""
+Non-blocking controllers for driving SoftBox from other code.
+"""
+import collections
+import time
+from concurrent.futures import Future
+
+from PySide6.QtCore import QCoreApplication, QEvent, QObject
+from PySide6.QtGui import QColor
+
+
+class CommandQueue:
+    """Thread-safe command queue applied in one pass on the GUI thread.
+
+    Commands are appended to a deque (``append``/``popleft`` are atomic, so
+    submitters never take a lock). The first command after a drain asks the
+    GUI toolkit to wake up through ``_request_drain``, and everything pending
+    is then applied at once, so bursts cost one wake-up and nothing polls
+    while idle.
+
+    Every command returns a ``concurrent.futures.Future`` that resolves once
+    the command has been applied; wrap it with ``asyncio.wrap_future`` to
+    await it from asyncio code. Subclasses implement the ``_apply_*``
+    methods, ``_snapshot`` and ``_request_drain`` for their toolkit.
+    """
+    def __init__(self):
+        self._queue = collections.deque()
+        self._wake_pending = False
+        self._listeners = []
+
+        self._applied = 0
+        self._failed = 0
+        self._drains = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._state = self._snapshot()
+
+    # Public commands, safe to call from any thread
+
+    def set_color(self, r, g, b):
+        """Set the static RGB color."""
+        return self.submit(self._apply_color, r, g, b)
+
+    def start_effect(self, effect_name, speed=None):
+        """Start a named effect, optionally with a new speed in ms."""
+        return self.submit(self._apply_effect, effect_name, speed)
+
+    def set_speed(self, speed):
+        """Set the effect speed in ms."""
+        return self.submit(self._apply_speed, speed)
+
+    def run_cue(self, sequence, loop=False):
+        """Play a ColorSequence (or any source with rgb_at) as a cue."""
+        return self.submit(self._apply_cue, sequence, loop)
+
+    def stop(self):
+        """Stop effects and cues and return to the static color."""
+        return self.submit(self._apply_stop)
+
+    def call(self, fn, *args):
+        """Run ``fn(*args)`` on the GUI thread in the next drain."""
+        return self.submit(fn, *args)
+
+    def submit(self, fn, *args):
+        """Queue ``fn(*args)`` for the GUI thread and return its Future."""
+        future = Future()
+        self._queue.append((fn, args, future, time.perf_counter()))
+        # Only the first command since the last drain needs to wake the GUI thread
+        if not self._wake_pending:
+            self._wake_pending = True
+            self._request_drain()
+        return future
+
+    def add_state_listener(self, callback):
+        """Call ``callback(state)`` on the GUI thread after each applied batch."""
+        self._listeners.append(callback)
+
+    def state(self):
+        """Return the last applied state as a dict (safe from any thread)."""
+        return self._state
+
+    def stats(self):
+        """Return command counters and submit-to-apply latency in ms."""
+        return {
+            "submitted": self._applied + len(self._queue),
+            "applied": self._applied,
+            "failed": self._failed,
+            "pending": len(self._queue),
+            "drains": self._drains,
+            "latency_mean_ms": 1000 * self._latency_total / self._applied if self._applied else 0.0,
+            "latency_max_ms": 1000 * self._latency_max,
+        }
+
+    # GUI thread side
+
+    def _request_drain(self):
+        raise NotImplementedError
+
+    def _drain(self):
+        """Apply every pending command (runs on the GUI thread)."""
+        # Reset before draining so a command queued mid-drain still wakes us
+        self._wake_pending = False
+        self._drains += 1
+        outcomes = []
+        while self._queue:
+            try:
+                fn, args, future, queued_at = self._queue.popleft()
+            except IndexError:
+                break
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                outcomes.append((future, fn(*args), None))
+            except Exception as exc:
+                self._failed += 1
+                outcomes.append((future, None, exc))
+            latency = time.perf_counter() - queued_at
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
+            self._applied += 1
+
+        if not outcomes:
+            return
+        # Update the state first so a resolved Future always sees its effect
+        self._state = self._snapshot()
+        for future, result, exc in outcomes:
+            if exc is None:
+                future.set_result(result)
+            else:
+                future.set_exception(exc)
+        for callback in self._listeners:
+            callback(self._state)
+
+    def _snapshot(self):
+        raise NotImplementedError
+
+    @staticmethod
+    def _check_rgb(r, g, b):
+        for value in (r, g, b):
+            if not 0 <= int(value) <= 255:
+                raise ValueError(f"color component out of range: {value}")
+        return int(r), int(g), int(b)
+
+
+class _Waker(QObject):
+    """Runs a callback on the GUI thread when woken from any thread."""
+    EVENT_TYPE = QEvent.Type(QEvent.registerEventType())
+
+    def __init__(self, callback, parent=None):
+        super().__init__(parent)
+        self._callback = callback
+
+    def wake(self):
+        # postEvent is thread-safe and queues onto this object's thread
+        QCoreApplication.postEvent(self, QEvent(self.EVENT_TYPE))
+
+    def customEvent(self, event):
+        if event.type() == self.EVENT_TYPE:
+            self._callback()
+
+
+class SoftBoxController(CommandQueue):
+    """Thread-safe handle for a Qt SoftBox window."""
+    def __init__(self, window):
+        self.window = window
+        self._waker = _Waker(self._drain, window)
+        super().__init__()
+
+    def _request_drain(self):
+        self._waker.wake()
+
+    def stats(self):
+        """Command counters, plus the flash guard's counters when it is on."""
+        stats = super().stats()
+        guard = self.window.color_display.flash_guard
+        if guard is not None:
+            stats["flash_guard"] = guard.stats()
+        return stats
+
+    def _snapshot(self):
+        window = self.window
+        color = window.color
+        return {
+            "color": [color.red(), color.green(), color.blue()],
+            "effect": window.effect_combo.currentText(),
+            "speed": window.speed_slider.value(),
+            "playing": window.color_display.is_playing(),
+        }
+
+    def _apply_color(self, r, g, b):
+        self.window.apply_preset(QColor(*self._check_rgb(r, g, b)))
+
+    def _apply_effect(self, effect_name, speed=None):
+        combo = self.window.effect_combo
+        if combo.findText(effect_name) < 0:
+            raise ValueError(f"unknown effect: {effect_name}")
+        if speed is not None:
+            self._apply_speed(speed)
+        if combo.currentText() == effect_name:
+            # Restart explicitly, the combo box won't signal an unchanged value
+            self.window.change_effect(effect_name)
+        else:
+            combo.setCurrentText(effect_name)
+
+    def _apply_speed(self, speed):
+        slider = self.window.speed_slider
+        low, high = slider.slider.minimum(), slider.slider.maximum()
+        if not low <= int(speed) <= high:
+            raise ValueError(f"speed must be between {low} and {high} ms")
+        slider.setValue(int(speed))
+        self.window.update_speed()
+
+    def _apply_cue(self, sequence, loop=False):
+        combo = self.window.effect_combo
+        combo.blockSignals(True)
+        combo.setCurrentText("None")
+        combo.blockSignals(False)
+        self.window.color_display.play_sequence(sequence, loop)
+
+    def _apply_stop(self):
+        self.window.effect_combo.setCurrentText("None")
+        self.window.color_display.start_effect("None")
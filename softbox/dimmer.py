@@ -0,0 +1,83 @@
+"""
+Master dimmer with a perceptual curve and temporal dithering.
+
+The dimmer level is perceptual lightness (CIE L*), so equal slider steps
+look like equal steps even near black. Dimming scales linear light, and
+the exact result usually falls between two 8-bit codes: ``3.25`` is
+shown as 3 for three display frames and 4 for the fourth. The on/off
+patterns for every fraction are precomputed, and so is a per-level table
+of output codes for every phase, so dimming a frame is one lookup.
+"""
+import numpy as np
+
+# Frames in one dither cycle, i.e. extra levels between two 8-bit codes
+DITHER_FRAMES = 16
+
+
+def srgb_to_linear(codes):
+    """sRGB codes (0-255, any shape) to linear light in 0-1."""
+    v = np.asarray(codes, dtype=np.float64) / 255.0
+    return np.where(v <= 0.04045, v / 12.92, ((v + 0.055) / 1.055) ** 2.4)
+
+
+def linear_to_srgb(linear):
+    """Linear light in 0-1 to unrounded sRGB codes in 0-255."""
+    v = np.clip(np.asarray(linear, dtype=np.float64), 0.0, 1.0)
+    return 255.0 * np.where(v <= 0.0031308, 12.92 * v, 1.055 * v ** (1 / 2.4) - 0.055)
+
+
+def perceptual_to_linear(level):
+    """Light output (0-1) for a perceptual dimmer ``level`` (0-1), via CIE L*."""
+    lightness = 100.0 * min(max(float(level), 0.0), 1.0)
+    if lightness > 8.0:
+        return ((lightness + 16.0) / 116.0) ** 3
+    return lightness / 903.3
+
+
+def _dither_patterns(frames):
+    """(frames + 1, frames) 0/1 patterns; row ``k`` is on for ``k`` evenly spread frames."""
+    k = np.arange(frames + 1)[:, None]
+    return np.diff(np.floor(np.arange(frames + 1)[None, :] * k / frames), axis=1).astype(np.uint8)
+
+
+DITHER_PATTERNS = _dither_patterns(DITHER_FRAMES)
+
+
+class Dimmer:
+    """Output codes for one dimmer level.
+
+    ``table[phase, code]`` is the code shown for input ``code`` on
+    display frame ``phase``. Without ``dither`` the table has one phase
+    and codes are simply rounded.
+    """
+    def __init__(self, level=1.0, dither=True):
+        self.level = min(max(float(level), 0.0), 1.0)
+        self.dither = dither
+        self.factor = perceptual_to_linear(self.level)
+        self.exact = linear_to_srgb(srgb_to_linear(np.arange(256)) * self.factor)
+        if dither:
+            base = np.floor(self.exact)
+            steps = np.rint((self.exact - base) * DITHER_FRAMES).astype(np.int64)
+            self.table = np.minimum(base[None, :] + DITHER_PATTERNS[steps].T, 255).astype(np.uint8)
+        else:
+            self.table = np.rint(self.exact).astype(np.uint8)[None, :]
+        # Codes whose output changes from frame to frame
+        self.dithered = self.table.min(axis=0) != self.table.max(axis=0)
+
+    @property
+    def phases(self):
+        return len(self.table)
+
+    def needs_dither(self, rgb):
+        """True if ``rgb`` only comes out right when refreshed every display frame."""
+        return any(self.dithered[v] for v in rgb)
+
+    def apply(self, rgb, phase=0):
+        """The dimmed (r, g, b) shown on display frame ``phase``."""
+        row = self.table[phase % len(self.table)]
+        r, g, b = rgb
+        return int(row[r]), int(row[g]), int(row[b])
+
+    def apply_frames(self, frames, phase=0):
+        """Dim a (K, 3) uint8 frame table for display frame ``phase``."""
+        return self.table[phase % len(self.table)][np.asarray(frames, dtype=np.uint8)]
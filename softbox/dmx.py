@@ -0,0 +1,218 @@
+"""
+Art-Net and sACN (E1.31) output mirroring the ColorDisplay frame stream.
+"""
+import socket
+import time
+import uuid
+
+import numpy as np
+
+ARTNET_PORT = 6454
+SACN_PORT = 5568
+ARTNET_HEADER = 18
+SACN_HEADER = 126
+
+
+def _artnet_packet(universe, slots):
+    """Preallocate an ArtDMX packet for a 15-bit port address."""
+    # Art-Net needs an even data length between 2 and 512
+    length = max(2, slots + (slots & 1))
+    packet = bytearray(ARTNET_HEADER + length)
+    packet[0:8] = b"Art-Net\0"
+    packet[8:10] = (0x5000).to_bytes(2, "little")  # OpDmx
+    packet[10:12] = (14).to_bytes(2, "big")  # protocol version
+    packet[14] = universe & 0xFF  # SubUni
+    packet[15] = (universe >> 8) & 0x7F  # Net
+    packet[16:18] = length.to_bytes(2, "big")
+    return packet, ARTNET_HEADER, 12
+
+
+def _sacn_packet(universe, slots, source_name, priority, cid):
+    """Preallocate an E1.31 data packet (root, framing and DMP layers)."""
+    size = SACN_HEADER + slots
+    packet = bytearray(size)
+    # Root layer
+    packet[0:2] = (0x0010).to_bytes(2, "big")
+    packet[4:16] = b"ASC-E1.17\0\0\0"
+    packet[16:18] = (0x7000 | (size - 16)).to_bytes(2, "big")
+    packet[18:22] = (0x00000004).to_bytes(4, "big")
+    packet[22:38] = cid
+    # Framing layer
+    packet[38:40] = (0x7000 | (size - 38)).to_bytes(2, "big")
+    packet[40:44] = (0x00000002).to_bytes(4, "big")
+    packet[44:108] = source_name.encode("utf-8")[:63].ljust(64, b"\0")
+    packet[108] = priority
+    packet[113:115] = universe.to_bytes(2, "big")
+    # DMP layer
+    packet[115:117] = (0x7000 | (size - 115)).to_bytes(2, "big")
+    packet[117] = 0x02
+    packet[118] = 0xA1
+    packet[121:123] = (0x0001).to_bytes(2, "big")
+    packet[123:125] = (slots + 1).to_bytes(2, "big")
+    packet[125] = 0x00  # DMX start code
+    return packet, SACN_HEADER, 111
+
+
+class DmxOutput:
+    """Sends each presented frame as one Art-Net or sACN packet.
+
+    The packet is built once; every frame only writes the fixture channels
+    and the sequence number into it before ``sendto``. Fixtures are laid
+    out from ``start_address`` (1-based), each using the channels named in
+    ``channel_order``; ``W`` is driven with min(r, g, b).
+
+    A failed send (no route, network down) is counted in ``errors`` and
+    otherwise ignored, so a broken link never stops the display.
+    """
+    def __init__(self, protocol="artnet", host=None, universe=0, start_address=1,
+                 fixtures=1, channel_order="RGB", port=None, priority=100,
+                 source_name="SoftBox"):
+        protocol = protocol.lower()
+        if protocol not in ("artnet", "sacn"):
+            raise ValueError("protocol must be 'artnet' or 'sacn'")
+        channel_order = channel_order.upper()
+        if not channel_order or set(channel_order) - set("RGBW"):
+            raise ValueError("channel_order may only use R, G, B and W")
+        footprint = len(channel_order)
+        slots = start_address - 1 + fixtures * footprint
+        if start_address < 1 or fixtures < 1 or slots > 512:
+            raise ValueError("fixtures do not fit in one 512-channel universe")
+
+        self.protocol = protocol
+        self.universe = universe
+        if protocol == "artnet":
+            if not 0 <= universe < 1 << 15:
+                raise ValueError("Art-Net universe must be 0-32767")
+            self._packet, data_offset, self._sequence_offset = _artnet_packet(universe, slots)
+            default_host, default_port = "255.255.255.255", ARTNET_PORT
+        else:
+            if not 1 <= universe <= 63999:
+                raise ValueError("sACN universe must be 1-63999")
+            self._packet, data_offset, self._sequence_offset = _sacn_packet(
+                universe, slots, source_name, priority, uuid.uuid4().bytes)
+            # Multicast group for the universe
+            default_host, default_port = f"239.255.{universe >> 8}.{universe & 0xFF}", SACN_PORT
+        self.address = (host or default_host, port or default_port)
+
+        # Writable NumPy view onto the packet's channel data
+        base = data_offset + start_address - 1
+        channels = np.frombuffer(self._packet, dtype=np.uint8)
+        self._fixtures = channels[base:base + fixtures * footprint].reshape(fixtures, footprint)
+        self._columns = {letter: channel_order.index(letter) for letter in channel_order}
+        self._sequence = 0
+        self._last = None
+        self.packets = 0
+        self.errors = 0
+        self.send_time = 0.0
+        self._display = None
+        self._keepalive = None
+
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        if protocol == "sacn":
+            self._sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 8)
+
+    def send_rgb(self, r, g, b):
+        """Write one frame into the packet and send it."""
+        started = time.perf_counter()
+        columns = self._columns
+        fixtures = self._fixtures
+        for letter, value in (("R", r), ("G", g), ("B", b), ("W", min(r, g, b))):
+            column = columns.get(letter)
+            if column is not None:
+                fixtures[:, column] = value
+        self._sequence = (self._sequence + 1) & 0xFF
+        if self._sequence == 0 and self.protocol == "artnet":
+            # Art-Net reserves sequence 0 for "sequencing disabled"
+            self._sequence = 1
+        self._packet[self._sequence_offset] = self._sequence
+        self._last = (r, g, b)
+        try:
+            self._sock.sendto(self._packet, self.address)
+        except OSError:
+            # Runs as a frame listener: keep the display going, the keepalive retries
+            self.errors += 1
+            return
+        self.packets += 1
+        self.send_time += time.perf_counter() - started
+
+    def resend(self):
+        """Send the last frame again (receivers drop universes that go quiet)."""
+        if self._last is not None:
+            self.send_rgb(*self._last)
+
+    def attach(self, display, keepalive=1000):
+        """Mirror every frame ``display`` presents, refreshing every ``keepalive`` ms."""
+        from PySide6.QtCore import QTimer
+        self.detach()
+        self._display = display
+        display.add_frame_listener(self.send_rgb)
+        self._keepalive = QTimer(display)
+        self._keepalive.timeout.connect(self.resend)
+        self._keepalive.start(keepalive)
+        color = display.presented_color()
+        self.send_rgb(color.red(), color.green(), color.blue())
+        return self
+
+    def stats(self):
+        return {
+            "packets": self.packets,
+            "errors": self.errors,
+            "cpu_per_packet_us": 1e6 * self.send_time / self.packets if self.packets else 0.0,
+        }
+
+    def detach(self):
+        """Stop mirroring the attached display and its keepalive."""
+        if self._display is not None:
+            self._display.remove_frame_listener(self.send_rgb)
+            self._display = None
+        if self._keepalive is not None:
+            self._keepalive.stop()
+            self._keepalive.deleteLater()
+            self._keepalive = None
+
+    def close(self):
+        self.detach()
+        self._sock.close()
+
+
+def benchmark(protocol="artnet", count=20000, fixtures=170):
+    """Send ``count`` frames to a local receiver and report packets/s and CPU per packet."""
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+    receiver.setblocking(False)
+    output = DmxOutput(protocol, host="127.0.0.1", port=receiver.getsockname()[1],
+                       universe=1, fixtures=fixtures)
+    received = 0
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    for i in range(count):
+        output.send_rgb(i & 0xFF, (i >> 8) & 0xFF, 255 - (i & 0xFF))
+        # Drain the receiver as we go so its buffer does not overflow
+        try:
+            while True:
+                receiver.recv(1024)
+                received += 1
+        except BlockingIOError:
+            pass
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+    output.close()
+    receiver.close()
+    return {
+        "protocol": protocol,
+        "packets": count,
+        "received": received,
+        "packets_per_second": count / wall,
+        "cpu_per_packet_us": 1e6 * cpu / count,
+        "send_per_packet_us": output.stats()["cpu_per_packet_us"],
+    }
+
+
+if __name__ == '__main__':
+    for name in ("artnet", "sacn"):
+        result = benchmark(name)
+        print(f"{name:>6}: {result['packets_per_second']:,.0f} packets/s, "
+              f"{result['cpu_per_packet_us']:.1f} us CPU/packet "
+              f"({result['received']}/{result['packets']} received)")
@@ -0,0 +1,508 @@
+"""
+Light effects shared by the Qt and Toga front ends.
+
+Each effect compiles to a table of frames. Frame ``n`` is shown during
+step ``n``, and a step lasts ``speed`` milliseconds. Because the step is
+computed from a clock instead of counted per timer tick, every display
+sampling the same clock shows the same frame.
+"""
+import numbers
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from softbox.dimmer import linear_to_srgb, srgb_to_linear
+from softbox.kelvin import kelvin_ramp
+from softbox.modulation import MODULATION_TARGETS, ModulationBank
+
+# Effect names in the order the effect selectors list them
+EFFECT_NAMES = ["None", "Strobe", "Police", "Ambulance", "Neon", "Sun", "Moon", "Custom", "Music", "Palette",
+                "Candle", "Fire", "Lightning", "TV"]
+
+# Effects built from seeded noise instead of a periodic table
+FLICKER_NAMES = ["Candle", "Fire", "Lightning", "TV"]
+
+# Color cycles that can be normalized to constant luminance. Strobe and
+# Custom are left out: their steps differ in brightness on purpose.
+CYCLE_NAMES = ["Police", "Ambulance", "Neon", "Palette"]
+
+# Rec. 709 relative luminance weights of linear R, G and B
+LUMA = np.array([0.2126, 0.7152, 0.0722])
+
+# How much darker the second Custom frame is
+CUSTOM_DIM = 100
+
+# Row of the speed target in ModulationBank results
+SPEED_TARGET = MODULATION_TARGETS.index("speed")
+
+# Frame interval while modulators are running, for outputs that do not
+# pass their own refresh interval to ms_until_next_change
+MODULATION_FRAME_MS = 1000.0 / 60.0
+
+NEON_COLORS = [
+    (255, 0, 0), (255, 165, 0),
+    (255, 255, 0), (0, 255, 0),
+    (0, 0, 255), (75, 0, 130),
+    (238, 130, 238)
+]
+
+
+def _kelvin_pulse(warm, cool, dim):
+    """100-step triangle swinging from ``warm`` to ``cool`` Kelvin and back.
+
+    The light also dims by up to ``dim`` towards the cool end.
+    """
+    intensity = 1.0 - np.abs(50 - np.arange(100)) / 50.0  # 0.0 to 1.0 and back
+    ramp = kelvin_ramp(warm, cool, 51).astype(np.float64)
+    steps = np.rint(intensity * 50).astype(np.int64)
+    frames = ramp[steps] * (1.0 - dim * intensity)[:, None]
+    return np.clip(np.rint(frames), 0, 255).astype(np.uint8)
+
+
+def relative_luminance(frames):
+    """Relative luminance (0-1) of each row of a (K, 3) sRGB table."""
+    return srgb_to_linear(frames) @ LUMA
+
+
+def normalize_luminance(frames, target="auto"):
+    """Scale every frame of a (K, 3) table to relative luminance ``target``.
+
+    Scaling happens in linear light, so hue and saturation are kept. Black
+    frames stay black, and colors too dark to reach ``target`` (pure blue
+    peaks at 7%) come out at their brightest. With ``"auto"`` the target
+    is the highest luminance every frame can reach, so all frames match.
+    """
+    linear = srgb_to_linear(frames)
+    luminance = linear @ LUMA
+    peak = linear.max(axis=1)
+    lit = luminance > 0
+    if not lit.any():
+        return np.asarray(frames, dtype=np.uint8)
+    # Luminance of each color with its largest channel at full
+    reachable = np.divide(luminance, peak, out=np.zeros_like(luminance), where=lit)
+    if target == "auto":
+        target = reachable[lit].min()
+    scale = np.divide(np.minimum(target, reachable), luminance, out=np.zeros_like(luminance), where=lit)
+    return np.rint(linear_to_srgb(linear * scale[:, None])).astype(np.uint8)
+
+
+# Steps per noise block; blocks are generated whole and cached
+NOISE_BLOCK = 1024
+_noise_refill = ThreadPoolExecutor(max_workers=1, thread_name_prefix="SoftBoxNoise")
+
+
+def _white(seed, stream, block, size):
+    """White noise for one block, reproducible from (seed, stream, block)."""
+    return np.random.default_rng([seed, stream, block + 1]).standard_normal(size)
+
+
+def _lowpass(seed, stream, block, sigma):
+    """Band-limited noise for one block, roughly uniform over 0-1.
+
+    White noise is smoothed with a Gaussian kernel of ``sigma`` steps. The
+    previous block's noise is included in the convolution, so blocks join
+    without a seam and any block can be generated on its own.
+    """
+    radius = int(3 * sigma)
+    kernel = np.exp(-0.5 * (np.arange(-radius, radius + 1) / sigma) ** 2)
+    kernel /= np.sqrt((kernel ** 2).sum())  # unit variance output
+    white = np.concatenate([_white(seed, stream, block - 1, NOISE_BLOCK)[-2 * radius:],
+                            _white(seed, stream, block, NOISE_BLOCK)])
+    smooth = np.convolve(white, kernel, mode="valid")
+    return np.clip(0.5 + smooth / 5.0, 0.0, 1.0)
+
+
+def check_seed(seed):
+    """Return ``seed`` as an int, or raise ValueError unless it is a non-negative integer."""
+    if isinstance(seed, bool) or not isinstance(seed, numbers.Integral) or seed < 0:
+        raise ValueError(f"seed must be a non-negative integer: {seed!r}")
+    return int(seed)
+
+
+def flicker_block(effect_name, seed, block):
+    """Render block ``block`` of a flicker effect as (NOISE_BLOCK, 3) uint8."""
+    if effect_name == "Candle":
+        # Slow sway plus a faster flutter; dimmer flame is also redder
+        level = 0.7 + 0.3 * (0.6 * _lowpass(seed, 0, block, 12) + 0.4 * _lowpass(seed, 1, block, 2.5))
+        rgb = np.stack([255 * level, 147 * level ** 1.5, 41 * level ** 2], axis=1)
+    elif effect_name == "Fire":
+        slow, fast = _lowpass(seed, 0, block, 8), _lowpass(seed, 1, block, 1.5)
+        level = 0.35 + 0.65 * (0.5 * slow + 0.5 * fast)
+        rgb = np.stack([255 * level, (60 + 130 * slow) * level, 15 * level], axis=1)
+    elif effect_name == "Lightning":
+        # Rare strikes, each a burst of decaying flashes, over a dim night sky
+        length = 40
+        strikes = np.concatenate([
+            np.random.default_rng([seed, 2, b + 1]).random(NOISE_BLOCK) < 1 / 300 for b in (block - 1, block)
+        ]).astype(np.float64)
+        steps = np.arange(length)
+        burst = np.exp(-steps / 8.0) * (0.4 + 0.6 * (np.sin(steps * 1.7) > -0.2))
+        flash = np.minimum(np.convolve(strikes, burst)[NOISE_BLOCK:2 * NOISE_BLOCK], 1.0)
+        ambient = 0.6 + 0.4 * _lowpass(seed, 0, block, 30)
+        rgb = np.stack([15 * ambient + 225 * flash, 15 * ambient + 225 * flash, 35 * ambient + 220 * flash], axis=1)
+    elif effect_name == "TV":
+        # Quantized slow noise gives abrupt scene cuts, fast noise the flicker
+        scene = np.floor(_lowpass(seed, 0, block, 40) * 5) / 4
+        tint = _lowpass(seed, 1, block, 60)
+        level = (0.35 + 0.45 * scene) * (0.9 + 0.1 * _lowpass(seed, 2, block, 1.2))
+        rgb = np.stack([(110 + 80 * tint) * level, (140 + 40 * tint) * level, 255 * level], axis=1)
+    else:
+        raise ValueError(f"unknown flicker effect: {effect_name}")
+    return np.clip(np.rint(rgb), 0, 255).astype(np.uint8)
+
+
+class NoiseFrames:
+    """Endless frame table of a flicker effect, generated block by block.
+
+    Indexing returns one frame like a (K, 3) array would. Blocks are
+    computed with NumPy from the seed, cached, and the next block is
+    rendered on a background thread before playback reaches it, so a frame
+    is normally just an array lookup. The same seed always gives the same
+    frames. A ``transform`` (such as ``Calibration.apply_frames``) is
+    applied to each block as it is rendered.
+    """
+    # Steps before the table repeats; large enough that it never does in
+    # practice. Not exposed through len(), which must fit a Py_ssize_t.
+    WRAP = 1 << 48
+
+    def __init__(self, effect_name, seed=0, cache=4, transform=None):
+        if effect_name not in FLICKER_NAMES:
+            raise ValueError(f"unknown flicker effect: {effect_name}")
+        self.effect_name = effect_name
+        self.seed = check_seed(seed)
+        self.cache = cache
+        self.transform = transform
+        self._blocks = {}
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def __getitem__(self, step):
+        block, offset = divmod(int(step), NOISE_BLOCK)
+        frames = self._blocks.get(block)
+        if frames is None:
+            frames = self._render(block)
+        if offset == NOISE_BLOCK // 2:
+            self._prefetch(block + 1)
+        return frames[offset]
+
+    def _render(self, block):
+        frames = flicker_block(self.effect_name, self.seed, block)
+        if self.transform is not None:
+            frames = self.transform(frames)
+        with self._lock:
+            self._blocks[block] = frames
+            self._pending.discard(block)
+            # Keep the newest blocks around the playback position
+            while len(self._blocks) > self.cache:
+                del self._blocks[max(self._blocks, key=lambda b: abs(b - block))]
+        return frames
+
+    def _prefetch(self, block):
+        with self._lock:
+            if block in self._blocks or block in self._pending:
+                return
+            self._pending.add(block)
+        _noise_refill.submit(self._render, block)
+
+
+def effect_frames(effect_name, base_rgb=(255, 255, 255), envelope=None, palette=None, seed=0, luminance=None):
+    """Compile an effect into its (K, 3) uint8 frame table.
+
+    The Music effect needs the ``envelope`` of an analyzed track, and the
+    Palette effect cycles through ``palette``, a list of (r, g, b) colors.
+    Flicker effects return an endless NoiseFrames table for ``seed``.
+    With a ``luminance`` target (see ``normalize_luminance``) the frames
+    of color cycles all have the same brightness.
+    """
+    if effect_name in FLICKER_NAMES:
+        return NoiseFrames(effect_name, seed)
+    r, g, b = base_rgb
+    if effect_name == "Strobe":
+        frames = [base_rgb, (0, 0, 0)]
+    elif effect_name == "Police":
+        frames = [(255, 0, 0), (0, 0, 255)]
+    elif effect_name == "Ambulance":
+        frames = [(255, 0, 0), (255, 255, 255)]
+    elif effect_name == "Neon":
+        frames = NEON_COLORS
+    elif effect_name == "Music":
+        if envelope is None:
+            raise ValueError("the Music effect needs an analyzed track")
+        return envelope.frames(base_rgb)
+    elif effect_name == "Palette":
+        if not palette:
+            raise ValueError("the Palette effect needs a palette")
+        frames = palette
+    elif effect_name == "Sun":
+        # Golden hour swaying between low and afternoon sun
+        return _kelvin_pulse(2000, 3200, 0.15)
+    elif effect_name == "Moon":
+        # Subtle glow between moonlight and blue hour
+        return _kelvin_pulse(7500, 12000, 0.12)
+    elif effect_name == "Custom":
+        # Base color alternating with a dimmed copy
+        frames = [base_rgb, (max(0, r - CUSTOM_DIM), max(0, g - CUSTOM_DIM), max(0, b - CUSTOM_DIM))]
+    else:
+        raise ValueError(f"unknown effect: {effect_name}")
+    frames = np.array(frames, dtype=np.uint8)
+    if luminance is not None and effect_name in CYCLE_NAMES:
+        frames = normalize_luminance(frames, luminance)
+    return frames
+
+
+def hue_matrix(degrees):
+    """3x3 matrix rotating RGB colors by ``degrees`` around the gray axis."""
+    angle = np.radians(degrees)
+    c, s = np.cos(angle), np.sin(angle)
+    a = (1.0 - c) / 3.0
+    b = np.sqrt(1.0 / 3.0) * s
+    return np.array([[c + a, a - b, a + b], [a + b, c + a, a - b], [a - b, a + b, c + a]])
+
+
+def local_clock():
+    """Seconds on this device's monotonic clock."""
+    return time.monotonic()
+
+
+class Effect:
+    """A compiled effect sampled by time in milliseconds.
+
+    Effects driven by an audio ``envelope`` step at the envelope's frame
+    rate, so their speed is fixed. Flicker effects step every
+    ``speed / 25`` ms (20 ms at the default speed), so the speed slider
+    makes the flicker livelier or lazier.
+
+    ``frames`` are the effect's colors and ``output`` the same frames as a
+    calibrated display shows them, both computed up front. Steps wrap
+    around after ``length`` frames.
+    """
+    def __init__(self, name, base_rgb=(255, 255, 255), speed=500, envelope=None, palette=None, seed=0,
+                 luminance=None):
+        self.name = name
+        self.base_rgb = tuple(base_rgb)
+        self.frames = effect_frames(name, self.base_rgb, envelope, palette, seed, luminance)
+        self.length = NoiseFrames.WRAP if isinstance(self.frames, NoiseFrames) else len(self.frames)
+        self.envelope = envelope if name == "Music" else None
+        self.speed = speed if self.envelope is None else self.envelope.frame_ms
+        self.output = self.frames
+
+    def calibrate(self, calibration):
+        """Precompute ``output`` through ``calibration`` (None for uncalibrated)."""
+        if calibration is None:
+            self.output = self.frames
+        elif isinstance(self.frames, NoiseFrames):
+            self.output = NoiseFrames(self.name, self.frames.seed, transform=calibration.apply_frames)
+        else:
+            self.output = calibration.apply_frames(self.frames)
+
+    @property
+    def step_ms(self):
+        if self.name in FLICKER_NAMES:
+            return max(10.0, self.speed / 25.0)
+        return self.speed
+
+    def step_at(self, t_ms):
+        return int(t_ms // self.step_ms)
+
+    def rgb_at(self, t_ms):
+        """The (r, g, b) frame shown at ``t_ms``."""
+        r, g, b = self.frames[self.step_at(t_ms) % self.length].tolist()
+        return r, g, b
+
+    def ms_until_next_step(self, t_ms):
+        """Milliseconds from ``t_ms`` to the start of the next step."""
+        return (self.step_at(t_ms) + 1) * self.step_ms - t_ms
+
+    def dim_frame(self, dim):
+        """The second Custom frame with its dim offset scaled by ``1 + dim``."""
+        return np.clip(np.rint(np.array(self.base_rgb, dtype=np.float64) - CUSTOM_DIM * (1.0 + dim)), 0, 255)
+
+
+class EffectEngine:
+    """One effect timeline shared by every output that shows it.
+
+    The engine holds the running effect (or a static frame) and the clock.
+    Outputs call ``frame_at`` whenever they refresh. The frame is cached per
+    effect step, so any number of outputs sampling the same step share one
+    lookup, and ``ms_until_next_change`` lets them sleep between steps.
+    ``output_at`` gives the same frame through the engine's calibration.
+
+    Modulators bound with ``modulate`` are evaluated once per sampled
+    clock time. While any run, the frame can change every display frame,
+    so ``ms_until_next_change`` asks for an update every refresh of the
+    caller's screen.
+    """
+    def __init__(self, clock=local_clock):
+        self.clock = clock
+        self.shared_clock = False
+        self.effect = None
+        self.epoch = 0.0
+        self.static_rgb = (255, 255, 255)
+        self.calibration = None
+        self._version = 0
+        self._cache_key = None
+        self._cache_rgb = None
+        self._cache_output = None
+        self._listeners = []
+        self.modulation = ModulationBank()
+
+    def add_listener(self, callback):
+        """Call ``callback()`` whenever the effect, speed, clock or static frame changes."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _changed(self):
+        self._version += 1
+        for callback in self._listeners:
+            callback()
+
+    def set_clock(self, clock, shared=True):
+        self.clock = clock
+        self.shared_clock = shared
+        if self.effect is not None:
+            self.epoch = 0.0 if shared else clock()
+        self._changed()
+
+    def set_calibration(self, calibration):
+        """Calibrate ``output_at`` frames with a Calibration, or None."""
+        self.calibration = calibration
+        if self.effect is not None:
+            self.effect.calibrate(calibration)
+        self._changed()
+
+    def modulate(self, target, shape, rate=1.0, depth=0.5, **params):
+        """Drive ``target`` ("speed", "brightness", "hue" or "dim") with a modulator.
+
+        ``rate`` is in Hz. Depth is relative for speed (0.5 swings the step
+        rate between 0.5x and 1.5x) and brightness, a fraction of a full
+        turn for hue, and a fraction of the Custom dim offset for dim.
+        The depths of all speed modulators must add up to less than 1, so
+        the effect never stops or runs backwards. Returns the slot to pass
+        to ``unmodulate``.
+        """
+        if target == "speed":
+            speed = self.modulation.routing[SPEED_TARGET] > 0
+            if np.abs(self.modulation.depth[speed]).sum() + abs(depth) >= 1.0:
+                raise ValueError("speed modulator depths must add up to less than 1")
+        slot = self.modulation.add(target, shape, rate, depth, **params)
+        self._changed()
+        return slot
+
+    def unmodulate(self, slot=None):
+        """Remove one modulator, or all of them."""
+        if slot is None:
+            self.modulation.clear()
+        else:
+            self.modulation.remove(slot)
+        self._changed()
+
+    def show(self, rgb):
+        """Show a static frame (used when no effect runs)."""
+        rgb = tuple(rgb)
+        if rgb != self.static_rgb:
+            self.static_rgb = rgb
+            if self.effect is None:
+                self._changed()
+
+    def start(self, effect_name, base_rgb, speed, envelope=None, palette=None, seed=0, luminance=None):
+        self.effect = Effect(effect_name, base_rgb, speed, envelope, palette, seed, luminance)
+        self.effect.calibrate(self.calibration)
+        self.epoch = 0.0 if self.shared_clock else self.clock()
+        self._changed()
+
+    def stop(self):
+        if self.effect is not None:
+            self.effect = None
+            self._changed()
+
+    def set_speed(self, speed):
+        if self.effect is not None and self.effect.envelope is None:
+            self.effect.speed = speed
+            self._changed()
+
+    def time_ms(self, t=None):
+        """Effect time in ms at clock time ``t`` (default: now)."""
+        return ((self.clock() if t is None else t) - self.epoch) * 1000.0
+
+    def frame_at(self, t=None):
+        """The (r, g, b) frame at clock time ``t`` (default: now)."""
+        self._sample(t)
+        return self._cache_rgb
+
+    def output_at(self, t=None):
+        """The calibrated (r, g, b) frame at clock time ``t`` (default: now)."""
+        self._sample(t)
+        return self._cache_output
+
+    def _sample(self, t):
+        effect = self.effect
+        if effect is not None and len(self.modulation):
+            self._sample_modulated(effect, self.clock() if t is None else t)
+            return
+        if effect is None:
+            key = (self._version, self.static_rgb)
+            if key != self._cache_key:
+                rgb = self.static_rgb
+                output = rgb if self.calibration is None else self.calibration.apply(rgb)
+                self._cache_key, self._cache_rgb, self._cache_output = key, rgb, output
+            return
+        key = (self._version, effect.step_at(self.time_ms(t)))
+        if key != self._cache_key:
+            step = key[1] % effect.length
+            r, g, b = effect.frames[step].tolist()
+            self._cache_key, self._cache_rgb = key, (r, g, b)
+            if effect.output is effect.frames:
+                self._cache_output = self._cache_rgb
+            else:
+                r, g, b = effect.output[step].tolist()
+                self._cache_output = (r, g, b)
+
+    def _sample_modulated(self, effect, t):
+        key = (self._version, "modulated", t)
+        if key == self._cache_key:
+            return
+        speed, brightness, hue, dim = self.modulation.evaluate(t).tolist()
+        # The step rate is (1 + speed) times the effect's, so the effect
+        # time runs ahead by the area under the speed modulators since the
+        # epoch. That area comes from the clock alone, so engines sharing a
+        # clock stay on the same step however often they sample.
+        t_ms = self.time_ms(t)
+        if self.modulation.routing[SPEED_TARGET].any():
+            t_ms += 1000.0 * self.modulation.integral(self.epoch, t)[SPEED_TARGET]
+        step = effect.step_at(t_ms) % effect.length
+
+        frame = effect.frames[step]
+        if effect.name == "Custom" and step % 2 and dim:
+            frame = effect.dim_frame(dim)
+        elif not brightness and not hue:
+            # Unchanged frame: use the precomputed tables
+            r, g, b = frame.tolist()
+            self._cache_key, self._cache_rgb = key, (r, g, b)
+            r, g, b = effect.output[step].tolist()
+            self._cache_output = (r, g, b)
+            return
+        rgb = frame.astype(np.float64)
+        if brightness:
+            rgb *= max(0.0, 1.0 + brightness)
+        if hue:
+            rgb = hue_matrix(360.0 * hue) @ rgb
+        r, g, b = np.clip(np.rint(rgb), 0, 255).astype(np.int64).tolist()
+        self._cache_key, self._cache_rgb = key, (r, g, b)
+        self._cache_output = self._cache_rgb if self.calibration is None else self.calibration.apply((r, g, b))
+
+    def ms_until_next_change(self, t=None, frame_ms=MODULATION_FRAME_MS):
+        """Milliseconds until the frame may change, or None for a static frame.
+
+        While modulators run this is ``frame_ms``, the caller's refresh
+        interval.
+        """
+        if self.effect is None:
+            return None
+        if len(self.modulation):
+            return frame_ms
+        return self.effect.ms_until_next_step(self.time_ms(t))
@@ -0,0 +1,166 @@
+"""
+Photosensitivity guard for the presented frame stream.
+
+Flashes are counted the way WCAG 2 and ITU-R BT.1702 define them. A
+general flash is a pair of opposing changes in relative luminance of at
+least 10%, where the darker state is below 0.8. A red flash is a pair of
+opposing changes of at least 20 in saturated red, ``(R - G - B) * 320``
+in linear light for colors that are at least 80% red. More than three
+flashes of either kind in any one second fails.
+
+Each frame costs one table lookup per channel and a few comparisons.
+Transition times sit in a deque per kind, and expired times are popped
+from the left, so the sliding one-second window is amortized O(1).
+"""
+import collections
+import time
+
+import numpy as np
+
+from softbox.dimmer import srgb_to_linear
+
+LUMINANCE_CHANGE = 0.1
+DARKER_LIMIT = 0.8
+RED_CHANGE = 20.0
+RED_SATURATION = 0.8
+
+# Linear light of every 8-bit code
+_LINEAR = srgb_to_linear(np.arange(256)).tolist()
+
+
+class _Transitions:
+    """Opposing-transition detector with a sliding window of transition times."""
+    def __init__(self, threshold, darker_limit):
+        self.threshold = threshold
+        self.darker_limit = darker_limit
+        self.extreme = None
+        self.direction = 0
+        self.times = collections.deque()
+        self.total = 0
+
+    def would_transition(self, value):
+        """+1 or -1 if ``value`` completes a rising or falling transition, else 0."""
+        extreme = self.extreme
+        if extreme is None:
+            return 0
+        if self.direction >= 0 and extreme - value >= self.threshold and value < self.darker_limit:
+            return -1
+        if self.direction <= 0 and value - extreme >= self.threshold and extreme < self.darker_limit:
+            return 1
+        return 0
+
+    def add(self, value, t):
+        """Feed a shown frame; returns True if it completed a transition."""
+        turn = self.would_transition(value)
+        if turn:
+            self.direction = turn
+            self.extreme = value
+            self.times.append(t)
+            self.total += 1
+        elif self.extreme is None or (self.direction >= 0 and value > self.extreme) or (
+                self.direction <= 0 and value < self.extreme):
+            # Follow the light further in the current direction
+            self.extreme = value
+        return bool(turn)
+
+    def expire(self, t, window):
+        times = self.times
+        while times and times[0] <= t - window:
+            times.popleft()
+
+    @property
+    def flashes(self):
+        """Flashes (pairs of transitions) in the current window."""
+        return len(self.times) / 2.0
+
+
+class FlashGuard:
+    """Watches presented frames and warns about or holds back unsafe flashing.
+
+    In ``"warn"`` mode every frame is shown and violations are counted and
+    reported to listeners. In ``"clamp"`` mode a frame that would push
+    the flash rate over ``max_flashes`` per ``window`` seconds is held
+    back: ``check`` returns False and the previous frame stays on screen.
+    """
+    def __init__(self, mode="clamp", max_flashes=3, window=1.0, clock=time.monotonic):
+        if mode not in ("warn", "clamp"):
+            raise ValueError("mode must be 'warn' or 'clamp'")
+        self.mode = mode
+        self.max_flashes = max_flashes
+        self.window = window
+        self.clock = clock
+        self.luminance = _Transitions(LUMINANCE_CHANGE, DARKER_LIMIT)
+        self.red = _Transitions(RED_CHANGE, float("inf"))
+        self.frames = 0
+        self.held = 0
+        self.violations = 0
+        self.peak_flashes = 0.0
+        self._listeners = []
+
+    def copy(self):
+        """A fresh guard with the same settings and listeners, for another surface."""
+        guard = FlashGuard(self.mode, self.max_flashes, self.window, self.clock)
+        guard._listeners = list(self._listeners)
+        return guard
+
+    def add_listener(self, callback):
+        """Call ``callback(kind, flashes)`` for each frame over the limit ("luminance" or "red")."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    @staticmethod
+    def measure(rgb):
+        """(relative luminance, saturated red) of an (r, g, b) frame."""
+        r, g, b = (_LINEAR[v] for v in rgb)
+        total = r + g + b
+        red = max(0.0, (r - g - b) * 320.0) if total > 0 and r / total >= RED_SATURATION else 0.0
+        return 0.2126 * r + 0.7152 * g + 0.0722 * b, red
+
+    def check(self, rgb, t=None):
+        """Feed the next frame; returns False if it must be held back."""
+        t = self.clock() if t is None else t
+        luminance, red = self.measure(rgb)
+        limit = 2 * self.max_flashes
+        over = []
+        for kind, tracker, value in (("luminance", self.luminance, luminance), ("red", self.red, red)):
+            tracker.expire(t, self.window)
+            if tracker.would_transition(value) and len(tracker.times) + 1 > limit:
+                over.append((kind, tracker))
+        if over:
+            for kind, tracker in over:
+                for callback in self._listeners:
+                    callback(kind, (len(tracker.times) + 1) / 2.0)
+            if self.mode == "clamp":
+                self.held += 1
+                return False
+            self.violations += 1
+        self.frames += 1
+        self.luminance.add(luminance, t)
+        self.red.add(red, t)
+        self.peak_flashes = max(self.peak_flashes, self.luminance.flashes, self.red.flashes)
+        return True
+
+    def stats(self):
+        """Counters for compliance logs; flash rates are per ``window`` seconds.
+
+        Safe to call from any thread: the windows are copied, not expired.
+        """
+        since = self.clock() - self.window
+        luminance_flashes, red_flashes = (
+            sum(1 for x in list(tracker.times) if x > since) / 2.0 for tracker in (self.luminance, self.red))
+        return {
+            "mode": self.mode,
+            "max_flashes": self.max_flashes,
+            "window_s": self.window,
+            "frames": self.frames,
+            "held": self.held,
+            "violations": self.violations,
+            "luminance_transitions": self.luminance.total,
+            "red_transitions": self.red.total,
+            "flashes": max(luminance_flashes, red_flashes),
+            "red_flashes": red_flashes,
+            "peak_flashes": self.peak_flashes,
+        }
@@ -0,0 +1,275 @@
+"""
+Images and image sequences as the light surface.
+
+Source images are decoded once into a raw ``.npy`` frame file in the
+cache directory, laid out as ``(N, height, width, 4)`` uint8 in the byte
+order of ``QImage.Format_RGB32``. Playback memory-maps that file and
+wraps each frame in a ``QImage`` view, so frames are never copied on
+their way to the painter. A background thread touches the pages of the
+next few frames so the disk reads happen ahead of the display.
+
+Each new frame file prunes the cache back to ``MAX_CACHE_BYTES``,
+deleting the least recently used files first.
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+from PySide6.QtCore import QSize, Qt
+from PySide6.QtGui import QImage
+
+from softbox.sequence import SequencePlayer
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tif", ".tiff", ".webp")
+PAGE_SIZE = 4096
+
+# Channel order of Format_RGB32 bytes (0xffRRGGBB stored in native order)
+RGB_CHANNELS = [2, 1, 0] if sys.byteorder == "little" else [1, 2, 3]
+
+# Size the frame cache is pruned to after each new frame file
+MAX_CACHE_BYTES = 2 * 1024 ** 3
+
+# Partial files older than this were left by a load that died
+STALE_PARTIAL_SECONDS = 3600
+
+
+def default_cache_dir():
+    return os.path.join(tempfile.gettempdir(), "softbox-frames")
+
+
+def prune_cache(cache_dir=None, max_bytes=None, keep=()):
+    """Delete least recently used frame files until the cache holds ``max_bytes``.
+
+    ``max_bytes`` defaults to MAX_CACHE_BYTES. Files in ``keep`` are never
+    deleted, and neither are files the OS refuses to delete because they
+    are still mapped. Partial files left by crashed loads are removed.
+    Returns the number of bytes freed.
+    """
+    cache_dir = cache_dir or default_cache_dir()
+    max_bytes = MAX_CACHE_BYTES if max_bytes is None else max_bytes
+    keep = {os.path.abspath(path) for path in keep}
+    now = time.time()
+    entries, freed = [], 0
+    with os.scandir(cache_dir) as scan:
+        for entry in scan:
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            if entry.name.endswith(".tmp") and now - stat.st_mtime > STALE_PARTIAL_SECONDS:
+                try:
+                    os.remove(entry.path)
+                    freed += stat.st_size
+                except OSError:
+                    pass
+            elif entry.name.endswith(".npy"):
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if os.path.abspath(path) in keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        freed += size
+    return freed
+
+
+def _image_files(path):
+    if os.path.isdir(path):
+        names = sorted(name for name in os.listdir(path) if name.lower().endswith(IMAGE_EXTENSIONS))
+        if not names:
+            raise ValueError(f"no images in {path}")
+        return [os.path.join(path, name) for name in names]
+    return [path]
+
+
+def _cache_key(files, size):
+    """Hash of the file list, sizes and modification times."""
+    digest = hashlib.sha1(repr(size).encode())
+    for name in files:
+        stat = os.stat(name)
+        digest.update(f"{os.path.abspath(name)}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def _decode(name, size):
+    image = QImage(name)
+    if image.isNull():
+        raise ValueError(f"cannot decode image: {name}")
+    if size is not None and image.size() != size:
+        image = image.scaled(size, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+    return image.convertToFormat(QImage.Format_RGB32)
+
+
+class ImageSequence:
+    """Frames of an image or an image directory, played at ``fps``."""
+    def __init__(self, frames, fps=24.0):
+        if not isinstance(frames, np.ndarray):
+            frames = np.asarray(frames)
+        if frames.ndim != 4 or frames.shape[3] != 4 or frames.dtype != np.uint8:
+            raise ValueError(f"frames must be (N, height, width, 4) uint8, got {frames.shape} {frames.dtype}")
+        if len(frames) == 0:
+            raise ValueError("frames must not be empty")
+        if fps <= 0:
+            raise ValueError("fps must be positive")
+        self.frames = frames
+        self.fps = float(fps)
+        self.duration = len(frames) / self.fps
+        self._prefetcher = None
+
+    @classmethod
+    def load(cls, path, fps=24.0, size=None, cache_dir=None):
+        """Decode an image file or a directory of images (sorted by name).
+
+        Every frame is scaled to ``size`` (a ``(width, height)`` tuple),
+        or to the first image's size. The decoded frames are cached on
+        disk, so loading the same unchanged files again is just a mmap.
+        A load marks its cache file as recently used; see ``prune_cache``.
+        """
+        files = _image_files(os.fspath(path))
+        if size is not None:
+            size = QSize(*size)
+        cache_dir = cache_dir or default_cache_dir()
+        os.makedirs(cache_dir, exist_ok=True)
+        cache = os.path.join(cache_dir, _cache_key(files, size and (size.width(), size.height())) + ".npy")
+
+        if not os.path.exists(cache):
+            first = _decode(files[0], size)
+            size = first.size()
+            partial = cache + f".{os.getpid()}.tmp"
+            frames = np.lib.format.open_memmap(
+                partial, mode="w+", dtype=np.uint8, shape=(len(files), size.height(), size.width(), 4))
+            for index, name in enumerate(files):
+                image = first if index == 0 else _decode(name, size)
+                # Copy row by row past any scanline padding
+                bits = np.frombuffer(image.constBits(), dtype=np.uint8)
+                bits = bits.reshape(size.height(), image.bytesPerLine())
+                frames[index] = bits[:, :size.width() * 4].reshape(size.height(), size.width(), 4)
+            frames.flush()
+            del frames
+            os.replace(partial, cache)
+            prune_cache(cache_dir, keep=[cache])
+        else:
+            os.utime(cache)
+        return cls(np.load(cache, mmap_mode="r"), fps)
+
+    @classmethod
+    def load_async(cls, path, fps=24.0, size=None, cache_dir=None):
+        """Run ``load`` on a background thread and return a Future for the sequence."""
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(cls.load(path, fps, size, cache_dir))
+            except Exception as exc:
+                future.set_exception(exc)
+
+        threading.Thread(target=run, name="SoftBoxImageLoader", daemon=True).start()
+        return future
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def size(self):
+        return QSize(self.frames.shape[2], self.frames.shape[1])
+
+    def index_at(self, t, loop=False):
+        """Return the frame index shown at time ``t`` (seconds), or None past the end."""
+        if t < 0:
+            return 0
+        if t >= self.duration:
+            if not loop:
+                return None
+            t = t % self.duration
+        return min(int(t * self.fps), len(self.frames) - 1)
+
+    def image_at(self, index):
+        """A QImage viewing frame ``index`` in place (valid while the sequence lives)."""
+        frame = self.frames[index]
+        height, width = frame.shape[:2]
+        return QImage(frame.data, width, height, width * 4, QImage.Format_RGB32)
+
+    def mean_rgb(self, index, step=16):
+        """Average color of frame ``index`` from every ``step``-th pixel."""
+        sample = self.frames[index, ::step, ::step][..., RGB_CHANNELS]
+        r, g, b = sample.reshape(-1, 3).mean(axis=0).round().astype(int).tolist()
+        return r, g, b
+
+    def prefetch(self, index, count=4):
+        """Page in frames ``index + 1`` to ``index + count`` in the background."""
+        if self._prefetcher is None:
+            self._prefetcher = _Prefetcher(self.frames)
+        self._prefetcher.request(index + 1, count)
+
+    def stop_prefetch(self):
+        if self._prefetcher is not None:
+            self._prefetcher.stop()
+            self._prefetcher = None
+
+
+class _Prefetcher:
+    """Background thread that reads one byte per page of upcoming frames."""
+    def __init__(self, frames):
+        self.frames = frames
+        self._wanted = None
+        self._running = True
+        self._event = threading.Event()
+        threading.Thread(target=self._run, name="SoftBoxPrefetch", daemon=True).start()
+
+    def request(self, first, count):
+        self._wanted = (first, count)
+        self._event.set()
+
+    def stop(self):
+        self._running = False
+        self._event.set()
+
+    def _run(self):
+        frames = self.frames
+        while True:
+            self._event.wait()
+            self._event.clear()
+            if not self._running:
+                return
+            first, count = self._wanted
+            for offset in range(count):
+                # Touching each page is enough for the OS to read it in,
+                # and costs next to nothing for pages already resident
+                frames[(first + offset) % len(frames)].reshape(-1)[::PAGE_SIZE].max()
+
+
+class ImagePlayer(SequencePlayer):
+    """Plays an ImageSequence on a ColorDisplay at the sequence's frame rate."""
+    def __init__(self, display, source, loop=False, interval=8, parent=None):
+        super().__init__(display, source, loop, interval, parent)
+        self._last_index = None
+
+    def start(self):
+        self._last_index = None
+        super().start()
+
+    def stop(self):
+        super().stop()
+        self.source.stop_prefetch()
+
+    def _tick(self):
+        index = self.source.index_at(self.position(), self.loop)
+        if index is None:
+            self.stop()
+            self.finished.emit()
+            return
+
+        if index != self._last_index:
+            self._last_index = index
+            self.display.show_image(self.source.image_at(index), self.source.mean_rgb(index))
+            self.source.prefetch(index)
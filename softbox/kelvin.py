@@ -0,0 +1,122 @@
+"""
+Color temperature (Kelvin) and tint to display RGB.
+
+The table is built once from the Planckian locus: blackbody spectra for
+every 10 K from 1000 K to 20000 K are integrated against an analytic fit
+of the CIE 1931 color matching functions (Wyman, Sloan and Shirley,
+2013), converted to sRGB and normalized so the brightest channel is 255.
+A temperature is then a table lookup. Tint moves the white point along
+the locus normal in CIE 1960 uv, towards magenta (positive) or green
+(negative), the way camera raw converters do.
+"""
+import numpy as np
+
+KELVIN_MIN = 1000
+KELVIN_MAX = 20000
+KELVIN_STEP = 10
+
+# Planck's second radiation constant in m*K
+C2 = 1.4388e-2
+
+XYZ_TO_SRGB = np.array([
+    [3.2404542, -1.5371385, -0.4985314],
+    [-0.9692660, 1.8760108, 0.0415560],
+    [0.0556434, -0.2040259, 1.0572252],
+])
+
+# Full tint (+-100) shifts the white point by this distance in uv
+TINT_DUV = 0.02
+
+
+def _lobe(wavelengths, mean, low, high):
+    sigma = np.where(wavelengths < mean, low, high)
+    return np.exp(-0.5 * ((wavelengths - mean) / sigma) ** 2)
+
+
+def color_matching(wavelengths):
+    """CIE 1931 2-degree color matching functions as an (N, 3) array."""
+    x = (1.056 * _lobe(wavelengths, 599.8, 37.9, 31.0) + 0.362 * _lobe(wavelengths, 442.0, 16.0, 26.7)
+         - 0.065 * _lobe(wavelengths, 501.1, 20.4, 26.2))
+    y = 0.821 * _lobe(wavelengths, 568.8, 46.9, 40.5) + 0.286 * _lobe(wavelengths, 530.9, 16.3, 31.1)
+    z = 1.217 * _lobe(wavelengths, 437.0, 11.8, 36.0) + 0.681 * _lobe(wavelengths, 459.0, 26.0, 13.8)
+    return np.stack([x, y, z], axis=1)
+
+
+def _encode(linear):
+    """Normalize linear RGB rows to a peak of 1 and apply the sRGB curve, as uint8."""
+    linear = np.clip(linear, 0.0, None)
+    linear = linear / linear.max(axis=-1, keepdims=True)
+    encoded = np.where(linear <= 0.0031308, 12.92 * linear, 1.055 * linear ** (1 / 2.4) - 0.055)
+    return np.rint(encoded * 255.0).astype(np.uint8)
+
+
+def _uv_to_linear(uv):
+    """CIE 1960 uv rows (at Y = 1) to linear sRGB rows."""
+    u, v = uv[..., 0], uv[..., 1]
+    denominator = 2 * u - 8 * v + 4
+    x, y = 3 * u / denominator, 2 * v / denominator
+    xyz = np.stack([x / y, np.ones_like(x), (1 - x - y) / y], axis=-1)
+    return xyz @ XYZ_TO_SRGB.T
+
+
+class KelvinTable:
+    """Dense Kelvin -> RGB table with the locus geometry needed for tint."""
+    def __init__(self, step=KELVIN_STEP):
+        self.temperatures = np.arange(KELVIN_MIN, KELVIN_MAX + step, step, dtype=np.float64)
+        wavelengths = np.arange(380.0, 781.0, 5.0)
+        metres = wavelengths[None, :] * 1e-9
+        # Planck's law, constant factors dropped since only chromaticity matters
+        radiance = 1.0 / (metres ** 5 * np.expm1(C2 / (metres * self.temperatures[:, None])))
+        xyz = radiance @ color_matching(wavelengths)
+        xyz /= xyz[:, 1:2]
+
+        self.rgb = _encode(xyz @ XYZ_TO_SRGB.T)
+        total = xyz @ np.array([1.0, 15.0, 3.0])
+        self.uv = np.stack([4 * xyz[:, 0] / total, 6 * xyz[:, 1] / total], axis=1)
+        # Unit normals to the locus, pointing towards green (higher v)
+        tangent = np.gradient(self.uv, axis=0)
+        normal = np.stack([-tangent[:, 1], tangent[:, 0]], axis=1)
+        normal *= np.sign(normal[:, 1:2])
+        self.normals = normal / np.linalg.norm(normal, axis=1, keepdims=True)
+        self.step = step
+
+    def index(self, kelvin):
+        """Table row for ``kelvin`` (scalar or array), clamped to the table range."""
+        index = np.rint((np.clip(kelvin, KELVIN_MIN, KELVIN_MAX) - KELVIN_MIN) / self.step)
+        return index.astype(np.int64)
+
+    def lookup(self, kelvin, tint=0.0):
+        """RGB for ``kelvin`` and ``tint`` (-100 green to +100 magenta), as uint8 rows."""
+        index = self.index(kelvin)
+        if not np.any(tint):
+            return self.rgb[index]
+        shift = -np.asarray(tint, dtype=np.float64)[..., None] / 100.0 * TINT_DUV
+        uv = self.uv[index] + shift * self.normals[index]
+        return _encode(_uv_to_linear(uv))
+
+
+_table = None
+
+
+def kelvin_table():
+    """The shared KelvinTable, built on first use."""
+    global _table
+    if _table is None:
+        _table = KelvinTable()
+    return _table
+
+
+def kelvin_to_rgb(kelvin, tint=0.0):
+    """Display (r, g, b) for a color temperature and tint."""
+    r, g, b = kelvin_table().lookup(kelvin, tint).tolist()
+    return r, g, b
+
+
+def kelvin_ramp(start, end, steps, tint=0.0):
+    """(steps, 3) uint8 colors from ``start`` to ``end`` Kelvin, evenly spaced in mireds.
+
+    Mireds (1e6 / K) are perceptually even, so the ramp doesn't rush
+    through the warm end.
+    """
+    mireds = np.linspace(1e6 / start, 1e6 / end, steps)
+    return kelvin_table().lookup(1e6 / mireds, tint)
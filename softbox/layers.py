@@ -0,0 +1,140 @@
+"""
+Effect layers composited on top of a display's own color or effect.
+
+Each layer is an Effect with an opacity and a blend mode. With opacity
+``a`` and layer color ``c``, every mode maps the backdrop ``b`` to
+``b * m + k``:
+
+    Normal    m = 1 - a          k = a * c
+    Add       m = 1              k = a * c
+    Multiply  m = 1 - a + a * c  k = 0
+    Screen    m = 1 - a * c      k = a * c
+
+A stack of such maps is again one map, found with a cumulative product
+over the layers. The whole stack then reduces to one multiply-add,
+applied to the display color and every zone at once. Values stay
+unclamped between layers and are clipped once at the end.
+"""
+import numpy as np
+
+from softbox.effects import Effect, local_clock
+
+BLEND_MODES = ["Normal", "Add", "Multiply", "Screen"]
+
+
+class Layer:
+    """One effect in a LayerStack."""
+    def __init__(self, effect, opacity=1.0, blend="Normal", epoch=0.0):
+        self.effect = effect
+        self.opacity = opacity
+        self.blend = blend
+        self.epoch = epoch
+
+
+class LayerStack:
+    """Ordered effect layers, bottom first, sampled from one clock."""
+    def __init__(self, clock=local_clock):
+        self.clock = clock
+        self.shared_clock = False
+        self.layers = []
+        self._listeners = []
+
+    def __len__(self):
+        return len(self.layers)
+
+    def __iter__(self):
+        return iter(self.layers)
+
+    def add_listener(self, callback):
+        """Call ``callback()`` whenever a layer is added, removed or changed."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _changed(self):
+        for callback in self._listeners:
+            callback()
+
+    def set_clock(self, clock, shared=True):
+        self.clock = clock
+        self.shared_clock = shared
+        for layer in self.layers:
+            layer.epoch = 0.0 if shared else clock()
+        self._changed()
+
+    def add(self, effect_name, base_rgb=(255, 255, 255), speed=500, opacity=1.0, blend="Normal",
+            palette=None, seed=0):
+        """Put an effect on top of the stack and return its Layer."""
+        if blend not in BLEND_MODES:
+            raise ValueError(f"unknown blend mode: {blend}")
+        effect = Effect(effect_name, base_rgb, speed, palette=palette, seed=seed)
+        layer = Layer(effect, min(max(float(opacity), 0.0), 1.0), blend,
+                      0.0 if self.shared_clock else self.clock())
+        self.layers.append(layer)
+        self._changed()
+        return layer
+
+    def update(self, layer, opacity=None, blend=None, speed=None):
+        """Change a layer's opacity, blend mode or speed."""
+        if blend is not None:
+            if blend not in BLEND_MODES:
+                raise ValueError(f"unknown blend mode: {blend}")
+            layer.blend = blend
+        if opacity is not None:
+            layer.opacity = min(max(float(opacity), 0.0), 1.0)
+        if speed is not None:
+            layer.effect.speed = speed
+        self._changed()
+
+    def restart(self, layer, palette=None, seed=0):
+        """Rebuild ``layer``'s effect with a new palette and seed, keeping its speed, phase and place."""
+        effect = layer.effect
+        layer.effect = Effect(effect.name, effect.base_rgb, effect.speed, palette=palette, seed=seed)
+        self._changed()
+
+    def remove(self, layer):
+        if layer in self.layers:
+            self.layers.remove(layer)
+            self._changed()
+
+    def clear(self):
+        if self.layers:
+            self.layers = []
+            self._changed()
+
+    def colors_at(self, t=None):
+        """(L, 3) uint8 colors of every layer at clock time ``t``."""
+        t = self.clock() if t is None else t
+        return np.array([layer.effect.rgb_at((t - layer.epoch) * 1000.0) for layer in self.layers],
+                        dtype=np.uint8).reshape(-1, 3)
+
+    def transform_at(self, t=None):
+        """The whole stack at ``t`` as ``(m, k)``, so that output = backdrop * m + k (0-1 floats)."""
+        colors = self.colors_at(t).astype(np.float64) / 255.0
+        alpha = np.array([layer.opacity for layer in self.layers])[:, None]
+        modes = np.array([BLEND_MODES.index(layer.blend) for layer in self.layers])[:, None]
+        ac = alpha * colors
+        m = np.select([modes == 0, modes == 1, modes == 2], [1.0 - alpha, np.ones_like(ac), 1.0 - alpha + ac],
+                      1.0 - ac)
+        k = np.where(modes == 2, 0.0, ac)
+        # Each layer's k is scaled by the m of every layer above it
+        above = np.cumprod(m[::-1], axis=0)[::-1]
+        above = np.vstack([above[1:], np.ones((1, 3))])
+        return above[0] * m[0], (k * above).sum(axis=0)
+
+    def composite(self, backdrops, t=None):
+        """Composite the stack over (Z, 3) uint8 backdrops, returning (Z, 3) uint8."""
+        backdrops = np.asarray(backdrops, dtype=np.float64).reshape(-1, 3)
+        if not self.layers:
+            return backdrops.astype(np.uint8)
+        m, k = self.transform_at(t)
+        return np.clip(np.rint((backdrops / 255.0 * m + k) * 255.0), 0, 255).astype(np.uint8)
+
+    def ms_until_next_change(self, t=None):
+        """Milliseconds until any layer's frame may change, or None without layers."""
+        if not self.layers:
+            return None
+        t = self.clock() if t is None else t
+        return min(layer.effect.ms_until_next_step((t - layer.epoch) * 1000.0) for layer in self.layers)
@@ -0,0 +1,196 @@
+"""
+Modulators (LFOs) for effect parameters.
+
+A ModulationBank holds every modulator of an engine in preallocated
+arrays: shape, target, rate, depth and phase per slot, plus a random-walk
+table per slot. ``evaluate`` computes all of them for one clock time in a
+handful of NumPy operations into reused buffers, and sums them per
+target. Dozens of modulators therefore cost about as much as one.
+``integral`` gives the exact area under the modulators between two clock
+times from the antiderivative of each shape, so a modulated speed maps a
+clock time to one effect position however often it is sampled.
+"""
+import numpy as np
+
+MODULATOR_SHAPES = ["Sine", "Triangle", "Random Walk", "Envelope"]
+
+# Parameters a modulator can drive, see EffectEngine.modulate
+MODULATION_TARGETS = ["speed", "brightness", "hue", "dim"]
+
+# Random-walk points per slot, 8 per cycle, so a walk repeats after 128 cycles
+WALK_POINTS = 1024
+
+
+def _walk(seed):
+    """A seamless bounded random walk over WALK_POINTS, in -1..1."""
+    steps = np.random.default_rng([seed, 3]).standard_normal(WALK_POINTS) * 0.25
+    walk = np.cumsum(steps)
+    walk -= np.linspace(0.0, walk[-1], WALK_POINTS)  # end where it started
+    # Fold into -1..1 like a ball bouncing between two walls
+    return 1.0 - np.abs((walk + 1.0) % 4.0 - 2.0)
+
+
+def _walk_sums(walk):
+    """Area under the interpolated ``walk`` from point 0 to each point, WALK_POINTS + 1 values."""
+    return np.concatenate([[0.0], np.cumsum((walk + np.roll(walk, -1)) / 2.0)])
+
+
+class ModulationBank:
+    """Fixed-capacity set of modulators evaluated together.
+
+    Sine, Triangle and Random Walk swing between -1 and 1, Envelope rises
+    from 0 to 1 over the first ``attack`` of each cycle and decays over
+    ``release`` (fractions of a cycle). Each value is scaled by its depth
+    and added to its target.
+    """
+    def __init__(self, capacity=32):
+        self.capacity = capacity
+        self.shape = np.zeros(capacity, dtype=np.int64)
+        self.rate = np.zeros(capacity)
+        self.depth = np.zeros(capacity)  # zero for free slots
+        self.phase = np.zeros(capacity)
+        self.attack = np.full(capacity, 0.1)
+        self.release = np.full(capacity, 0.25)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.walks = np.zeros((capacity, WALK_POINTS))
+        self.walk_sums = np.zeros((capacity, WALK_POINTS + 1))
+        # One-hot slot -> target matrix, so the per-target sums are one dot product
+        self.routing = np.zeros((len(MODULATION_TARGETS), capacity))
+        self.values = np.zeros(len(MODULATION_TARGETS))
+        self._cycles = np.zeros(capacity)
+        self._fraction = np.zeros(capacity)
+        self._scratch = np.zeros(capacity)
+        self._out = np.zeros(capacity)
+        self._index = np.zeros(capacity, dtype=np.int64)
+        self._rows = np.arange(capacity)
+
+    def __len__(self):
+        return int(self.active.sum())
+
+    def add(self, target, shape, rate=1.0, depth=0.5, phase=0.0, seed=0, attack=0.1, release=0.25):
+        """Add a modulator of ``rate`` Hz and return its slot."""
+        if target not in MODULATION_TARGETS:
+            raise ValueError(f"unknown modulation target: {target}")
+        if shape not in MODULATOR_SHAPES:
+            raise ValueError(f"unknown modulator shape: {shape}")
+        free = np.flatnonzero(~self.active)
+        if not len(free):
+            raise ValueError(f"all {self.capacity} modulator slots are in use")
+        slot = int(free[0])
+        self.active[slot] = True
+        self.shape[slot] = MODULATOR_SHAPES.index(shape)
+        self.rate[slot] = rate
+        self.depth[slot] = depth
+        self.phase[slot] = phase
+        self.attack[slot] = max(attack, 1e-6)
+        self.release[slot] = max(release, 1e-6)
+        self.walks[slot] = _walk(seed) if shape == "Random Walk" else 0.0
+        self.walk_sums[slot] = _walk_sums(self.walks[slot])
+        self.routing[:, slot] = 0.0
+        self.routing[MODULATION_TARGETS.index(target), slot] = 1.0
+        return slot
+
+    def set(self, slot, rate=None, depth=None):
+        """Change a modulator's rate or depth."""
+        if rate is not None:
+            self.rate[slot] = rate
+        if depth is not None:
+            self.depth[slot] = depth
+
+    def remove(self, slot):
+        self.active[slot] = False
+        self.depth[slot] = 0.0
+        self.routing[:, slot] = 0.0
+
+    def clear(self):
+        for slot in np.flatnonzero(self.active):
+            self.remove(slot)
+
+    def targets(self):
+        """Names of the targets with at least one active modulator."""
+        return [name for name, row in zip(MODULATION_TARGETS, self.routing) if row.any()]
+
+    def evaluate(self, t):
+        """Sum of every modulator per target at ``t`` seconds, in MODULATION_TARGETS order.
+
+        Returns the bank's own ``values`` array, overwritten on each call.
+        """
+        cycles, fraction, scratch, out = self._cycles, self._fraction, self._scratch, self._out
+        np.multiply(self.rate, t, out=cycles)
+        cycles += self.phase
+        np.mod(cycles, 1.0, out=fraction)
+
+        # Sine
+        np.multiply(fraction, 2 * np.pi, out=out)
+        np.sin(out, out=out)
+        # Triangle, starting at 0 and rising like the sine
+        np.add(fraction, 0.25, out=scratch)
+        np.mod(scratch, 1.0, out=scratch)
+        scratch -= 0.5
+        np.abs(scratch, out=scratch)
+        np.multiply(scratch, -4.0, out=scratch)
+        scratch += 1.0
+        np.copyto(out, scratch, where=self.shape == 1)
+        # Random walk, linearly interpolated between table points
+        np.multiply(cycles, 8.0, out=scratch)
+        np.floor(scratch, out=scratch)
+        np.mod(scratch, WALK_POINTS, out=scratch)
+        self._index[:] = scratch
+        low = self.walks[self._rows, self._index]
+        high = self.walks[self._rows, (self._index + 1) % WALK_POINTS]
+        np.multiply(cycles, 8.0, out=scratch)
+        np.mod(scratch, 1.0, out=scratch)
+        np.copyto(out, low + (high - low) * scratch, where=self.shape == 2)
+        # Envelope: linear attack, exponential release
+        rising = fraction < self.attack
+        np.copyto(out, np.where(rising, fraction / self.attack,
+                                np.exp(-(fraction - self.attack) / self.release)), where=self.shape == 3)
+
+        out *= self.depth
+        np.dot(self.routing, out, out=self.values)
+        return self.values
+
+    def _area(self, t):
+        """Area under each unscaled modulator from cycle 0 to its cycle at ``t``, in cycles."""
+        cycles = self.rate * t + self.phase
+        whole = np.floor(cycles)
+        fraction = cycles - whole
+        area = np.zeros(self.capacity)
+        # Sine and Triangle average zero over a cycle, so only the fraction counts
+        sine = (1.0 - np.cos(2 * np.pi * fraction)) / (2 * np.pi)
+        triangle = np.where(fraction < 0.25, 2 * fraction ** 2,
+                            np.where(fraction < 0.75, 2 * fraction - 2 * fraction ** 2 - 0.25,
+                                     2 * (1.0 - fraction) ** 2))
+        # Random walk: whole tables, whole points, then the trapezoid into the current point
+        points = cycles * 8.0
+        point = np.floor(points)
+        tables, index = np.divmod(point, WALK_POINTS)
+        index = index.astype(np.int64)
+        rest = points - point
+        low = self.walks[self._rows, index]
+        high = self.walks[self._rows, (index + 1) % WALK_POINTS]
+        walk = (tables * self.walk_sums[:, -1] + self.walk_sums[self._rows, index]
+                + low * rest + (high - low) * rest ** 2 / 2.0) / 8.0
+        # Envelope: whole cycles plus the attack ramp or the decay so far
+        attack, release = self.attack, self.release
+        cycle = attack / 2 + release * (1.0 - np.exp(-(1.0 - attack) / release))
+        envelope = whole * cycle + np.where(fraction < attack, fraction ** 2 / (2 * attack),
+                                            attack / 2 + release * (1.0 - np.exp(-(fraction - attack) / release)))
+        for shape, values in enumerate((sine, triangle, walk, envelope)):
+            np.copyto(area, values, where=self.shape == shape)
+        return area
+
+    def integral(self, t0, t1):
+        """Area under every modulator per target from ``t0`` to ``t1`` seconds.
+
+        Exact for every shape, so ``integral(0, a) + integral(a, b)`` equals
+        ``integral(0, b)``. Returns a new array in MODULATION_TARGETS order.
+        """
+        moving = self.rate != 0
+        rate = np.where(moving, self.rate, 1.0)
+        area = (self._area(t1) - self._area(t0)) / rate
+        # A modulator with rate 0 holds its value at its phase
+        self.evaluate(t0)
+        still = self._out * (t1 - t0)
+        area = np.where(moving, area * self.depth, still)
+        return self.routing @ area
@@ -0,0 +1,206 @@
+"""
+Full-screen output on every attached screen, driven by one EffectEngine.
+"""
+import math
+
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QColor, QGuiApplication, QPainter
+from PySide6.QtWidgets import QWidget
+
+
+class ScreenWindow(QWidget):
+    """Frameless full-screen window showing the engine's frame on one screen."""
+    def __init__(self, output, screen):
+        super().__init__(None, Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
+        self.output = output
+        self.setScreen(screen)
+        self.setGeometry(screen.geometry())
+        self.setCursor(Qt.BlankCursor)
+        self.override_color = None
+        self.brightness = 1.0
+        self.calibration = None
+        self._calibrated = {}
+        self._source = None
+        self._presented = QColor(0, 0, 0)
+        self.dimmer = None
+        self._dither_timer = QTimer(self)
+        self._dither_timer.setTimerType(Qt.PreciseTimer)
+        self._dither_timer.timeout.connect(self.update)
+        self.repaints = 0
+
+    def set_override(self, color=None, brightness=1.0):
+        """Show ``color`` instead of the engine frame and scale by ``brightness``."""
+        self.override_color = None if color is None else QColor(color)
+        self.brightness = min(max(float(brightness), 0.0), 1.0)
+        if self._source is not None:
+            self.present(self._source)
+
+    def set_calibration(self, calibration):
+        """Correct this screen's output with a Calibration, or None."""
+        self.calibration = calibration
+        self._calibrated = {}
+        if self._source is not None:
+            self.present(self._source)
+
+    def set_dimmer(self, dimmer):
+        """Dim this screen with a Dimmer (the display's master dimmer), or None."""
+        self.dimmer = dimmer
+        self.update()
+        self._update_dither()
+
+    def _refresh_rate(self):
+        return self.screen().refreshRate() or 60.0
+
+    def _update_dither(self):
+        # Same approximation as ColorDisplay: repaint at the refresh rate while dithering
+        presented = self._presented
+        if self.dimmer is not None and self.dimmer.needs_dither(
+                (presented.red(), presented.green(), presented.blue())):
+            if not self._dither_timer.isActive():
+                self._dither_timer.start(max(1, int(1000 / self._refresh_rate())))
+        else:
+            self._dither_timer.stop()
+
+    def present(self, rgb):
+        """Show an engine frame, repainting only when the result changes."""
+        self._source = rgb
+        if self.override_color is not None:
+            color = self.override_color
+            rgb = (color.red(), color.green(), color.blue())
+        if self.brightness < 1.0:
+            rgb = tuple(int(round(v * self.brightness)) for v in rgb)
+        if self.calibration is not None:
+            # Effects cycle through few colors, so each is calibrated once
+            calibrated = self._calibrated.get(rgb)
+            if calibrated is None:
+                if len(self._calibrated) >= 4096:
+                    self._calibrated.clear()
+                calibrated = self._calibrated[rgb] = self.calibration.apply(rgb)
+            rgb = calibrated
+        color = QColor(*rgb)
+        if color != self._presented:
+            self._presented = color
+            self.update()
+            self._update_dither()
+
+    def presented_color(self):
+        return QColor(self._presented)
+
+    def paintEvent(self, event):
+        self.repaints += 1
+        painter = QPainter(self)
+        color = self._presented
+        if self.dimmer is not None:
+            phase = int(self.output.engine.clock() * self._refresh_rate())
+            color = QColor(*self.dimmer.apply((color.red(), color.green(), color.blue()), phase))
+        painter.fillRect(self.rect(), color)
+        painter.end()
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_Escape:
+            self.output.close()
+        else:
+            super().keyPressEvent(event)
+
+
+class MultiScreenOutput:
+    """One full-screen window per screen, all sampling the same EffectEngine.
+
+    Windows are grouped by refresh rate and each group is paced by a
+    single timer, so one engine lookup per refresh serves every screen in
+    the group. Timers wake at the next effect step rather than every
+    refresh, and stop entirely while the frame is static until the engine
+    reports a change. Adding screens therefore adds repaints, not ticks.
+    An optional ``flash_guard`` (FlashGuard) checks the frames before any
+    window shows them, and an optional ``layers`` (LayerStack, usually the
+    display's) is composited over the engine frame, so the screens show
+    what the display shows.
+    """
+    def __init__(self, engine, screens=None, flash_guard=None, layers=None):
+        self.engine = engine
+        self.flash_guard = flash_guard
+        self.layers = layers
+        if screens is None:
+            screens = QGuiApplication.screens()
+        self.windows = [ScreenWindow(self, screen) for screen in screens]
+
+        # Create one pacing timer per distinct refresh rate
+        self._groups = {}
+        for window in self.windows:
+            rate = window.screen().refreshRate() or 60.0
+            self._groups.setdefault(rate, []).append(window)
+        self._timers = {}
+        for rate in self._groups:
+            timer = QTimer()
+            timer.setSingleShot(True)
+            timer.setTimerType(Qt.PreciseTimer)
+            timer.timeout.connect(lambda rate=rate: self._tick(rate))
+            self._timers[rate] = timer
+        self.ticks = 0
+        engine.add_listener(self._engine_changed)
+        if layers is not None:
+            layers.add_listener(self._engine_changed)
+
+    def set_override(self, index, color=None, brightness=1.0):
+        """Override color and/or brightness of screen ``index``."""
+        self.windows[index].set_override(color, brightness)
+
+    def set_calibration(self, index, calibration):
+        """Calibrate screen ``index`` with a Calibration, or None."""
+        self.windows[index].set_calibration(calibration)
+
+    def set_dimmer(self, dimmer):
+        """Dim every screen with a Dimmer, or None."""
+        for window in self.windows:
+            window.set_dimmer(dimmer)
+
+    def set_flash_guard(self, guard):
+        """Check frames with a FlashGuard from now on, or None to stop checking."""
+        self.flash_guard = guard
+
+    def show(self):
+        for window in self.windows:
+            window.showFullScreen()
+        self._engine_changed()
+        return self
+
+    def close(self):
+        self.engine.remove_listener(self._engine_changed)
+        if self.layers is not None:
+            self.layers.remove_listener(self._engine_changed)
+        for timer in self._timers.values():
+            timer.stop()
+        for window in self.windows:
+            window._dither_timer.stop()
+            window.close()
+
+    def is_idle(self):
+        """True while no pacing timer is running (static frame)."""
+        return not any(timer.isActive() for timer in self._timers.values())
+
+    def _engine_changed(self):
+        # Resample on the next event loop pass
+        for timer in self._timers.values():
+            timer.start(0)
+
+    def _tick(self, rate):
+        self.ticks += 1
+        engine = self.engine
+        now = engine.clock()
+        rgb = engine.frame_at(now)
+        layers = self.layers
+        if layers:
+            rgb = tuple(layers.composite([rgb], now)[0].tolist())
+        windows = self._groups[rate]
+        # Only new frames go through the guard; held frames leave the windows as they are
+        if rgb != windows[0]._source and (self.flash_guard is None or self.flash_guard.check(rgb)):
+            for window in windows:
+                window.present(rgb)
+        until_next = engine.ms_until_next_change(now, 1000.0 / rate)
+        if layers:
+            layers_next = layers.ms_until_next_change(now)
+            if layers_next is not None and (until_next is None or layers_next < until_next):
+                until_next = layers_next
+        if until_next is not None:
+            # Never wake more often than the screen can show a new frame
+            self._timers[rate].start(max(math.ceil(until_next), int(1000 / rate)))
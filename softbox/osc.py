@@ -0,0 +1,306 @@
+"""
+Open Sound Control (OSC 1.0) input over UDP.
+"""
+import socket
+import struct
+import threading
+import time
+
+from softbox.effects import EFFECT_NAMES
+
+# Default address -> target mapping
+DEFAULT_MAPPING = {
+    "/softbox/r": "r",
+    "/softbox/g": "g",
+    "/softbox/b": "b",
+    "/softbox/rgb": "rgb",
+    "/softbox/speed": "speed",
+    "/softbox/effect": "effect",
+}
+
+
+# Deepest bundle nesting accepted; real senders nest one or two levels
+MAX_BUNDLE_DEPTH = 8
+
+
+class OscError(ValueError):
+    """Raised for a malformed OSC packet."""
+
+
+def _read_string(data, offset):
+    end = data.find(b"\0", offset)
+    if end < 0:
+        raise OscError("unterminated string")
+    value = data[offset:end].decode("utf-8", "replace")
+    # Strings are padded to a multiple of four bytes including the terminator
+    return value, (end + 4) & ~3
+
+
+def _pad(data):
+    return data + b"\0" * (4 - len(data) % 4)
+
+
+def parse_packet(data, depth=0):
+    """Parse an OSC message or bundle into a list of (address, args) tuples."""
+    data = bytes(data)
+    if data.startswith(b"#bundle\0"):
+        if depth >= MAX_BUNDLE_DEPTH:
+            raise OscError(f"bundles nested deeper than {MAX_BUNDLE_DEPTH}")
+        messages = []
+        offset = 16  # "#bundle\0" plus the 8-byte time tag
+        while offset < len(data):
+            if offset + 4 > len(data):
+                raise OscError("truncated bundle element")
+            (size,) = struct.unpack_from(">i", data, offset)
+            offset += 4
+            if size < 0 or offset + size > len(data):
+                raise OscError("bad bundle element size")
+            messages.extend(parse_packet(data[offset:offset + size], depth + 1))
+            offset += size
+        return messages
+    return [parse_message(data)]
+
+
+def parse_message(data):
+    """Parse one OSC message into (address, args)."""
+    if not data.startswith(b"/"):
+        raise OscError("address must start with '/'")
+    address, offset = _read_string(data, 0)
+    if offset >= len(data):
+        # Type tags are optional in very old senders
+        return address, []
+    tags, offset = _read_string(data, offset)
+    if not tags.startswith(","):
+        raise OscError("missing type tag string")
+
+    args = []
+    try:
+        for tag in tags[1:]:
+            if tag == "i":
+                args.append(struct.unpack_from(">i", data, offset)[0])
+                offset += 4
+            elif tag == "f":
+                args.append(struct.unpack_from(">f", data, offset)[0])
+                offset += 4
+            elif tag == "h":
+                args.append(struct.unpack_from(">q", data, offset)[0])
+                offset += 8
+            elif tag == "d":
+                args.append(struct.unpack_from(">d", data, offset)[0])
+                offset += 8
+            elif tag == "s":
+                value, offset = _read_string(data, offset)
+                args.append(value)
+            elif tag == "b":
+                (size,) = struct.unpack_from(">i", data, offset)
+                args.append(data[offset + 4:offset + 4 + size])
+                offset = (offset + 4 + size + 3) & ~3
+            elif tag == "T":
+                args.append(True)
+            elif tag == "F":
+                args.append(False)
+            elif tag == "N":
+                args.append(None)
+            else:
+                raise OscError(f"unsupported type tag {tag!r}")
+    except struct.error as exc:
+        raise OscError(f"truncated argument: {exc}") from None
+    return address, args
+
+
+def encode_message(address, *args):
+    """Encode an OSC message, used for loopback testing and by senders."""
+    tags = ","
+    payload = b""
+    for arg in args:
+        if isinstance(arg, bool):
+            tags += "T" if arg else "F"
+        elif isinstance(arg, int):
+            tags += "i"
+            payload += struct.pack(">i", arg)
+        elif isinstance(arg, float):
+            tags += "f"
+            payload += struct.pack(">f", arg)
+        elif isinstance(arg, str):
+            tags += "s"
+            payload += _pad(arg.encode("utf-8"))
+        elif isinstance(arg, (bytes, bytearray)):
+            tags += "b"
+            payload += struct.pack(">i", len(arg)) + bytes(arg) + b"\0" * (-len(arg) % 4)
+        else:
+            raise TypeError(f"cannot encode {type(arg).__name__} as OSC")
+    return _pad(address.encode("utf-8")) + _pad(tags.encode("ascii")) + payload
+
+
+def _channel(value):
+    """Map an OSC value to 0-255: floats are normalized 0-1, ints are raw."""
+    if isinstance(value, float):
+        return int(round(min(max(value, 0.0), 1.0) * 255))
+    return min(max(int(value), 0), 255)
+
+
+class OscListener:
+    """Receives OSC over UDP and applies it to a controller once per frame.
+
+    Packets are parsed on a background thread. Only the newest value per
+    address is kept, and the first new value after a flush schedules one
+    flush on the GUI thread via ``controller.call``. A fader sending
+    hundreds of messages a second therefore costs one update per frame.
+    """
+    def __init__(self, controller, host="0.0.0.0", port=9000, mapping=None):
+        self.controller = controller
+        self.mapping = dict(DEFAULT_MAPPING if mapping is None else mapping)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind((host, port))
+        self.port = self._sock.getsockname()[1]
+        self._lock = threading.Lock()
+        self._latest = {}
+        self._flush_pending = False
+        self._thread = None
+        self._running = False
+
+        self._started = time.monotonic()
+        self._packets = 0
+        self._messages = 0
+        self._coalesced = 0
+        self._applied = 0
+        self._malformed = 0
+        self._unmapped = 0
+        self._errors = 0
+
+    def start(self):
+        """Start receiving on a daemon thread."""
+        self._running = True
+        self._started = time.monotonic()
+        self._thread = threading.Thread(target=self._receive, name="SoftBoxOSC", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop receiving and close the socket."""
+        self._running = False
+        try:
+            # Wake the blocking recv with an empty datagram to ourselves
+            host = self._sock.getsockname()[0]
+            self._sock.sendto(b"", ("127.0.0.1" if host == "0.0.0.0" else host, self.port))
+        except OSError:
+            pass
+        if self._thread is not None:
+            self._thread.join(1)
+            self._thread = None
+        self._sock.close()
+
+    def stats(self):
+        """Throughput and drop counters."""
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        return {
+            "packets": self._packets,
+            "messages": self._messages,
+            "messages_per_second": self._messages / elapsed,
+            "applied": self._applied,
+            # Values replaced by a newer one before the frame applied them
+            "coalesced": self._coalesced,
+            "malformed": self._malformed,
+            "unmapped": self._unmapped,
+            "errors": self._errors,
+        }
+
+    def _receive(self):
+        while self._running:
+            try:
+                data = self._sock.recv(65535)
+            except OSError:
+                break
+            if not self._running:
+                break
+            if not data:
+                continue
+            self._packets += 1
+            # One bad datagram must never end the receive loop
+            try:
+                messages = parse_packet(data)
+            except OscError:
+                self._malformed += 1
+                continue
+            except Exception:
+                self._errors += 1
+                continue
+            try:
+                self.feed(messages)
+            except Exception:
+                self._errors += 1
+
+    def feed(self, messages):
+        """Store parsed (address, args) messages and schedule a flush."""
+        schedule = False
+        with self._lock:
+            for address, args in messages:
+                self._messages += 1
+                if address not in self.mapping or not args:
+                    self._unmapped += 1
+                    continue
+                if address in self._latest:
+                    self._coalesced += 1
+                self._latest[address] = args
+            if self._latest and not self._flush_pending:
+                self._flush_pending = True
+                schedule = True
+        if schedule:
+            self.controller.call(self._flush)
+
+    def _flush(self):
+        """Apply the newest value per address (runs on the GUI thread)."""
+        with self._lock:
+            latest, self._latest = self._latest, {}
+            self._flush_pending = False
+
+        # Commands go through the controller's public API; submitted from
+        # inside a drain, they are applied in that same drain
+        controller = self.controller
+        color = list(controller.state()["color"])
+        new_color = list(color)
+        color_changed = False
+        for address, args in latest.items():
+            target = self.mapping[address]
+            try:
+                if target in ("r", "g", "b"):
+                    new_color["rgb".index(target)] = _channel(args[0])
+                    color_changed = True
+                elif target == "rgb":
+                    if len(args) < 3:
+                        raise IndexError("rgb needs three values")
+                    new_color = [_channel(v) for v in args[:3]]
+                    color_changed = True
+                elif target == "speed":
+                    self._track(controller.set_speed(self._speed(args[0])))
+                elif target == "effect":
+                    self._track(controller.start_effect(self._effect(args[0])))
+            except (ValueError, TypeError, IndexError):
+                self._errors += 1
+        if color_changed and new_color != color:
+            self._track(controller.set_color(*new_color))
+
+    def _track(self, future):
+        future.add_done_callback(self._command_done)
+
+    def _command_done(self, future):
+        if future.exception() is None:
+            self._applied += 1
+        else:
+            self._errors += 1
+
+    def _speed(self, value):
+        """Floats 0-1 span the 50-1000 ms speed range, ints are milliseconds."""
+        if isinstance(value, float):
+            return int(round(50 + min(max(value, 0.0), 1.0) * 950))
+        return int(value)
+
+    def _effect(self, value):
+        """Effects are given by name or by index in the effect list."""
+        if isinstance(value, str):
+            return value
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise TypeError(f"effect index must be an int, got {value!r}")
+        if not 0 <= value < len(EFFECT_NAMES):
+            raise IndexError(f"effect index out of range: {value}")
+        return EFFECT_NAMES[value]
@@ -0,0 +1,109 @@
+"""
+Dominant-color palettes from reference photos.
+
+Large photos are never processed pixel by pixel: JPEGs are decoded
+straight to a reduced size, and the decoded image is sampled on a stride
+so k-means sees at most ``max_samples`` pixels. Palettes are cached by a
+hash of the file contents.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+from PySide6.QtCore import QSize
+from PySide6.QtGui import QImage, QImageReader
+
+from softbox.images import RGB_CHANNELS
+
+# Longest side the decoder is asked for
+DECODE_SIZE = 1024
+
+
+def default_cache_dir():
+    return os.path.join(tempfile.gettempdir(), "softbox-palettes")
+
+
+def file_hash(path, block=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for data in iter(lambda: f.read(block), b""):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def sample_pixels(path, max_samples=65536):
+    """Decode ``path`` at reduced size and return up to ``max_samples`` (N, 3) float32 pixels."""
+    reader = QImageReader(os.fspath(path))
+    size = reader.size()
+    if size.isValid() and max(size.width(), size.height()) > DECODE_SIZE:
+        # JPEG decoders scale while decoding, which is far cheaper than decoding in full
+        scale = DECODE_SIZE / max(size.width(), size.height())
+        reader.setScaledSize(QSize(max(1, round(size.width() * scale)), max(1, round(size.height() * scale))))
+    image = reader.read()
+    if image.isNull():
+        raise ValueError(f"cannot decode image {path}: {reader.errorString()}")
+    image = image.convertToFormat(QImage.Format_RGB32)
+
+    bits = np.frombuffer(image.constBits(), dtype=np.uint8).reshape(image.height(), image.bytesPerLine())
+    pixels = bits[:, :image.width() * 4].reshape(image.height(), image.width(), 4)
+    stride = max(1, int(np.ceil(np.sqrt(image.width() * image.height() / max_samples))))
+    return pixels[::stride, ::stride][..., RGB_CHANNELS].reshape(-1, 3).astype(np.float32)
+
+
+def kmeans(pixels, count, iterations=20, seed=0):
+    """Cluster (N, 3) pixels into ``count`` colors.
+
+    Returns ``(centers, weights)`` sorted by cluster size, largest first.
+    Starts from k-means++ seeds and stops early once no center moves.
+    """
+    rng = np.random.default_rng(seed)
+    count = min(count, len(pixels))
+    # k-means++: pick each seed with probability proportional to squared distance
+    centers = [pixels[rng.integers(len(pixels))]]
+    distance = ((pixels - centers[0]) ** 2).sum(axis=1)
+    for _ in range(count - 1):
+        total = distance.sum()
+        index = rng.choice(len(pixels), p=distance / total) if total > 0 else rng.integers(len(pixels))
+        centers.append(pixels[index])
+        distance = np.minimum(distance, ((pixels - pixels[index]) ** 2).sum(axis=1))
+    centers = np.array(centers, dtype=np.float32)
+
+    for _ in range(iterations):
+        # Squared distances via |p|^2 - 2 p.c + |c|^2, one (N, k) matrix per pass
+        scores = (centers ** 2).sum(axis=1)[None, :] - 2.0 * pixels @ centers.T
+        labels = scores.argmin(axis=1)
+        sizes = np.bincount(labels, minlength=count)
+        sums = np.stack([np.bincount(labels, weights=pixels[:, c], minlength=count) for c in range(3)], axis=1)
+        moved = sizes > 0
+        updated = centers.copy()
+        updated[moved] = sums[moved] / sizes[moved, None]
+        if np.allclose(updated, centers, atol=0.5):
+            centers = updated
+            break
+        centers = updated
+
+    order = np.argsort(-sizes)
+    return centers[order], sizes[order] / sizes.sum()
+
+
+def extract_palette(path, count=5, max_samples=65536, cache_dir=None):
+    """Return the ``count`` dominant colors of an image as (r, g, b) tuples.
+
+    Results are cached on disk by file hash, so re-opening the same
+    mood-board photo (under any name) costs one hash of the file.
+    """
+    path = os.fspath(path)
+    cache_dir = cache_dir or default_cache_dir()
+    cache = os.path.join(cache_dir, f"{file_hash(path)}-{count}.json")
+    if os.path.exists(cache):
+        with open(cache) as f:
+            return [tuple(color) for color in json.load(f)]
+
+    centers, _ = kmeans(sample_pixels(path, max_samples), count)
+    palette = [tuple(int(round(v)) for v in center) for center in centers]
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(cache, "w") as f:
+        json.dump(palette, f)
+    return palette
@@ -0,0 +1,244 @@
+"""
+Test patterns for measuring a display with a meter.
+
+A chart is a list of patches: a stepped gray ramp, the primaries and
+secondaries, or a grid through the RGB cube. ``PatternWindow`` shows the
+patches one at a time, full screen, stepping on a fixed schedule or on
+keypress, and logs what it painted with timestamps so the readings can
+be matched up afterwards. Patterns are never calibrated: they measure
+the raw display.
+"""
+import collections
+import csv
+import itertools
+import math
+import time
+
+from PySide6.QtCore import QRectF, Qt, QTimer, Signal
+from PySide6.QtGui import QColor, QGuiApplication, QImage, QPainter, QPixmap
+from PySide6.QtWidgets import QWidget
+
+PATTERN_NAMES = ["Gray Ramp", "Primaries", "Patch Grid"]
+
+PRIMARIES = [
+    ("White", (255, 255, 255)), ("Red", (255, 0, 0)), ("Green", (0, 255, 0)), ("Blue", (0, 0, 255)),
+    ("Cyan", (0, 255, 255)), ("Magenta", (255, 0, 255)), ("Yellow", (255, 255, 0)), ("Black", (0, 0, 0)),
+]
+
+LOG_FIELDS = ["wall_time", "monotonic", "screen", "pattern", "index", "label", "r", "g", "b"]
+
+
+def _levels(steps):
+    return [round(i * 255 / (steps - 1)) for i in range(steps)]
+
+
+def pattern_patches(pattern, steps=11):
+    """The (label, (r, g, b)) patches of a chart in measuring order.
+
+    ``steps`` is the number of gray levels of the ramp, or the levels per
+    channel of the grid (``steps ** 3`` patches).
+    """
+    if pattern == "Gray Ramp":
+        if steps < 2:
+            raise ValueError("a gray ramp needs at least 2 steps")
+        return [(f"Gray {v}", (v, v, v)) for v in _levels(steps)]
+    if pattern == "Primaries":
+        return list(PRIMARIES)
+    if pattern == "Patch Grid":
+        if steps < 2:
+            raise ValueError("a patch grid needs at least 2 levels")
+        return [(f"RGB {r} {g} {b}", (r, g, b)) for r, g, b in itertools.product(_levels(steps), repeat=3)]
+    raise ValueError(f"unknown pattern: {pattern}")
+
+
+def render_patch(rgb, width, height, window=1.0):
+    """One patch as a QImage: ``window`` of the area in the patch color, centered on black."""
+    image = QImage(width, height, QImage.Format_RGB32)
+    image.fill(QColor(0, 0, 0))
+    side = math.sqrt(min(max(window, 0.0), 1.0))
+    painter = QPainter(image)
+    painter.fillRect(QRectF(width * (1 - side) / 2, height * (1 - side) / 2, width * side, height * side),
+                     QColor(*rgb))
+    painter.end()
+    return image
+
+
+def render_chart(patches, width, height):
+    """Every patch of a chart at once, in a near-square grid, as a QImage."""
+    columns = math.ceil(math.sqrt(len(patches) * width / max(height, 1)))
+    rows = math.ceil(len(patches) / columns)
+    image = QImage(width, height, QImage.Format_RGB32)
+    image.fill(QColor(0, 0, 0))
+    painter = QPainter(image)
+    for index, (_, rgb) in enumerate(patches):
+        row, column = divmod(index, columns)
+        # Integer edges so neighbouring patches neither overlap nor leave gaps
+        left, right = column * width // columns, (column + 1) * width // columns
+        top, bottom = row * height // rows, (row + 1) * height // rows
+        painter.fillRect(left, top, right - left, bottom - top, QColor(*rgb))
+    painter.end()
+    return image
+
+
+class PatternCache:
+    """LRU cache of rendered pattern pixmaps.
+
+    Keys include the size and device pixel ratio, so stepping through a
+    chart renders each patch once and later passes just draw a pixmap.
+    """
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self._pixmaps = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, width, height, ratio, render):
+        """Return the pixmap for ``key``, calling ``render(w, h)`` (device pixels) on a miss."""
+        key = (key, width, height, ratio)
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+            self.hits += 1
+            return pixmap
+
+        self.misses += 1
+        pixmap = QPixmap.fromImage(render(max(1, round(width * ratio)), max(1, round(height * ratio))))
+        pixmap.setDevicePixelRatio(ratio)
+        self._pixmaps[key] = pixmap
+        if len(self._pixmaps) > self.capacity:
+            self._pixmaps.popitem(last=False)
+        return pixmap
+
+    def clear(self):
+        self._pixmaps.clear()
+
+    def stats(self):
+        return {"entries": len(self._pixmaps), "hits": self.hits, "misses": self.misses}
+
+
+class PatternWindow(QWidget):
+    """Full-screen window stepping through the patches of a chart.
+
+    With ``interval_ms`` the patches advance on a fixed schedule measured
+    from the first patch, so timer latency never accumulates. Without it,
+    Space or Right moves on and Left goes back. Tab toggles an overview
+    of the whole chart, and Escape closes the window. Every patch painted
+    is appended to ``log_path`` as CSV (see ``LOG_FIELDS``).
+    """
+    finished = Signal()
+
+    def __init__(self, pattern="Gray Ramp", steps=11, screen=None, interval_ms=None, log_path=None, window=1.0):
+        super().__init__(None, Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
+        screen = screen or QGuiApplication.primaryScreen()
+        self.setScreen(screen)
+        self.setGeometry(screen.geometry())
+        self.setCursor(Qt.BlankCursor)
+        self.pattern = pattern
+        self.patches = pattern_patches(pattern, steps)
+        self.window = window
+        self.interval_ms = interval_ms
+        self.index = 0
+        self.overview = False
+        self.cache = PatternCache()
+        self._logged = None
+        self._epoch = None
+        self._log_file = None
+        self._log = None
+        if log_path is not None:
+            self._log_file = open(log_path, "w", newline="", encoding="utf-8")
+            self._log = csv.writer(self._log_file)
+            self._log.writerow(LOG_FIELDS)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._scheduled_step)
+
+    def start(self):
+        """Show the window on its screen and start at the first patch."""
+        self.showFullScreen()
+        self.show_patch(0)
+        return self
+
+    def current_patch(self):
+        return self.patches[self.index]
+
+    def show_patch(self, index):
+        """Show patch ``index`` (clamped) and restart the schedule from it."""
+        self.index = min(max(index, 0), len(self.patches) - 1)
+        self.update()
+        if self.interval_ms is not None:
+            self._epoch = time.monotonic() - self.index * self.interval_ms / 1000.0
+            self._schedule()
+        # Render the next patch ahead so stepping is just a blit
+        if self.index + 1 < len(self.patches):
+            self._pixmap(self.index + 1)
+
+    def next_patch(self):
+        if self.index + 1 < len(self.patches):
+            self.show_patch(self.index + 1)
+        else:
+            self._timer.stop()
+            self.finished.emit()
+
+    def previous_patch(self):
+        self.show_patch(self.index - 1)
+
+    def _schedule(self):
+        due = self._epoch + (self.index + 1) * self.interval_ms / 1000.0
+        self._timer.start(max(0, math.ceil((due - time.monotonic()) * 1000.0)))
+
+    def _scheduled_step(self):
+        if self.index + 1 >= len(self.patches):
+            self.finished.emit()
+            return
+        self.index += 1
+        self.update()
+        self._schedule()
+        if self.index + 1 < len(self.patches):
+            self._pixmap(self.index + 1)
+
+    def _pixmap(self, index):
+        width, height, ratio = self.width(), self.height(), self.devicePixelRatioF()
+        if index is None:
+            return self.cache.get((self.pattern, len(self.patches), "chart"), width, height, ratio,
+                                  lambda w, h: render_chart(self.patches, w, h))
+        rgb = self.patches[index][1]
+        return self.cache.get((rgb, self.window), width, height, ratio, lambda w, h: render_patch(rgb, w, h, self.window))
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.drawPixmap(self.rect(), self._pixmap(None if self.overview else self.index))
+        painter.end()
+        if not self.overview and self._logged != self.index:
+            self._logged = self.index
+            self._write_log()
+
+    def _write_log(self):
+        if self._log is None:
+            return
+        label, (r, g, b) = self.patches[self.index]
+        screen = self.screen().name() if self.screen() is not None else ""
+        self._log.writerow([f"{time.time():.6f}", f"{time.monotonic():.6f}", screen, self.pattern,
+                            self.index, label, r, g, b])
+        self._log_file.flush()
+
+    def keyPressEvent(self, event):
+        key = event.key()
+        if key in (Qt.Key_Space, Qt.Key_Right, Qt.Key_Down):
+            self.next_patch()
+        elif key in (Qt.Key_Left, Qt.Key_Up):
+            self.previous_patch()
+        elif key == Qt.Key_Tab:
+            self.overview = not self.overview
+            self.update()
+        elif key == Qt.Key_Escape:
+            self.close()
+        else:
+            super().keyPressEvent(event)
+
+    def closeEvent(self, event):
+        self._timer.stop()
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = self._log = None
+        super().closeEvent(event)
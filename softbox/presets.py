@@ -0,0 +1,308 @@
+"""
+Persistent preset library with tags, favorites and search.
+
+Presets live in SQLite, one row each, so saving a preset writes one row
+instead of the whole library. The rows are also kept in memory with two
+indexes: a sorted list of name words and tags for prefix search (bisect),
+and a trigram index over those words that finds the intended word for a
+typo. A search over thousands of presets only touches the entries that
+can match its rarest word.
+"""
+import bisect
+import collections
+import heapq
+import os
+import sqlite3
+import unicodedata
+
+from softbox.kelvin import kelvin_to_rgb
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS presets (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    r INTEGER NOT NULL,
+    g INTEGER NOT NULL,
+    b INTEGER NOT NULL,
+    tags TEXT NOT NULL DEFAULT '',
+    favorite INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+
+def default_presets():
+    """The (name, rgb, tags) presets a new library starts with."""
+    standard = [("White", (255, 255, 255)), ("Red", (255, 0, 0)), ("Green", (0, 255, 0)),
+                ("Blue", (0, 0, 255)), ("Warm", kelvin_to_rgb(2700)), ("Cool", kelvin_to_rgb(9000))]
+    designer = [("Prussian", (0, 49, 83)), ("Hermès", (255, 88, 0)), ("LV Brown", (101, 67, 33)),
+                ("Tiffany", (0, 175, 152)), ("Louboutin", (224, 23, 58))]
+    return [(name, rgb, ("standard",)) for name, rgb in standard] + \
+        [(name, rgb, ("designer",)) for name, rgb in designer]
+
+
+def default_library_path():
+    """``$SOFTBOX_PRESETS``, or ``~/.softbox/presets.sqlite``."""
+    return os.environ.get("SOFTBOX_PRESETS") or os.path.join(os.path.expanduser("~"), ".softbox", "presets.sqlite")
+
+
+def normalize(text):
+    """Lowercase ``text`` and strip accents, so "Hermès" is found as "hermes"."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def trigrams(text):
+    padded = f"  {normalize(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Preset:
+    """A named color with tags."""
+    def __init__(self, id, name, rgb, tags=(), favorite=False):
+        self.id = id
+        self.name = name
+        self.rgb = tuple(rgb)
+        self.tags = tuple(tags)
+        self.favorite = favorite
+
+    def keys(self):
+        """Words prefix search matches against."""
+        return set(normalize(self.name).split()) | {normalize(tag) for tag in self.tags}
+
+    def __repr__(self):
+        return f"Preset({self.id}, {self.name!r}, {self.rgb}, tags={self.tags}, favorite={self.favorite})"
+
+
+class PresetLibrary:
+    """Presets stored in SQLite at ``path`` (``":memory:"`` for a throwaway library).
+
+    A new library starts with the standard and designer presets.
+    """
+    def __init__(self, path=None):
+        path = os.fspath(path) if path is not None else default_library_path()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.execute(SCHEMA)
+        self._presets = {}
+        self._keys = []
+        self._preset_keys = {}
+        self._sort_names = {}
+        self._key_counts = collections.Counter()
+        self._tag_counts = collections.Counter()
+        self._listeners = []
+        self._trigrams = collections.defaultdict(set)
+        rows = self._db.execute("SELECT id, name, r, g, b, tags, favorite FROM presets ORDER BY id").fetchall()
+        for id, name, r, g, b, tags, favorite in rows:
+            self._index(Preset(id, name, (r, g, b), [t for t in tags.split(",") if t], bool(favorite)))
+        if not rows:
+            with self._db:
+                for name, rgb, tags in default_presets():
+                    self._insert(name, rgb, tags, False)
+
+    def close(self):
+        self._db.close()
+
+    def __len__(self):
+        return len(self._presets)
+
+    def __iter__(self):
+        return iter(self._presets.values())
+
+    def add_listener(self, callback):
+        """Call ``callback()`` whenever a preset is added, removed or changed."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _changed(self):
+        for callback in self._listeners:
+            callback()
+
+    def tags(self):
+        """Every tag in use, sorted."""
+        return sorted(self._tag_counts)
+
+    def get(self, preset_id):
+        return self._presets[preset_id]
+
+    def tagged(self, tag):
+        """Presets carrying ``tag``, in the order they were added."""
+        return [preset for preset in self._presets.values() if tag in preset.tags]
+
+    def favorites(self):
+        return [preset for preset in self._presets.values() if preset.favorite]
+
+    def add(self, name, rgb, tags=(), favorite=False):
+        """Save a new preset (one INSERT) and return it."""
+        with self._db:
+            preset = self._insert(name, rgb, tags, favorite)
+        self._changed()
+        return preset
+
+    @staticmethod
+    def _check_rgb(rgb):
+        r, g, b = (int(v) for v in rgb)
+        for value in (r, g, b):
+            if not 0 <= value <= 255:
+                raise ValueError(f"color component out of range: {value}")
+        return r, g, b
+
+    @staticmethod
+    def _check_tags(tags):
+        # Tags are stored comma-separated
+        tags = tuple(tags)
+        if any("," in tag for tag in tags):
+            raise ValueError("tags cannot contain commas")
+        return tags
+
+    def _insert(self, name, rgb, tags, favorite):
+        r, g, b = self._check_rgb(rgb)
+        tags = self._check_tags(tags)
+        cursor = self._db.execute("INSERT INTO presets (name, r, g, b, tags, favorite) VALUES (?, ?, ?, ?, ?, ?)",
+                                  (name, r, g, b, ",".join(tags), int(favorite)))
+        preset = Preset(cursor.lastrowid, name, (r, g, b), tags, favorite)
+        self._index(preset)
+        return preset
+
+    def update(self, preset_id, name=None, rgb=None, tags=None, favorite=None):
+        """Change some fields of a preset (one UPDATE) and return it.
+
+        Raises ValueError, leaving the preset unchanged, for a color
+        component outside 0-255 or a tag containing a comma.
+        """
+        preset = self._presets[preset_id]
+        # Validate before touching the indexes
+        rgb = None if rgb is None else self._check_rgb(rgb)
+        tags = None if tags is None else self._check_tags(tags)
+        self._unindex(preset)
+        if name is not None:
+            preset.name = name
+        if rgb is not None:
+            preset.rgb = rgb
+        if tags is not None:
+            preset.tags = tags
+        if favorite is not None:
+            preset.favorite = bool(favorite)
+        r, g, b = preset.rgb
+        with self._db:
+            self._db.execute("UPDATE presets SET name = ?, r = ?, g = ?, b = ?, tags = ?, favorite = ? WHERE id = ?",
+                             (preset.name, r, g, b, ",".join(preset.tags), int(preset.favorite), preset.id))
+        self._index(preset)
+        self._changed()
+        return preset
+
+    def set_favorite(self, preset_id, favorite=True):
+        return self.update(preset_id, favorite=favorite)
+
+    def remove(self, preset_id):
+        preset = self._presets[preset_id]
+        with self._db:
+            self._db.execute("DELETE FROM presets WHERE id = ?", (preset_id,))
+        self._unindex(preset)
+        self._changed()
+
+    def _index(self, preset):
+        self._presets[preset.id] = preset
+        keys = preset.keys()
+        self._preset_keys[preset.id] = keys
+        self._sort_names[preset.id] = normalize(preset.name)
+        self._tag_counts.update(preset.tags)
+        for key in keys:
+            bisect.insort(self._keys, (key, preset.id))
+            self._key_counts[key] += 1
+            if self._key_counts[key] == 1:
+                for gram in trigrams(key):
+                    self._trigrams[gram].add(key)
+
+    def _unindex(self, preset):
+        del self._presets[preset.id]
+        del self._sort_names[preset.id]
+        self._tag_counts.subtract(preset.tags)
+        self._tag_counts += collections.Counter()  # drop unused tags
+        for key in self._preset_keys.pop(preset.id):
+            index = bisect.bisect_left(self._keys, (key, preset.id))
+            if index < len(self._keys) and self._keys[index] == (key, preset.id):
+                del self._keys[index]
+            self._key_counts[key] -= 1
+            if not self._key_counts[key]:
+                del self._key_counts[key]
+                for gram in trigrams(key):
+                    self._trigrams[gram].discard(key)
+
+    def _range(self, word, prefix=True):
+        """Slice of ``_keys`` holding ``word``, or every key starting with it."""
+        end = word + "\U0010ffff" if prefix else word + "\0"
+        return bisect.bisect_left(self._keys, (word,)), bisect.bisect_left(self._keys, (end,))
+
+    def similar_keys(self, word, fuzzy=0.3):
+        """{key: similarity} of indexed words sharing at least ``fuzzy`` of their trigrams with ``word``."""
+        grams = trigrams(word)
+        counts = collections.Counter()
+        for gram in grams:
+            counts.update(self._trigrams.get(gram, ()))
+        similar = {}
+        for key, shared in counts.items():
+            score = shared / (len(grams) + len(trigrams(key)) - shared)
+            if score >= fuzzy:
+                similar[key] = score
+        return similar
+
+    def search(self, query="", tag=None, favorites_only=False, limit=None, fuzzy=0.3):
+        """Presets matching ``query``, best first.
+
+        Every word of the query must start a word of the name or a tag. A
+        word that starts nothing in the library is taken as a typo and
+        matches the words whose trigrams overlap it by at least ``fuzzy``
+        (Jaccard). Exact matches come before fuzzy ones and favorites
+        before the rest. ``tag`` and ``favorites_only`` filter the results.
+        """
+        words = normalize(query).split()
+        matchers = []
+        for word in words:
+            start, stop = self._range(word)
+            if stop > start or not fuzzy:
+                matchers.append((stop - start, word, None, (start, stop)))
+            else:
+                similar = self.similar_keys(word, fuzzy)
+                ranges = [self._range(key, prefix=False) for key in similar]
+                matchers.append((sum(b - a for a, b in ranges), word, similar, ranges))
+
+        if matchers:
+            # Collect candidates for the rarest word, then check the others on each candidate
+            matchers.sort(key=lambda m: m[0])
+            _, word, similar, ranges = matchers[0]
+            if similar is None:
+                ranges = [ranges]
+            scores = {}
+            for a, b in ranges:
+                for key, preset_id in self._keys[a:b]:
+                    score = 1.0 if similar is None else similar[key]
+                    scores[preset_id] = max(scores.get(preset_id, 0.0), score)
+            for _, word, similar, _ in matchers[1:]:
+                for preset_id in list(scores):
+                    keys = self._preset_keys[preset_id]
+                    if similar is None:
+                        score = 1.0 if any(key.startswith(word) for key in keys) else 0.0
+                    else:
+                        score = max((similar[key] for key in keys if key in similar), default=0.0)
+                    if score:
+                        scores[preset_id] += score
+                    else:
+                        del scores[preset_id]
+        else:
+            scores = dict.fromkeys(self._presets, 0.0)
+
+        results = []
+        for preset_id, score in scores.items():
+            preset = self._presets[preset_id]
+            if (tag is None or tag in preset.tags) and (not favorites_only or preset.favorite):
+                results.append((-score, not preset.favorite, self._sort_names[preset_id], preset_id))
+        if not words:
+            # Keep library order for an empty query
+            results = [(0.0, fav, "", preset_id) for _, fav, _, preset_id in results]
+        ranked = heapq.nsmallest(limit, results) if limit is not None else sorted(results)
+        return [self._presets[item[-1]] for item in ranked]
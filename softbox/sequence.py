@@ -0,0 +1,136 @@
+"""
+Bulk color-sequence playback from NumPy arrays.
+"""
+import numpy as np
+from PySide6.QtCore import QObject, QTimer, QElapsedTimer, Qt, Signal
+
+
+class ColorSequence:
+    """An (N, 3) uint8 color sequence timed by timestamps or a fixed frame rate.
+
+    The frame array is kept as given (it may be a memory-mapped ``.npy``), so
+    playing a sequence never copies it into Python objects.
+    """
+    def __init__(self, frames, timestamps=None, fps=None):
+        frames = np.asarray(frames)
+        if frames.ndim != 2 or frames.shape[1] != 3:
+            raise ValueError(f"frames must have shape (N, 3), got {frames.shape}")
+        if frames.dtype != np.uint8:
+            raise ValueError(f"frames must be uint8, got {frames.dtype}")
+        if len(frames) == 0:
+            raise ValueError("frames must not be empty")
+        if (timestamps is None) == (fps is None):
+            raise ValueError("pass exactly one of timestamps or fps")
+
+        self.frames = frames
+        self.fps = None
+        self.timestamps = None
+
+        if fps is not None:
+            if fps <= 0:
+                raise ValueError("fps must be positive")
+            self.fps = float(fps)
+            self.duration = len(frames) / self.fps
+        else:
+            timestamps = np.asarray(timestamps, dtype=np.float64)
+            if timestamps.shape != (len(frames),):
+                raise ValueError("timestamps must have one entry per frame")
+            if len(timestamps) > 1 and np.any(np.diff(timestamps) < 0):
+                raise ValueError("timestamps must be non-decreasing")
+            self.timestamps = timestamps
+            # The last frame holds for as long as the one before it
+            last_interval = timestamps[-1] - timestamps[-2] if len(timestamps) > 1 else 0.0
+            self.duration = float(timestamps[-1] + last_interval)
+
+    @classmethod
+    def from_npy(cls, path, timestamps=None, fps=None, mmap=True):
+        """Load frames (and optionally timestamps) from ``.npy`` files.
+
+        With ``mmap`` the files are memory-mapped read-only, so sequences
+        larger than RAM are paged in on demand during playback.
+        """
+        mmap_mode = "r" if mmap else None
+        frames = np.load(path, mmap_mode=mmap_mode)
+        if isinstance(timestamps, str) or hasattr(timestamps, "__fspath__"):
+            timestamps = np.load(timestamps, mmap_mode=mmap_mode)
+        return cls(frames, timestamps=timestamps, fps=fps)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def index_at(self, t, loop=False):
+        """Return the frame index shown at time ``t`` (seconds), or None past the end."""
+        if t < 0:
+            return 0
+        if t >= self.duration:
+            if not loop or self.duration <= 0:
+                return None
+            t = t % self.duration
+
+        if self.fps is not None:
+            index = int(t * self.fps)
+        else:
+            index = int(np.searchsorted(self.timestamps, t, side="right")) - 1
+        return min(max(index, 0), len(self.frames) - 1)
+
+    def rgb_at(self, t, loop=False):
+        """Return the (r, g, b) tuple shown at time ``t``, or None past the end."""
+        index = self.index_at(t, loop)
+        if index is None:
+            return None
+        r, g, b = self.frames[index].tolist()
+        return r, g, b
+
+
+class SequencePlayer(QObject):
+    """Plays a color source on a ColorDisplay against a monotonic clock.
+
+    The source is anything with an ``rgb_at(t, loop)`` method, such as a
+    ColorSequence. Frames are looked up by elapsed time, so a slow tick
+    skips frames instead of slowing the sequence down.
+    """
+    finished = Signal()
+
+    def __init__(self, display, source, loop=False, interval=8, parent=None):
+        super().__init__(parent if parent is not None else display)
+        self.display = display
+        self.source = source
+        self.loop = loop
+        self._clock = QElapsedTimer()
+        self._last_rgb = None
+
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self._tick)
+
+    def start(self):
+        """Start playback from the first frame."""
+        self._last_rgb = None
+        self._clock.start()
+        self._timer.start()
+        self._tick()
+
+    def stop(self):
+        """Stop playback, leaving the last frame on screen."""
+        self._timer.stop()
+
+    def isActive(self):
+        return self._timer.isActive()
+
+    def position(self):
+        """Seconds since playback started."""
+        if not self._clock.isValid():
+            return 0.0
+        return self._clock.nsecsElapsed() / 1e9
+
+    def _tick(self):
+        rgb = self.source.rgb_at(self.position(), self.loop)
+        if rgb is None:
+            self.stop()
+            self.finished.emit()
+            return
+
+        if rgb != self._last_rgb:
+            self._last_rgb = rgb
+            self.display.show_rgb(*rgb)
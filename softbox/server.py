@@ -0,0 +1,404 @@
+"""
+Local HTTP/WebSocket remote control for SoftBox.
+
+Only the standard library is used. The server talks to a controller
+(SoftBoxController for the Qt window, SoftBoxAppController for Toga), so
+every command is applied on the GUI thread.
+
+HTTP routes:
+    GET  /state    current state
+    GET  /stats    command latency and controller counters
+    POST /command  one command object or a JSON list of them
+    GET  /ws       WebSocket; send commands, receive results and state pushes
+
+A command looks like ``{"cmd": "set_color", "r": 255, "g": 180, "b": 100}``.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import threading
+import time
+
+from softbox.sequence import ColorSequence
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_BODY = 16 * 1024 * 1024
+# A subscriber whose socket buffer holds more than this skips state pushes
+MAX_PENDING_PUSH = 256 * 1024
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    431: "Request Header Fields Too Large",
+}
+
+
+def _build_cue(command):
+    """Build a ColorSequence from an inline ``run_cue`` command."""
+    import numpy as np
+    frames = np.asarray(command["frames"], dtype=np.int64)
+    if frames.size and (frames.min() < 0 or frames.max() > 255):
+        raise ValueError("cue frames must be in 0-255")
+    return ColorSequence(frames.astype(np.uint8).reshape(-1, 3),
+                         timestamps=command.get("timestamps"),
+                         fps=command.get("fps"))
+
+
+# Command name -> function mapping a decoded command onto a controller call
+COMMANDS = {
+    "set_color": lambda c, cmd: c.set_color(cmd["r"], cmd["g"], cmd["b"]),
+    "start_effect": lambda c, cmd: c.start_effect(cmd["effect"], cmd.get("speed")),
+    "set_speed": lambda c, cmd: c.set_speed(cmd["speed"]),
+    "run_cue": lambda c, cmd: c.run_cue(_build_cue(cmd), cmd.get("loop", False)),
+    "stop": lambda c, cmd: c.stop(),
+}
+
+
+def _ws_frame(opcode, payload):
+    """Encode one unmasked server-to-client WebSocket frame."""
+    header = bytearray([0x80 | opcode])
+    length = len(payload)
+    if length < 126:
+        header.append(length)
+    elif length < 1 << 16:
+        header.append(126)
+        header += length.to_bytes(2, "big")
+    else:
+        header.append(127)
+        header += length.to_bytes(8, "big")
+    return bytes(header) + payload
+
+
+def _unmask(payload, mask):
+    """XOR a client payload with its 4-byte mask in one big-int operation."""
+    n = len(payload)
+    if n == 0:
+        return payload
+    key = (mask * (n // 4 + 1))[:n]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(key, "big")).to_bytes(n, "big")
+
+
+class RemoteServer:
+    """Asyncio HTTP/WebSocket server forwarding commands to a controller."""
+    def __init__(self, controller, host="127.0.0.1", port=8765):
+        self.controller = controller
+        self.host = host
+        self.port = port
+        self._server = None
+        self._loop = None
+        self._thread = None
+        self._subscribers = set()
+        self._pending_state = None
+        self._pending_lock = threading.Lock()
+        self._latency = {}  # command -> [count, total seconds, max seconds]
+        self._requests = 0
+
+        controller.add_state_listener(self._on_state_changed)
+
+    # Lifecycle
+
+    async def start(self):
+        """Start serving on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        # Pick up the real port when 0 was requested
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        """Stop accepting connections and close every WebSocket."""
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._subscribers):
+                writer.close()
+            self._subscribers.clear()
+            await self._server.wait_closed()
+            self._server = None
+
+    def attach(self, loop):
+        """Start on another loop, such as a Toga app's ``app.loop``."""
+        return asyncio.run_coroutine_threadsafe(self.start(), loop)
+
+    def start_in_thread(self, timeout=5):
+        """Run the server on its own loop in a daemon thread (for Qt apps)."""
+        started = threading.Event()
+        errors = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.start())
+            except Exception as exc:
+                errors.append(exc)
+                started.set()
+                return
+            started.set()
+            loop.run_forever()
+            loop.run_until_complete(self.stop())
+            loop.close()
+
+        self._thread = threading.Thread(target=run, name="SoftBoxServer", daemon=True)
+        self._thread.start()
+        if not started.wait(timeout):
+            raise TimeoutError("remote server did not start in time")
+        if errors:
+            raise errors[0]
+        return self
+
+    def stop_thread(self):
+        """Stop a server started with start_in_thread()."""
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+
+    # Commands
+
+    async def execute(self, payload):
+        """Run one command or a batch and return a result per command.
+
+        A batch is submitted in one go, so the controller applies it in a
+        single drain.
+        """
+        commands = payload if isinstance(payload, list) else [payload]
+        received = time.perf_counter()
+        submitted = []
+        for command in commands:
+            try:
+                name = command["cmd"]
+                handler = COMMANDS[name]
+            except (TypeError, KeyError):
+                submitted.append((None, None, "unknown or missing 'cmd'"))
+                continue
+            try:
+                submitted.append((name, handler(self.controller, command), None))
+            except (KeyError, TypeError, ValueError) as exc:
+                submitted.append((name, None, f"bad arguments: {exc}"))
+
+        results = []
+        for name, future, error in submitted:
+            if future is not None:
+                try:
+                    await asyncio.wrap_future(future)
+                except Exception as exc:
+                    error = str(exc)
+            latency = time.perf_counter() - received
+            if name is not None and error is None:
+                self._record_latency(name, latency)
+            result = {"cmd": name, "ok": error is None, "latency_ms": round(latency * 1000, 3)}
+            if error is not None:
+                result["error"] = error
+            results.append(result)
+        return results
+
+    def _record_latency(self, name, latency):
+        entry = self._latency.setdefault(name, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += latency
+        entry[2] = max(entry[2], latency)
+
+    def stats(self):
+        """Per-command latency in ms plus the controller's own counters."""
+        latency = {
+            name: {
+                "count": count,
+                "mean_ms": round(1000 * total / count, 3),
+                "max_ms": round(1000 * worst, 3),
+            }
+            for name, (count, total, worst) in self._latency.items()
+        }
+        return {
+            "requests": self._requests,
+            "subscribers": len(self._subscribers),
+            "latency": latency,
+            "controller": self.controller.stats(),
+        }
+
+    # State pushes
+
+    def _on_state_changed(self, state):
+        """Called on the GUI thread; hand the state over to the server loop."""
+        if self._loop is None or self._loop.is_closed():
+            return
+        # Coalesce: only the newest state is sent if several arrive at once
+        with self._pending_lock:
+            first = self._pending_state is None
+            self._pending_state = state
+        if first:
+            self._loop.call_soon_threadsafe(self._publish)
+
+    def _publish(self):
+        with self._pending_lock:
+            state, self._pending_state = self._pending_state, None
+        if state is None or not self._subscribers:
+            return
+        # Encode once and share the frame between all subscribers
+        frame = _ws_frame(0x1, json.dumps({"type": "state", "state": state}).encode())
+        for writer in list(self._subscribers):
+            if writer.is_closing():
+                self._subscribers.discard(writer)
+            elif writer.transport.get_write_buffer_size() < MAX_PENDING_PUSH:
+                writer.write(frame)
+
+    # HTTP
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                self._requests += 1
+                if path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                    await self._websocket(reader, writer, headers)
+                    break
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._route(writer, method, path, body, keep_alive)
+                if not keep_alive:
+                    break
+        except asyncio.LimitOverrunError:
+            # Request line or headers longer than the stream limit (64 KB)
+            try:
+                await self._respond(writer, 431, {"error": "request header fields too large"}, False)
+            except ConnectionError:
+                pass
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self._subscribers.discard(writer)
+            writer.close()
+
+    async def _read_request(self, reader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        lines = head.decode("latin-1").split("\r\n")
+        method, path, _ = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY:
+            raise ValueError("request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method, path.split("?", 1)[0], headers, body
+
+    async def _route(self, writer, method, path, body, keep_alive):
+        if path == "/state" and method == "GET":
+            await self._respond(writer, 200, self.controller.state(), keep_alive)
+        elif path == "/stats" and method == "GET":
+            await self._respond(writer, 200, self.stats(), keep_alive)
+        elif path == "/command":
+            if method != "POST":
+                await self._respond(writer, 405, {"error": "use POST"}, keep_alive)
+                return
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                await self._respond(writer, 400, {"error": "invalid JSON"}, keep_alive)
+                return
+            results = await self.execute(payload)
+            await self._respond(writer, 200, {"results": results, "state": self.controller.state()},
+                                keep_alive)
+        else:
+            await self._respond(writer, 404, {"error": "not found"}, keep_alive)
+
+    async def _respond(self, writer, status, data, keep_alive=True):
+        body = json.dumps(data).encode()
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode() + body)
+        await writer.drain()
+
+    # WebSocket
+
+    async def _websocket(self, reader, writer, headers):
+        key = headers.get("sec-websocket-key")
+        if not key:
+            await self._respond(writer, 400, {"error": "missing Sec-WebSocket-Key"}, False)
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        writer.write((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode())
+        # New subscribers get the current state straight away
+        writer.write(_ws_frame(0x1, json.dumps({"type": "state", "state": self.controller.state()}).encode()))
+        await writer.drain()
+        self._subscribers.add(writer)
+
+        while True:
+            message = await self._read_message(reader, writer)
+            if message is None:
+                break
+            try:
+                payload = json.loads(message)
+            except ValueError:
+                reply = {"type": "error", "error": "invalid JSON"}
+            else:
+                request_id = payload.pop("id", None) if isinstance(payload, dict) else None
+                if isinstance(payload, dict) and "batch" in payload:
+                    payload = payload["batch"]
+                reply = {"type": "result", "id": request_id, "results": await self.execute(payload)}
+            writer.write(_ws_frame(0x1, json.dumps(reply).encode()))
+            await writer.drain()
+
+        self._subscribers.discard(writer)
+        if not writer.is_closing():
+            writer.write(_ws_frame(0x8, b""))
+
+    async def _read_message(self, reader, writer):
+        """Read one complete text message, answering pings on the way.
+
+        A message whose fragments add up to more than MAX_BODY closes the
+        connection with status 1009 (message too big) and returns None.
+        """
+        fragments = []
+        total = 0
+        while True:
+            first, second = await reader.readexactly(2)
+            fin, opcode = first & 0x80, first & 0x0F
+            length = second & 0x7F
+            if length == 126:
+                length = int.from_bytes(await reader.readexactly(2), "big")
+            elif length == 127:
+                length = int.from_bytes(await reader.readexactly(8), "big")
+            if opcode < 0x8:
+                # Data frames add up to one message; check before buffering
+                total += length
+                if total > MAX_BODY:
+                    writer.write(_ws_frame(0x8, (1009).to_bytes(2, "big") + b"message too big"))
+                    await writer.drain()
+                    writer.close()
+                    return None
+            elif length > 125:
+                raise ValueError("WebSocket control frame too large")
+            mask = await reader.readexactly(4) if second & 0x80 else None
+            payload = await reader.readexactly(length)
+            if mask is not None:
+                payload = _unmask(payload, mask)
+
+            if opcode == 0x8:
+                return None
+            if opcode == 0x9:
+                writer.write(_ws_frame(0xA, payload))
+                continue
+            if opcode == 0xA:
+                continue
+            fragments.append(payload)
+            if fin:
+                return b"".join(fragments).decode("utf-8")
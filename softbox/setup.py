@@ -20,6 +20,7 @@ setup(name='softbox',
       url='http://blog.cycleuser.org',
       packages=['softbox'],
       install_requires=[ 
+                        "numpy",
                         "pandas",
                         "xlrd",
                         "matplotlib",
@@ -0,0 +1,115 @@
+"""
+Procedural light shapes (falloff masks) and their pixmap cache.
+
+A shape is a grayscale mask: 255 where the light is full, 0 where it is
+dark. The display fills with the frame color and multiplies the cached
+mask over it, so effects that only change the color never re-render the
+mask.
+"""
+import collections
+
+import numpy as np
+from PySide6.QtGui import QImage, QPixmap
+
+SHAPE_NAMES = ["Flat", "Radial", "Linear", "Ring", "Gaussian"]
+
+# Parameters each shape understands, with their defaults
+SHAPE_PARAMS = {
+    "Flat": {},
+    "Radial": {"radius": 1.0},
+    "Linear": {"angle": 90.0},
+    "Ring": {"radius": 0.7, "thickness": 0.15, "softness": 0.1},
+    "Gaussian": {"sigma": 0.5},
+}
+
+
+def shape_mask(shape, width, height, floor=0.0, **params):
+    """Render ``shape`` as a (height, width) float32 mask in 0-1.
+
+    Distances are measured from the center in units of half the shorter
+    side, so circles stay round in any aspect ratio. ``floor`` lifts the
+    dark parts, e.g. 0.2 keeps a fifth of the light at the edges.
+    """
+    if shape not in SHAPE_PARAMS:
+        raise ValueError(f"unknown shape: {shape}")
+    unknown = set(params) - set(SHAPE_PARAMS[shape])
+    if unknown:
+        raise ValueError(f"unknown parameters for {shape}: {', '.join(sorted(unknown))}")
+    options = dict(SHAPE_PARAMS[shape], **params)
+
+    scale = min(width, height) / 2.0
+    # Pixel centers as broadcastable row and column vectors
+    y = ((np.arange(height, dtype=np.float32) + 0.5) - height / 2.0)[:, None] / scale
+    x = ((np.arange(width, dtype=np.float32) + 0.5) - width / 2.0)[None, :] / scale
+
+    if shape == "Flat":
+        mask = np.ones((height, width), dtype=np.float32)
+    elif shape == "Radial":
+        mask = 1.0 - np.sqrt(x * x + y * y) / options["radius"]
+    elif shape == "Linear":
+        # Gradient from dark to full along ``angle`` degrees (90 = bottom to top)
+        angle = np.radians(options["angle"])
+        along = x * np.cos(angle) - y * np.sin(angle)
+        extent = (abs(np.cos(angle)) * width + abs(np.sin(angle)) * height) / (2.0 * scale)
+        mask = (along / extent + 1.0) / 2.0
+    elif shape == "Ring":
+        distance = np.abs(np.sqrt(x * x + y * y) - options["radius"])
+        mask = 1.0 - (distance - options["thickness"] / 2.0) / max(options["softness"], 1e-6)
+    else:
+        sigma = options["sigma"]
+        mask = np.exp(-(x * x + y * y) / (2.0 * sigma * sigma))
+
+    mask = np.clip(mask, 0.0, 1.0)
+    if floor:
+        mask = floor + (1.0 - floor) * mask
+    return np.broadcast_to(mask, (height, width)).astype(np.float32)
+
+
+def mask_image(mask):
+    """Wrap a 0-1 mask as a Grayscale8 QImage sharing the array's memory.
+
+    The array is kept on the image so the buffer outlives it.
+    """
+    pixels = np.ascontiguousarray(np.rint(mask * 255.0), dtype=np.uint8)
+    height, width = pixels.shape
+    image = QImage(pixels.data, width, height, pixels.strides[0], QImage.Format_Grayscale8)
+    image._pixels = pixels
+    return image
+
+
+class ShapeCache:
+    """LRU cache of rendered shape pixmaps.
+
+    Keys are (shape, params, width, height, device pixel ratio), so a
+    resize or a move to a HiDPI screen renders once and every later frame
+    reuses the pixmap.
+    """
+    def __init__(self, capacity=16):
+        self.capacity = capacity
+        self._pixmaps = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, shape, params, width, height, ratio=1.0):
+        """Return the pixmap for ``shape`` at ``width`` x ``height`` logical pixels."""
+        key = (shape, tuple(sorted(params.items())), width, height, ratio)
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+            self.hits += 1
+            return pixmap
+
+        self.misses += 1
+        mask = shape_mask(shape, max(1, round(width * ratio)), max(1, round(height * ratio)), **params)
+        pixmap = QPixmap.fromImage(mask_image(mask))
+        pixmap.setDevicePixelRatio(ratio)
+        self._pixmaps[key] = pixmap
+        if len(self._pixmaps) > self.capacity:
+            self._pixmaps.popitem(last=False)
+        return pixmap
+
+    def clear(self):
+        self._pixmaps.clear()
+
+    def stats(self):
+        return {"entries": len(self._pixmaps), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,195 @@
+"""
+Clock synchronization between SoftBox instances on a LAN.
+
+One instance runs a ClockLeader; the others run a SyncClock that pings the
+leader a few times a second and estimates the offset between the two
+clocks NTP-style. Each ping measures
+
+    offset = ((t1 - t0) + (t2 - t3)) / 2
+    delay  = (t3 - t0) - (t2 - t1)
+
+where t0/t3 are the follower's send/receive times and t1/t2 the leader's.
+Of the recent samples the one with the smallest round-trip delay is the
+least disturbed by queueing, so its offset is used. Effects sampled from
+``now()`` then agree on their phase across devices.
+
+This module only needs the standard library.
+"""
+import socket
+import struct
+import threading
+import time
+
+SYNC_PORT = 47800
+MAGIC = b"SBSY"
+# magic, kind, sequence, t0, t1, t2
+PACKET = struct.Struct(">4sBIddd")
+PING, PONG = 1, 2
+
+
+class ClockLeader:
+    """Answers sync pings with timestamps from its own clock."""
+    def __init__(self, host="0.0.0.0", port=SYNC_PORT, local_clock=time.monotonic):
+        self.local_clock = local_clock
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        # Wake up regularly so stop() is noticed
+        self._sock.settimeout(0.5)
+        self.port = self._sock.getsockname()[1]
+        self._running = False
+        self._thread = None
+        self.requests = 0
+
+    def now(self):
+        """The shared time in seconds; the leader's clock is the reference."""
+        return self.local_clock()
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, name="SoftBoxClockLeader", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(1)
+            self._thread = None
+        self._sock.close()
+
+    def stats(self):
+        return {"role": "leader", "requests": self.requests}
+
+    def _serve(self):
+        while self._running:
+            try:
+                data, address = self._sock.recvfrom(64)
+                t1 = self.local_clock()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            try:
+                magic, kind, sequence, t0, _, _ = PACKET.unpack(data)
+            except struct.error:
+                continue
+            if magic != MAGIC or kind != PING:
+                continue
+            self.requests += 1
+            reply = PACKET.pack(MAGIC, PONG, sequence, t0, t1, self.local_clock())
+            try:
+                self._sock.sendto(reply, address)
+            except OSError:
+                pass
+
+
+class SyncClock:
+    """Follower clock that tracks a ClockLeader over UDP.
+
+    With ``host=None`` the leader is found by broadcasting pings, and the
+    first instance to answer is followed from then on.
+    """
+    def __init__(self, host=None, port=SYNC_PORT, interval=0.5, window=8,
+                 local_clock=time.monotonic):
+        self.local_clock = local_clock
+        self.interval = interval
+        self.window = window
+        self._leader = (socket.gethostbyname(host), port) if host else None
+        self._broadcast = ("255.255.255.255", port)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        self._sock.bind(("0.0.0.0", 0))
+        self._sock.settimeout(interval)
+        self._samples = []  # (delay, offset), newest last
+        self._offset = 0.0
+        self._delay = None
+        self._sequence = 0
+        self._running = False
+        self._thread = None
+        self.sent = 0
+        self.received = 0
+
+    def now(self):
+        """The leader's time in seconds, as estimated on this device."""
+        return self.local_clock() + self._offset
+
+    def is_synced(self):
+        return self._delay is not None
+
+    def offset(self):
+        """Current estimate of leader clock minus local clock, in seconds."""
+        return self._offset
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="SoftBoxSyncClock", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(self.interval * 2)
+            self._thread = None
+        self._sock.close()
+
+    def stats(self):
+        return {
+            "role": "follower",
+            "synced": self.is_synced(),
+            "offset_ms": self._offset * 1000,
+            "delay_ms": None if self._delay is None else self._delay * 1000,
+            "sent": self.sent,
+            "received": self.received,
+        }
+
+    def _run(self):
+        while self._running:
+            started = self.local_clock()
+            self._ping()
+            # Wait for replies until the next ping is due
+            while self._running:
+                remaining = self.interval - (self.local_clock() - started)
+                if remaining <= 0:
+                    break
+                self._sock.settimeout(remaining)
+                try:
+                    data, address = self._sock.recvfrom(64)
+                except socket.timeout:
+                    break
+                except OSError:
+                    return
+                self._receive(data, address, self.local_clock())
+
+    def _ping(self):
+        self._sequence = (self._sequence + 1) & 0xFFFFFFFF
+        packet = PACKET.pack(MAGIC, PING, self._sequence, self.local_clock(), 0.0, 0.0)
+        try:
+            self._sock.sendto(packet, self._leader or self._broadcast)
+            self.sent += 1
+        except OSError:
+            pass
+
+    def _receive(self, data, address, t3):
+        try:
+            magic, kind, sequence, t0, t1, t2 = PACKET.unpack(data)
+        except struct.error:
+            return
+        if magic != MAGIC or kind != PONG or sequence != self._sequence:
+            # Late replies to older pings are skewed by their wait, skip them
+            return
+        if self._leader is None:
+            self._leader = address
+        elif address[0] != self._leader[0]:
+            return
+        self.received += 1
+        self.add_sample(t0, t1, t2, t3)
+
+    def add_sample(self, t0, t1, t2, t3):
+        """Add one ping exchange and update the offset estimate."""
+        offset = ((t1 - t0) + (t2 - t3)) / 2
+        delay = (t3 - t0) - (t2 - t1)
+        self._samples.append((delay, offset))
+        del self._samples[:-self.window]
+        self._delay, self._offset = min(self._samples)
@@ -0,0 +1,286 @@
+"""
+Ambient color from local video: Y4M files or directories of images.
+
+A worker thread decodes frames one at a time into a reused buffer,
+reduces each to a single color from a strided subsample, and hands the
+colors to the player through a bounded queue. Memory stays the same for
+a ten-second clip and a two-hour film.
+"""
+import os
+import queue
+import threading
+
+import numpy as np
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QImage
+
+from softbox.images import RGB_CHANNELS, _image_files
+from softbox.sequence import SequencePlayer
+
+# Y4M chroma tags -> (horizontal, vertical) subsampling, None for grayscale
+Y4M_CHROMA = {
+    "420": (2, 2), "420jpeg": (2, 2), "420paldv": (2, 2), "420mpeg2": (2, 2),
+    "422": (2, 1), "444": (1, 1), "mono": None,
+}
+
+
+def _ceil_div(a, b):
+    return -(-a // b)
+
+
+class Y4MReader:
+    """Reads 8-bit YUV4MPEG2 frames into planes that are reused per frame."""
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        header = self._file.readline()
+        if not header.startswith(b"YUV4MPEG2"):
+            self._file.close()
+            raise ValueError(f"not a Y4M file: {path}")
+        self.width = self.height = None
+        self.fps = 25.0
+        self.chroma = "420jpeg"
+        self.full_range = False
+        for token in header.decode("ascii").split()[1:]:
+            tag, value = token[0], token[1:]
+            if tag == "W":
+                self.width = int(value)
+            elif tag == "H":
+                self.height = int(value)
+            elif tag == "F":
+                num, den = value.split(":")
+                self.fps = int(num) / int(den)
+            elif tag == "C":
+                self.chroma = value
+            elif token == "XCOLORRANGE=FULL":
+                self.full_range = True
+        if not self.width or not self.height:
+            self._file.close()
+            raise ValueError("Y4M header has no frame size")
+        if self.chroma not in Y4M_CHROMA:
+            self._file.close()
+            raise ValueError(f"unsupported Y4M chroma (only 8-bit is supported): {self.chroma}")
+        # JPEG-style 4:2:0 is full range by convention
+        self.full_range = self.full_range or self.chroma == "420jpeg"
+        self._data_start = self._file.tell()
+
+        self.subsampling = Y4M_CHROMA[self.chroma]
+        sizes = [(self.height, self.width)]
+        if self.subsampling is not None:
+            sx, sy = self.subsampling
+            chroma_shape = (_ceil_div(self.height, sy), _ceil_div(self.width, sx))
+            sizes += [chroma_shape, chroma_shape]
+        self._buffer = bytearray(sum(h * w for h, w in sizes))
+        view = np.frombuffer(self._buffer, dtype=np.uint8)
+        self.planes = []
+        offset = 0
+        for h, w in sizes:
+            self.planes.append(view[offset:offset + h * w].reshape(h, w))
+            offset += h * w
+
+    def rewind(self):
+        self._file.seek(self._data_start)
+
+    def read(self):
+        """Read the next frame into ``planes``; returns False at the end."""
+        line = self._file.readline()
+        if not line:
+            return False
+        if not line.startswith(b"FRAME"):
+            raise ValueError("corrupt Y4M stream")
+        if self._file.readinto(self._buffer) != len(self._buffer):
+            return False
+        return True
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def close(self):
+        self._file.close()
+
+
+def yuv_to_rgb(y, u, v, full_range=False):
+    """BT.601 YUV to RGB for float arrays (or scalars); results are not clipped."""
+    if full_range:
+        y = y * 1.0
+        u, v = u - 128.0, v - 128.0
+        return y + 1.402 * v, y - 0.344136 * u - 0.714136 * v, y + 1.772 * u
+    y = 1.164383 * (y - 16.0)
+    u, v = u - 128.0, v - 128.0
+    return y + 1.596027 * v, y - 0.391762 * u - 0.812968 * v, y + 2.017232 * u
+
+
+def dominant_rgb(pixels):
+    """Mean color of the most populated 16-level bin of an (N, 3) array."""
+    pixels = np.clip(pixels, 0, 255).astype(np.uint8)
+    bins = ((pixels[:, 0] >> 4).astype(np.int32) << 8) | ((pixels[:, 1] >> 4) << 4) | (pixels[:, 2] >> 4)
+    winner = np.bincount(bins, minlength=4096).argmax()
+    return pixels[bins == winner].mean(axis=0)
+
+
+def reduce_yuv(planes, subsampling, full_range=False, mode="mean", step=8):
+    """Reduce Y4M planes to one (r, g, b) from every ``step``-th pixel."""
+    luma = planes[0][::step, ::step].astype(np.float32)
+    if subsampling is None:
+        chroma = [np.float32(128.0), np.float32(128.0)]
+    else:
+        sx, sy = subsampling
+        chroma = [plane[::max(1, step // sy), ::max(1, step // sx)].astype(np.float32) for plane in planes[1:]]
+        # Subsampled planes can come out one row or column larger
+        rows = min(luma.shape[0], chroma[0].shape[0])
+        cols = min(luma.shape[1], chroma[0].shape[1])
+        luma = luma[:rows, :cols]
+        chroma = [plane[:rows, :cols] for plane in chroma]
+
+    if mode == "mean":
+        # The conversion is linear, so the mean converts like one pixel
+        rgb = yuv_to_rgb(luma.mean(), chroma[0].mean(), chroma[1].mean(), full_range)
+    else:
+        r, g, b = yuv_to_rgb(luma, chroma[0], chroma[1], full_range)
+        rgb = dominant_rgb(np.stack([np.broadcast_to(c, luma.shape).ravel() for c in (r, g, b)], axis=1))
+    r, g, b = (int(round(min(max(float(c), 0.0), 255.0))) for c in rgb)
+    return r, g, b
+
+
+def reduce_image(image, mode="mean", step=8):
+    """Reduce a QImage to one (r, g, b) after a fast downscale by ``step``."""
+    small = image.scaled(max(1, image.width() // step), max(1, image.height() // step),
+                         Qt.IgnoreAspectRatio, Qt.FastTransformation)
+    small = small.convertToFormat(QImage.Format_RGB32)
+    bits = np.frombuffer(small.constBits(), dtype=np.uint8).reshape(small.height(), small.bytesPerLine())
+    pixels = bits[:, :small.width() * 4].reshape(-1, 4)[:, RGB_CHANNELS].astype(np.float32)
+    rgb = pixels.mean(axis=0) if mode == "mean" else dominant_rgb(pixels)
+    r, g, b = (int(round(c)) for c in rgb)
+    return r, g, b
+
+
+class VideoColorSource:
+    """Streams a video's per-frame color for a SequencePlayer.
+
+    ``path`` is a ``.y4m`` file or a directory of images (played at
+    ``fps``). ``mode`` is ``"mean"`` or ``"dominant"``. At most ``buffer``
+    colors are decoded ahead of playback; the worker waits when the queue
+    is full, and frames the player has already passed are dropped.
+    ``rgb_at`` never waits for the worker, so it is safe in a timer slot.
+    """
+    def __init__(self, path, mode="mean", step=8, fps=24.0, buffer=32):
+        if mode not in ("mean", "dominant"):
+            raise ValueError("mode must be 'mean' or 'dominant'")
+        path = os.fspath(path)
+        self.path = path
+        self.mode = mode
+        self.step = step
+        self.buffer = buffer
+        if os.path.isdir(path):
+            self._reader = None
+            self._files = _image_files(path)
+            self.fps = float(fps)
+        else:
+            self._reader = Y4MReader(path)
+            self._files = None
+            self.fps = self._reader.fps
+        self._queue = None
+        self._thread = None
+        self._running = False
+        self._loop = False
+        self._index = -1
+        self._rgb = None
+        self._ended = False
+        self.decoded = 0
+        self.dropped = 0
+
+    def start(self, loop=False):
+        """Start (or restart) decoding from the first frame."""
+        self._stop_worker()
+        if self._reader is not None and self._reader.closed:
+            self._reader = Y4MReader(self.path)
+        self._loop = loop
+        self._queue = queue.Queue(self.buffer)
+        self._index = -1
+        self._rgb = None
+        self._ended = False
+        self._running = True
+        self._thread = threading.Thread(target=self._decode, name="SoftBoxVideo", daemon=True)
+        self._thread.start()
+
+    def _stop_worker(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(2)
+            self._thread = None
+
+    def close(self):
+        """Stop the decode worker and close the file; ``start`` reopens it."""
+        self._stop_worker()
+        if self._reader is not None:
+            self._reader.close()
+
+    def rgb_at(self, t, loop=False):
+        """The color shown at ``t`` seconds, None at the end.
+
+        Until the first frame is decoded this is black, and while decoding
+        lags it is the last decoded color.
+        """
+        wanted = int(max(t, 0.0) * self.fps)
+        if self._thread is None or loop != self._loop or wanted < self._index:
+            self.start(loop)
+        while self._index < wanted:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._ended = True
+                break
+            if self._rgb is not None and item[0] < wanted:
+                self.dropped += 1
+            self._index, self._rgb = item
+        if self._ended and self._index < wanted and self._queue.empty():
+            return None
+        return (0, 0, 0) if self._rgb is None else self._rgb
+
+    def _frames(self):
+        """Yield each frame's color once through the clip."""
+        if self._reader is not None:
+            reader = self._reader
+            reader.rewind()
+            while self._running and reader.read():
+                yield reduce_yuv(reader.planes, reader.subsampling, reader.full_range, self.mode, self.step)
+        else:
+            for name in self._files:
+                if not self._running:
+                    return
+                image = QImage(name)
+                if not image.isNull():
+                    yield reduce_image(image, self.mode, self.step)
+
+    def _decode(self):
+        index = 0
+        while self._running:
+            produced = False
+            for rgb in self._frames():
+                produced = True
+                self.decoded += 1
+                if not self._put((index, rgb)):
+                    return
+                index += 1
+            if not self._loop or not produced:
+                break
+        self._put(None)
+
+    def _put(self, item):
+        # Wake up regularly so close() is noticed while the queue is full
+        while self._running:
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+
+class VideoPlayer(SequencePlayer):
+    """Plays a VideoColorSource and stops its worker with playback."""
+    def stop(self):
+        super().stop()
+        self.source.close()
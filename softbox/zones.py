@@ -0,0 +1,64 @@
+"""
+Independently controlled zones inside one ColorDisplay.
+"""
+from PySide6.QtCore import QRect
+from PySide6.QtGui import QColor
+
+from softbox.effects import EffectEngine
+
+
+class Zone:
+    """A rectangle of the display with its own color and effect.
+
+    ``rect`` is ``(x, y, width, height)`` as fractions of the display, so
+    ``(0, 0, 0.5, 1)`` is the left half whatever the window size.
+    """
+    def __init__(self, name, rect, color=None):
+        self.name = name
+        self.rect = tuple(float(v) for v in rect)
+        self.color = QColor(255, 255, 255) if color is None else QColor(color)
+        self.engine = EffectEngine()
+        self.engine.show((self.color.red(), self.color.green(), self.color.blue()))
+        self.presented = None
+        self.updates = 0
+        self.flash_guard = None  # set by the display, see ColorDisplay.set_flash_guard
+        self.display = None  # the ColorDisplay, whose music, palette, seed and luminance effects use
+
+    def set_color(self, color):
+        """Set the zone's static color (also the base color of its effects)."""
+        self.color = QColor(color)
+        self.engine.show((self.color.red(), self.color.green(), self.color.blue()))
+
+    def start_effect(self, effect_name, speed=500):
+        """Start an effect in this zone; "None" goes back to the static color.
+
+        Effects use the display's music, palette, flicker seed and
+        luminance. Raises ValueError for "Music" or "Palette" while the
+        display has no track or palette loaded.
+        """
+        if effect_name == "None":
+            self.engine.stop()
+            return
+        display = self.display
+        music = None if display is None else display.music
+        palette = None if display is None else display.palette
+        if effect_name == "Music" and music is None:
+            raise ValueError(f"zone {self.name!r}: load music into the display before starting Music")
+        if effect_name == "Palette" and not palette:
+            raise ValueError(f"zone {self.name!r}: set a palette on the display before starting Palette")
+        seed = 0 if display is None else display.seed
+        luminance = None if display is None else display.luminance
+        self.engine.start(effect_name, (self.color.red(), self.color.green(), self.color.blue()), speed,
+                          music, palette, seed, luminance)
+
+    def set_speed(self, speed):
+        self.engine.set_speed(speed)
+
+    def pixel_rect(self, bounds):
+        """The zone's rectangle in widget pixels for a widget rect ``bounds``."""
+        x, y, w, h = self.rect
+        left = bounds.x() + round(x * bounds.width())
+        top = bounds.y() + round(y * bounds.height())
+        right = bounds.x() + round((x + w) * bounds.width())
+        bottom = bounds.y() + round((y + h) * bounds.height())
+        return QRect(left, top, right - left, bottom - top)
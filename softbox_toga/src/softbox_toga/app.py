@@ -9,6 +9,8 @@ import random
 import threading
 import time
 
+from softbox_toga.sync import SYNC_PORT, ClockLeader, SyncClock
+
 
 class ColorSlider(toga.Box):
     """A compact RGB slider with label and input."""
@@ -150,6 +152,10 @@ class ColorDisplay(toga.Box):
         self._effect_step = 0
         self._effect_running = False
         self._effect_speed = 500
+        self._effect_token = None
+        self._effect_epoch = 0.0
+        self._clock = time.monotonic
+        self._shared_clock = False
         
         # Apply initial background
         self.style.background_color = self.color
@@ -162,9 +168,21 @@ class ColorDisplay(toga.Box):
         if self._current_effect == "None":
             self.style.background_color = color
 
+    def set_clock(self, clock, shared=True):
+        """Sample effects from ``clock``, a callable returning seconds.
+        
+        With a shared clock the effect step comes from the clock itself
+        instead of from when the effect started, so every display sharing
+        that clock shows the same frame.
+        """
+        self._clock = clock
+        self._shared_clock = shared
+        self._effect_epoch = 0.0 if shared else clock()
+    
     def _stop_effect(self):
         """Stop any running effect."""
         self._effect_running = False
+        self._effect_token = None
         self._current_effect = "None"
         self.style.background_color = self.color
     
@@ -209,7 +227,10 @@ class ColorDisplay(toga.Box):
         
         # Start the effect in a background thread
         self._effect_running = True
-        self._effect_thread = threading.Thread(target=self._run_effect)
+        self._effect_epoch = 0.0 if self._shared_clock else self._clock()
+        token = object()
+        self._effect_token = token
+        self._effect_thread = threading.Thread(target=self._run_effect, args=(token,))
         self._effect_thread.daemon = True
         self._effect_thread.start()
     
@@ -217,11 +238,19 @@ class ColorDisplay(toga.Box):
         """Set the speed of the current effect."""
         self._effect_speed = speed
     
-    def _run_effect(self):
-        """Run the effect in a background thread."""
-        while self._effect_running:
-            self._update_effect()
-            time.sleep(self._effect_speed / 1000)
+    def _run_effect(self, token):
+        """Run the effect in a background thread, one frame per step."""
+        last_step = None
+        while self._effect_token is token:
+            # The step comes from the clock, so devices sharing a clock stay in phase
+            t_ms = (self._clock() - self._effect_epoch) * 1000.0
+            step = int(t_ms // self._effect_speed)
+            if step != last_step:
+                last_step = step
+                self._effect_step = step
+                self._update_effect()
+            # Sleep until the next step, at most 50 ms so speed changes apply quickly
+            time.sleep(min((step + 1) * self._effect_speed - t_ms, 50) / 1000)
     
     def _update_effect(self):
         """Update the visual state of the current effect."""
@@ -364,12 +393,28 @@ class SoftBoxApp(toga.App):
         # Speed control
         self.speed_slider = SpeedSlider("Speed", 50, 1000, 500, on_change=self.update_speed)
         
+        # Clock sync with other tablets on the LAN
+        sync_row = toga.Box(style=Pack(direction=ROW, padding=(2, 0)))
+        sync_label = toga.Label(
+            "Sync:", 
+            style=Pack(width=35, font_size=8)
+        )
+        self.sync_combo = toga.Selection(
+            items=["Off", "Leader", "Follower"],
+            on_change=self.change_sync,
+            style=Pack(flex=1, height=20)
+        )
+        sync_row.add(sync_label)
+        sync_row.add(self.sync_combo)
+        self.sync_clock = None
+        
         # Add sliders and effect controls to the vertical layout
         controls_box.add(self.slider_r)
         controls_box.add(self.slider_g)
         controls_box.add(self.slider_b)
         controls_box.add(effect_row)
         controls_box.add(self.speed_slider)
+        controls_box.add(sync_row)
         
         # Create vertical button list
         buttons_box = toga.Box(style=Pack(direction=COLUMN, padding=(2, 0, 0, 0)))
@@ -505,6 +550,33 @@ class SoftBoxApp(toga.App):
         self.update_color()
 
 
+    def change_sync(self, widget):
+        """Switch between standalone, clock leader and follower."""
+        if widget.value == "Leader":
+            self.start_sync(leader=True)
+        elif widget.value == "Follower":
+            self.start_sync(leader=False)
+        else:
+            self.stop_sync()
+    
+    def start_sync(self, leader=False, host=None, port=SYNC_PORT):
+        """Share effect phase with other instances, as clock leader or follower."""
+        self.stop_sync()
+        if leader:
+            self.sync_clock = ClockLeader(port=port).start()
+        else:
+            # Without a host the leader is found by broadcast
+            self.sync_clock = SyncClock(host, port).start()
+        self.color_display.set_clock(self.sync_clock.now)
+    
+    def stop_sync(self):
+        """Go back to this device's own clock."""
+        if self.sync_clock is not None:
+            self.sync_clock.stop()
+            self.sync_clock = None
+        self.color_display.set_clock(time.monotonic, shared=False)
+
+
 def main():
     # Use app_id as keyword argument
     return SoftBoxApp(app_id='org.example.softbox', formal_name="SoftBox")
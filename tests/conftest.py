@@ -0,0 +1,16 @@
+import os
+
+import pytest
+
+# Run the Qt widgets without a display server
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# Keep windows created by tests away from the user's preset library
+os.environ["SOFTBOX_PRESETS"] = ":memory:"
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """A QApplication shared by every test that needs widgets."""
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    yield app
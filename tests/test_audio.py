@@ -0,0 +1,95 @@
+import time
+import wave
+
+import numpy as np
+import pytest
+
+from softbox import ColorDisplay, SoftBox
+from softbox.audio import analyze_wav
+from softbox.effects import Effect
+
+RATE = 22050
+
+
+def _write_wav(path, seconds=20.0, bpm=120):
+    """A quiet tone with a loud click on every beat."""
+    t = np.arange(int(RATE * seconds)) / RATE
+    signal = 0.05 * np.sin(2 * np.pi * 440 * t)
+    beat = int(RATE * 60 / bpm)
+    for start in range(0, len(t), beat):
+        length = min(2000, len(t) - start)
+        signal[start:start + length] += 0.9 * np.random.default_rng(start).uniform(-1, 1, length)
+    stereo = np.repeat((np.clip(signal, -1, 1) * 32767).astype("<i2")[:, None], 2, axis=1)
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes(stereo.tobytes())
+
+
+def test_analysis_finds_beats_faster_than_real_time(tmp_path):
+    path = tmp_path / "beats.wav"
+    _write_wav(path)
+    started = time.perf_counter()
+    envelope = analyze_wav(path, chunk=1024, batch=16)
+    assert time.perf_counter() - started < 20.0 / 10
+    assert abs(envelope.duration - 20.0) < 0.1
+    assert envelope.bands.shape == (len(envelope), 3)
+
+    # One onset per beat, at the beat
+    beats = [envelope.index_at(0.5 * n) for n in range(1, 39)]
+    assert all(envelope.onsets[i - 1:i + 2].max() > 0.3 for i in beats)
+    assert np.count_nonzero(envelope.onsets) < 3 * 40
+    assert envelope.energy[beats[3]] > 4 * envelope.energy[beats[3] - 6]
+
+
+def test_music_effect(qapp, tmp_path):
+    path = tmp_path / "beats.wav"
+    _write_wav(path, seconds=2.0)
+    envelope = analyze_wav(path)
+    effect = Effect("Music", (255, 0, 0), speed=500, envelope=envelope)
+    assert effect.speed == envelope.frame_ms and len(effect.frames) == len(envelope)
+    with pytest.raises(ValueError):
+        Effect("Music", (255, 0, 0))
+
+    display = ColorDisplay()
+    display.start_effect("Music")
+    assert display.engine.effect is None
+    future = display.load_music(path)
+    future.result(10)
+    deadline = time.monotonic() + 2
+    while display.engine.effect is None and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.005)
+    assert display.engine.effect.name == "Music"
+    # Zones play the display's track
+    zone = display.add_zone("left", (0, 0, 0.5, 1))
+    zone.start_effect("Music")
+    assert zone.engine.effect.envelope is display.music
+    display.start_effect("None")
+
+
+def test_failed_analysis_is_reported(qapp, tmp_path, monkeypatch):
+    path = tmp_path / "broken.wav"
+    path.write_bytes(b"not a wav file")
+    display = ColorDisplay()
+    errors = []
+    display.music_failed.connect(errors.append)
+    with pytest.raises(Exception):
+        display.load_music(path).result(10)
+    deadline = time.monotonic() + 2
+    while not errors and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.005)
+    assert len(errors) == 1 and display.music is None
+
+    # The window shows the error instead of dropping it
+    shown = []
+    monkeypatch.setattr("softbox.QMessageBox.warning", lambda *args: shown.append(args[2]))
+    window = SoftBox()
+    window.color_display.music_failed.emit("bad header")
+    assert shown and "bad header" in shown[0]
+    window.close()
+    window.deleteLater()
+    display.deleteLater()
+    qapp.processEvents()
@@ -0,0 +1,117 @@
+import time
+
+from PySide6.QtCore import QModelIndex
+from PySide6.QtWidgets import QPushButton
+
+from softbox import SoftBox
+from softbox.browser import PresetBrowser, PresetModel
+from softbox.presets import PresetLibrary
+
+
+def _brand_library(count):
+    library = PresetLibrary(":memory:")
+    with library._db:
+        for i in range(count):
+            library._insert(f"Brand {i:04d}", (i % 256, (i * 7) % 256, (i * 13) % 256), [f"client{i % 20}"], False)
+    return library
+
+
+def test_model_loads_in_batches(qapp):
+    library = _brand_library(2000)
+    model = PresetModel(library)
+    assert model.matches() == 2011 and model.rowCount() == PresetModel.BATCH
+    while model.canFetchMore(QModelIndex()):
+        model.fetchMore(QModelIndex())
+    assert model.rowCount() == 2011
+    model.set_filter("brand 01")
+    assert model.matches() == 100 and model.rowCount() == 100
+    model.set_filter(tag="client3")
+    assert model.matches() == 5
+    assert model.data(model.index(0), PresetModel.PresetRole).tags == ("client3",)
+
+
+def test_browser_widget_count_independent_of_library(qapp):
+    small = PresetBrowser(PresetLibrary(":memory:"))
+    started = time.perf_counter()
+    large = PresetBrowser(_brand_library(2000))
+    large.resize(400, 120)
+    large.show()
+    qapp.processEvents()
+    assert time.perf_counter() - started < 1.0
+    assert len(large.findChildren(QPushButton)) == 0
+    assert len(large.findChildren(object)) == len(small.findChildren(object))
+    large.close()
+    for browser in (small, large):
+        browser.deleteLater()
+    qapp.processEvents()
+
+
+def test_filter_favorites_and_tags(qapp):
+    library = PresetLibrary(":memory:")
+    browser = PresetBrowser(library)
+    teal = library.add("Acme Teal", (0, 128, 128), ["acme"])
+    assert browser.tag_combo.findText("acme") >= 0
+    assert browser.model.rowCount() == 12
+
+    browser.search.setText("acme")
+    assert browser.model.rowCount() == 1
+    browser.search.clear()
+    browser.tag_combo.setCurrentText("Favorites")
+    assert browser.model.rowCount() == 0
+    library.set_favorite(teal.id)
+    assert browser.model.rowCount() == 1
+
+    # The filter falls back to every preset when its tag disappears
+    browser.tag_combo.setCurrentText("acme")
+    library.remove(teal.id)
+    assert browser.tag_combo.currentText() == "All Presets"
+    assert browser.model.rowCount() == 11
+    browser.deleteLater()
+    qapp.processEvents()
+
+
+def test_delegate_paints_swatches_and_click_applies(qapp):
+    library = PresetLibrary(":memory:")
+    window = SoftBox(presets=library)
+    browser = window.preset_browser
+    browser.search.setText("tiffany")
+    browser.resize(400, 120)
+    browser.show()
+    qapp.processEvents()
+    view = browser.view
+    rect = view.visualRect(view.model().index(0))
+    image = view.viewport().grab().toImage()
+    assert image.pixelColor(rect.left() + 8, rect.center().y()).getRgb()[:3] == (0, 175, 152)
+
+    view.clicked.emit(view.model().index(0))
+    assert (window.slider_r.value(), window.slider_g.value(), window.slider_b.value()) == (0, 175, 152)
+    window.close()
+    window.deleteLater()
+    qapp.processEvents()
+
+
+def test_edits_keep_selection_without_reset(qapp):
+    library = _brand_library(600)
+    browser = PresetBrowser(library)
+    model, view = browser.model, browser.view
+    resets, changed, moved = [], [], []
+    model.modelReset.connect(lambda: resets.append(1))
+    model.dataChanged.connect(lambda *args: changed.append(1))
+    model.layoutChanged.connect(lambda *args: moved.append(1))
+    model.fetchMore(QModelIndex())
+    view.setCurrentIndex(model.index(300))
+    selected = model.preset(300)
+
+    library.update(selected.id, rgb=(1, 2, 3))
+    assert not resets and changed and view.currentIndex().row() == 300
+
+    # Favorites come first: the selection moves with its preset
+    library.set_favorite(selected.id)
+    assert not resets and moved
+    assert view.currentIndex().data(PresetModel.PresetRole) is selected
+    assert view.currentIndex().row() == 0
+
+    library.add("Brand Extra", (0, 0, 0))
+    assert resets
+    browser.deleteLater()
+    qapp.processEvents()
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from PySide6.QtGui import QColor
+
+from softbox import ColorDisplay
+from softbox.calibration import Calibration, CubeError
+from softbox.effects import EffectEngine
+
+
+def _write_cube(path, header, rows):
+    path.write_text("\n".join(header + [" ".join(f"{v:.6f}" for v in row) for row in rows]) + "\n")
+    return path
+
+
+def test_1d_cube_resamples_curves(tmp_path):
+    # Red halved, green and blue untouched
+    rows = [(0.5 * x, x, x) for x in np.linspace(0, 1, 5)]
+    cal = Calibration.from_cube(_write_cube(tmp_path / "half.cube", ['TITLE "half red"', "LUT_1D_SIZE 5"], rows))
+    assert cal.title == "half red"
+    assert cal.apply((255, 255, 0)) == (128, 255, 0)
+    assert cal.apply((100, 100, 100)) == (50, 100, 100)
+
+
+def test_3d_cube_interpolates(tmp_path):
+    # Swap red and blue; red changes fastest in the file
+    size = 3
+    grid = np.linspace(0, 1, size)
+    rows = [(b, g, r) for b in grid for g in grid for r in grid]
+    cal = Calibration.from_cube(_write_cube(tmp_path / "swap.cube", ["LUT_3D_SIZE 3"], rows))
+    assert cal.apply((255, 0, 0)) == (0, 0, 255)
+    frames = np.array([[10, 20, 30], [200, 100, 50]], dtype=np.uint8)
+    assert np.array_equal(cal.apply_frames(frames), frames[:, ::-1])
+
+
+def test_bad_cube_raises(tmp_path):
+    with pytest.raises(CubeError):
+        Calibration.from_cube(_write_cube(tmp_path / "short.cube", ["LUT_3D_SIZE 2"], [(0, 0, 0)]))
+    with pytest.raises(CubeError):
+        Calibration.from_cube(_write_cube(tmp_path / "none.cube", [], [(0, 0, 0)]))
+
+
+def test_effect_tables_are_calibrated_once():
+    cal = Calibration(curves=np.stack([np.arange(256) // 2, np.arange(256), np.arange(256)]))
+    calls = []
+    apply_frames = cal.apply_frames
+    cal.apply_frames = lambda frames: calls.append(len(frames)) or apply_frames(frames)
+
+    engine = EffectEngine(clock=lambda: 0.0)
+    engine.set_calibration(cal)
+    engine.start("Police", (255, 255, 255), 100)
+    assert calls == [2]
+    for t in np.arange(0, 5, 0.05):
+        assert engine.output_at(t)[0] == engine.frame_at(t)[0] // 2
+    assert calls == [2]
+
+    # Flicker blocks are calibrated as they are rendered
+    engine.start("Candle", (255, 255, 255), 500)
+    raw, output = engine.frame_at(1.0), engine.output_at(1.0)
+    assert output == (raw[0] // 2, raw[1], raw[2])
+
+
+def test_display_paints_calibrated_color(qapp):
+    display = ColorDisplay()
+    seen = []
+    display.add_frame_listener(lambda r, g, b: seen.append((r, g, b)))
+    display.set_calibration(Calibration(curves=np.stack([np.arange(256) // 2] * 3)))
+    display.setColor(QColor(200, 100, 50))
+    assert display.presented_color() == QColor(200, 100, 50)
+    assert display.output_color() == QColor(100, 50, 25)
+    assert seen == [(200, 100, 50)]
+
+    display.set_calibration(None)
+    assert display.output_color() == QColor(200, 100, 50)
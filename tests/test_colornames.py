@@ -0,0 +1,68 @@
+import time
+
+import numpy as np
+import pytest
+
+from softbox import SoftBox
+from softbox.colornames import ColorNames, rgb_to_lab, _lab
+from softbox.presets import PresetLibrary
+
+
+def test_lab_matches_reference():
+    assert np.allclose(rgb_to_lab([255, 255, 255]), (100, 0, 0), atol=1e-3)
+    assert np.allclose(rgb_to_lab([255, 0, 0]), (53.24, 80.09, 67.20), atol=0.01)
+    assert np.allclose(_lab(0, 175, 152), rgb_to_lab([0, 175, 152]))
+
+
+def test_css_names():
+    names = ColorNames.css()
+    assert names.nearest((255, 0, 0)) == ("red", (255, 0, 0), 0.0)
+    name, rgb, distance = names.nearest((250, 128, 114))
+    assert name == "salmon" and distance == 0.0
+    assert names.nearest((1, 1, 2))[0] == "black"
+
+
+def test_grid_index_matches_brute_force():
+    rng = np.random.default_rng(4)
+    colors = rng.integers(0, 256, (5000, 3))
+    names = ColorNames([f"c{i}" for i in range(len(colors))], colors)
+    queries = rng.integers(0, 256, (2000, 3))
+    distances = ((names.lab[None, :, :] - rgb_to_lab(queries)[:, None, :].astype(np.float32)) ** 2).sum(axis=2)
+    expected = np.sqrt(distances.min(axis=1))
+    found = np.array([names.nearest_index(q)[1] for q in queries])
+    assert np.allclose(found, expected, atol=1e-3)
+
+    names._memo.clear()
+    started = time.perf_counter()
+    for q in queries.tolist():
+        names.nearest_index(q)
+    assert (time.perf_counter() - started) / len(queries) < 100e-6
+
+
+def test_from_csv_and_presets(tmp_path):
+    path = tmp_path / "brand.csv"
+    path.write_text("name,color\nAcme Teal,#008080\nAcme Sand,230,210,170\n", encoding="utf-8")
+    names = ColorNames.from_csv(path)
+    assert names.names == ["Acme Teal", "Acme Sand"]
+    assert names.nearest((0, 120, 120))[0] == "Acme Teal"
+
+    path.write_text("Acme Teal,#008080\nBroken,300,0,0\n", encoding="utf-8")
+    with pytest.raises(ValueError, match=":2:"):
+        ColorNames.from_csv(path)
+
+    library = PresetLibrary(":memory:")
+    assert ColorNames.from_presets(library).nearest((0, 170, 150))[0] == "Tiffany"
+
+
+def test_window_shows_nearest_name(qapp):
+    window = SoftBox(presets=PresetLibrary(":memory:"))
+    # Drag the sliders, like a user
+    window.slider_r.slider.setValue(250)
+    window.slider_g.slider.setValue(128)
+    window.slider_b.slider.setValue(114)
+    assert window.color_name_label.text().startswith("Nearest: salmon")
+    window.set_color_names(ColorNames(["Brand Blue"], [(0, 0, 200)]))
+    assert "Brand Blue" in window.color_name_label.text()
+    window.close()
+    window.deleteLater()
+    qapp.processEvents()
@@ -0,0 +1,51 @@
+import threading
+
+import numpy as np
+import pytest
+
+import softbox
+from softbox import ColorSequence
+
+
+def test_commands_from_another_thread(qapp):
+    """Commands submitted off the GUI thread are applied in one drain."""
+    controller = softbox.embed(show=False)
+
+    futures = []
+    thread = threading.Thread(target=lambda: futures.extend([
+        controller.set_color(10, 20, 30),
+        controller.start_effect("Police", speed=200),
+        controller.set_speed(300),
+    ]))
+    thread.start()
+    thread.join()
+    qapp.processEvents()
+
+    for future in futures:
+        assert future.result(timeout=1) is None
+    state = controller.state()
+    assert state["color"] == [10, 20, 30]
+    assert state["effect"] == "Police"
+    assert state["speed"] == 300
+    stats = controller.stats()
+    assert stats["applied"] == 3 and stats["drains"] == 1
+
+
+def test_bad_command_fails_its_future(qapp):
+    controller = softbox.embed(show=False)
+    future = controller.start_effect("Disco")
+    qapp.processEvents()
+    with pytest.raises(ValueError):
+        future.result(timeout=1)
+    assert controller.stats()["failed"] == 1
+
+
+def test_run_cue(qapp):
+    controller = softbox.embed(show=False)
+    frames = np.array([[1, 2, 3]], dtype=np.uint8)
+    controller.run_cue(ColorSequence(frames, fps=1), loop=True)
+    qapp.processEvents()
+    assert controller.state()["playing"]
+    controller.stop()
+    qapp.processEvents()
+    assert not controller.state()["playing"]
@@ -0,0 +1,68 @@
+import numpy as np
+from PySide6.QtGui import QColor
+
+from softbox import ColorDisplay, SoftBox
+from softbox.dimmer import DITHER_FRAMES, DITHER_PATTERNS, Dimmer, perceptual_to_linear
+
+
+def test_perceptual_curve():
+    levels = np.linspace(0, 1, 101)
+    light = [perceptual_to_linear(v) for v in levels]
+    assert light[0] == 0.0 and abs(light[-1] - 1.0) < 1e-9
+    assert np.all(np.diff(light) > 0)
+    # Half lightness is about 18% light, like a gray card
+    assert abs(perceptual_to_linear(0.5) - 0.184) < 0.01
+
+
+def test_dither_patterns_are_even():
+    assert DITHER_PATTERNS.shape == (DITHER_FRAMES + 1, DITHER_FRAMES)
+    assert list(DITHER_PATTERNS.sum(axis=1)) == list(range(DITHER_FRAMES + 1))
+
+
+def test_dither_averages_between_codes():
+    dimmer = Dimmer(0.2)
+    # Over one dither cycle the mean code matches the exact dimmed value
+    mean = dimmer.table.astype(np.float64).mean(axis=0)
+    assert np.all(np.abs(mean - dimmer.exact) <= 0.5 / DITHER_FRAMES + 1e-9)
+    assert dimmer.needs_dither((255, 255, 255)) == bool(dimmer.dithered[255])
+    assert not Dimmer(0.2, dither=False).dithered.any()
+    assert np.array_equal(Dimmer(1.0).table[0], np.arange(256))
+
+
+def test_display_dithers_each_refresh(qapp):
+    display = ColorDisplay()
+    display.resize(50, 50)
+    display.setColor(QColor(255, 255, 255))
+    display.set_dimmer(0.2)
+    assert display.dimmer.needs_dither((255, 255, 255))
+    assert display._dither_timer.isActive()
+    seen = {display._dimmed(display.output_color(), phase).red() for phase in range(DITHER_FRAMES)}
+    assert len(seen) == 2
+
+    display.setColor(QColor(0, 0, 0))
+    qapp.processEvents()
+    assert not display._dither_timer.isActive()
+    display.set_dimmer(1.0)
+    assert display.dimmer is None
+
+
+def test_full_screen_windows_are_dimmed(qapp):
+    window = SoftBox()
+    window.apply_preset(QColor(200, 200, 200))
+    window.start_multi_screen([qapp.primaryScreen()])
+    window.dimmer_slider.slider.setValue(50)
+    qapp.processEvents()
+    screen_window = window.multi_screen.windows[0]
+    assert screen_window.dimmer is window.color_display.dimmer
+    expected = window.color_display.dimmer.table[:, 200]
+    pixel = screen_window.grab().toImage().pixelColor(5, 5)
+    assert pixel.red() in expected and pixel.red() < 200
+    # Windows started later pick up the current level
+    window.start_multi_screen([qapp.primaryScreen()])
+    assert window.multi_screen.windows[0].dimmer is window.color_display.dimmer
+    window.dimmer_slider.slider.setValue(100)
+    assert window.multi_screen.windows[0].dimmer is None
+    window.stop_multi_screen()
+    window.close()
+    window.deleteLater()
+    qapp.processEvents()
@@ -0,0 +1,86 @@
+import socket
+
+import pytest
+
+from softbox import ColorDisplay, DmxOutput
+from softbox.dmx import benchmark
+from PySide6.QtGui import QColor
+
+
+@pytest.fixture
+def receiver():
+    """A local UDP socket standing in for a node or LED controller."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(2)
+    yield sock
+    sock.close()
+
+
+def test_artnet_packet(receiver):
+    output = DmxOutput("artnet", host="127.0.0.1", port=receiver.getsockname()[1],
+                       universe=0x123, start_address=5, fixtures=2, channel_order="GRB")
+    output.send_rgb(10, 20, 30)
+    packet = receiver.recv(1024)
+    assert packet[:8] == b"Art-Net\0"
+    assert packet[8:10] == b"\x00\x50"
+    assert packet[14] == 0x23 and packet[15] == 0x01
+    assert int.from_bytes(packet[16:18], "big") == 10
+    assert packet[18:28] == bytes([0, 0, 0, 0, 20, 10, 30, 20, 10, 30])
+    output.close()
+
+
+def test_sacn_packet(receiver):
+    output = DmxOutput("sacn", host="127.0.0.1", port=receiver.getsockname()[1],
+                       universe=7, fixtures=1, channel_order="RGBW")
+    output.send_rgb(200, 100, 50)
+    output.send_rgb(200, 100, 60)
+    first, second = receiver.recv(1024), receiver.recv(1024)
+    assert first[4:16] == b"ASC-E1.17\0\0\0"
+    assert int.from_bytes(first[113:115], "big") == 7
+    assert int.from_bytes(first[123:125], "big") == 5
+    assert second[126:130] == bytes([200, 100, 60, 60])
+    assert second[111] == (first[111] + 1) & 0xFF
+    output.close()
+
+
+def test_mirrors_display_frames(qapp, receiver):
+    display = ColorDisplay()
+    output = DmxOutput(host="127.0.0.1", port=receiver.getsockname()[1]).attach(display)
+    display.setColor(QColor(1, 2, 3))
+    packets = [receiver.recv(1024), receiver.recv(1024)]
+    assert packets[0][18:21] == bytes([255, 255, 255])
+    assert packets[1][18:21] == bytes([1, 2, 3])
+    output.close()
+
+
+def test_close_detaches_from_display(qapp, receiver):
+    display = ColorDisplay()
+    output = DmxOutput(host="127.0.0.1", port=receiver.getsockname()[1]).attach(display)
+    seen = []
+    display.add_frame_listener(lambda r, g, b: seen.append((r, g, b)))
+    output.close()
+    assert output._keepalive is None
+    # Presenting after close neither raises nor starves later listeners
+    display.setColor(QColor(4, 5, 6))
+    assert seen == [(4, 5, 6)]
+
+
+def test_benchmark_reports_rates():
+    result = benchmark("sacn", count=200)
+    assert result["packets_per_second"] > 0
+    assert result["cpu_per_packet_us"] > 0
+
+
+def test_send_errors_are_counted(qapp):
+    display = ColorDisplay()
+    output = DmxOutput(host="192.0.2.1")
+    # A loopback-bound socket cannot reach the documentation network
+    output._sock.bind(("127.0.0.1", 0))
+    output.attach(display)
+    seen = []
+    display.add_frame_listener(lambda r, g, b: seen.append((r, g, b)))
+    display.setColor(QColor(7, 8, 9))
+    assert seen == [(7, 8, 9)]
+    assert output.stats()["errors"] == 2 and output.stats()["packets"] == 0
+    output.close()
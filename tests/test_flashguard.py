@@ -0,0 +1,91 @@
+from PySide6.QtGui import QColor
+
+from softbox import ColorDisplay, SoftBox
+from softbox.flashguard import FlashGuard
+
+
+def _strobe(guard, colors, step_ms, seconds):
+    shown = []
+    for n in range(int(seconds * 1000 / step_ms)):
+        rgb = colors[n % len(colors)]
+        if guard.check(rgb, n * step_ms / 1000.0):
+            shown.append(rgb)
+    return shown
+
+
+def test_warn_counts_violations():
+    guard = FlashGuard("warn", clock=lambda: 2.0)
+    reports = []
+    guard.add_listener(lambda kind, flashes: reports.append(kind))
+    shown = _strobe(guard, [(255, 255, 255), (0, 0, 0)], 50, 2)
+    assert len(shown) == 40
+    stats = guard.stats()
+    assert stats["violations"] > 0 and stats["peak_flashes"] >= 9
+    assert "luminance" in reports
+
+
+def test_clamp_keeps_rate_under_limit():
+    guard = FlashGuard("clamp")
+    _strobe(guard, [(255, 255, 255), (0, 0, 0)], 50, 10)
+    assert guard.held > 0 and guard.violations == 0
+    assert guard.peak_flashes <= 3
+    # Slow changes pass untouched
+    slow = FlashGuard("clamp")
+    assert len(_strobe(slow, [(255, 255, 255), (0, 0, 0)], 500, 5)) == 10
+
+
+def test_red_flashes():
+    guard = FlashGuard("warn")
+    # Red to a dark red: a small luminance change but a large red change
+    _strobe(guard, [(255, 0, 0), (60, 0, 0)], 50, 1)
+    assert guard.red.total > 6
+    # Small flicker is not a flash
+    calm = FlashGuard("warn")
+    _strobe(calm, [(128, 128, 128), (124, 124, 124)], 20, 1)
+    assert calm.luminance.total == 0 and calm.red.total == 0
+
+
+def test_display_holds_frames(qapp):
+    display = ColorDisplay()
+    now = [0.0]
+    display.set_flash_guard(FlashGuard("clamp", clock=lambda: now[0]))
+    for n in range(20):
+        now[0] = n * 0.05
+        display.show_rgb(*[(255, 255, 255), (0, 0, 0)][n % 2])
+    assert display.flash_guard.held > 0
+    assert display.flash_guard.stats()["peak_flashes"] <= 3
+
+
+def test_zones_are_guarded(qapp):
+    display = ColorDisplay()
+    now = [0.0]
+    zone = display.add_zone("left", (0, 0, 0.5, 1))
+    display.set_flash_guard(FlashGuard("clamp", clock=lambda: now[0]))
+    assert zone.flash_guard is not None and zone.flash_guard is not display.flash_guard
+    shown = 0
+    for n in range(20):
+        now[0] = n * 0.05
+        zone.set_color(QColor(*[(255, 255, 255), (0, 0, 0)][n % 2]))
+        before = zone.presented
+        display._update_zones()
+        shown += zone.presented != before
+    assert zone.flash_guard.held > 0 and shown < 20
+    assert zone.flash_guard.stats()["peak_flashes"] <= 3
+    display.set_flash_guard(None)
+    assert zone.flash_guard is None
+    display.deleteLater()
+
+
+def test_toggle_reaches_running_multi_screen(qapp):
+    window = SoftBox()
+    window.start_multi_screen([qapp.primaryScreen()])
+    assert window.multi_screen.flash_guard is None
+    window.flash_guard_check.setChecked(True)
+    assert window.multi_screen.flash_guard is not None
+    assert window.multi_screen.flash_guard is not window.color_display.flash_guard
+    window.flash_guard_check.setChecked(False)
+    assert window.multi_screen.flash_guard is None
+    window.stop_multi_screen()
+    window.close()
+    window.deleteLater()
+    qapp.processEvents()
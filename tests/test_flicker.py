@@ -0,0 +1,66 @@
+import time
+
+import numpy as np
+import pytest
+
+from softbox import ColorDisplay
+from softbox.effects import NOISE_BLOCK, Effect, NoiseFrames, flicker_block
+
+
+@pytest.mark.parametrize("name", ["Candle", "Fire", "Lightning", "TV"])
+def test_flicker_is_seeded_and_seamless(name):
+    block = flicker_block(name, 7, 3)
+    assert block.shape == (NOISE_BLOCK, 3) and block.dtype == np.uint8
+    assert np.array_equal(block, flicker_block(name, 7, 3))
+    assert not np.array_equal(block, flicker_block(name, 8, 3))
+    # Not periodic: consecutive blocks differ
+    assert not np.array_equal(block, flicker_block(name, 7, 4))
+
+    # No seam where blocks join: the jump is like any other step
+    joined = np.concatenate([block, flicker_block(name, 7, 4)]).astype(int)
+    jumps = np.abs(np.diff(joined, axis=0)).max(axis=1)
+    assert jumps[NOISE_BLOCK - 1] <= max(jumps.max(), 1)
+    if name in ("Candle", "Fire"):
+        assert jumps[NOISE_BLOCK - 1] <= np.percentile(jumps, 99.5) + 2
+
+
+def test_takes_repeat_exactly():
+    first = Effect("Candle", speed=500, seed=42)
+    second = Effect("Candle", speed=500, seed=42)
+    times = np.arange(0, 60000, 7.0)
+    assert [first.rgb_at(t) for t in times] == [second.rgb_at(t) for t in times]
+    assert first.step_ms == 20.0
+    assert first.ms_until_next_step(15.0) == 5.0
+
+
+def test_next_block_is_prefetched():
+    frames = NoiseFrames("Fire", seed=1)
+    frames[0]
+    frames[NOISE_BLOCK // 2]
+    deadline = time.monotonic() + 2
+    while 1 not in frames._blocks and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert 1 in frames._blocks
+    for step in range(5 * NOISE_BLOCK):
+        frames[step]
+    assert len(frames._blocks) <= frames.cache
+
+
+def test_seed_is_validated_and_wrap_is_internal():
+    for seed in (-1, 1.5, True):
+        with pytest.raises(ValueError):
+            NoiseFrames("Candle", seed=seed)
+    with pytest.raises(TypeError):
+        len(NoiseFrames("Candle"))
+    effect = Effect("Candle", seed=3)
+    assert effect.length == NoiseFrames.WRAP
+    assert effect.rgb_at(effect.step_ms * (NoiseFrames.WRAP + 5)) == effect.rgb_at(effect.step_ms * 5)
+
+
+def test_display_rejects_negative_seed(qapp):
+    display = ColorDisplay()
+    with pytest.raises(ValueError):
+        display.set_seed(-5)
+    assert display.seed == 0
+    display.deleteLater()
+    qapp.processEvents()
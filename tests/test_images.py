@@ -0,0 +1,98 @@
+import os
+import time
+
+import numpy as np
+import pytest
+from PySide6.QtGui import QColor, QImage
+
+from softbox import ColorDisplay
+from softbox.images import ImageSequence
+
+COLORS = [QColor(255, 0, 0), QColor(0, 255, 0), QColor(0, 0, 255)]
+
+
+def _write_frames(directory):
+    for index, color in enumerate(COLORS):
+        image = QImage(40, 30, QImage.Format_RGB32)
+        image.fill(color)
+        image.save(str(directory / f"frame{index:03d}.png"))
+
+
+def test_load_caches_decoded_frames(qapp, tmp_path):
+    _write_frames(tmp_path)
+    cache = tmp_path / "cache"
+    sequence = ImageSequence.load(tmp_path, fps=30, cache_dir=cache)
+    assert len(sequence) == 3 and sequence.frames.shape == (3, 30, 40, 4)
+    assert isinstance(sequence.frames, np.memmap)
+    assert sequence.image_at(1).pixelColor(5, 5) == COLORS[1]
+    assert sequence.mean_rgb(2) == (0, 0, 255)
+
+    # Unchanged files load from the cache; a resize decodes again
+    again = ImageSequence.load_async(tmp_path, fps=30, cache_dir=cache).result(10)
+    assert again.frames.filename == sequence.frames.filename
+    scaled = ImageSequence.load(tmp_path, size=(20, 10), cache_dir=cache)
+    assert scaled.frames.shape == (3, 10, 20, 4)
+    assert len(list(cache.iterdir())) == 2
+
+
+def test_display_plays_images(qapp, tmp_path):
+    _write_frames(tmp_path)
+    sequence = ImageSequence.load(tmp_path, fps=20, cache_dir=tmp_path / "cache")
+    display = ColorDisplay()
+    display.resize(80, 200)
+    frames = []
+    display.add_frame_listener(lambda r, g, b: frames.append((r, g, b)))
+    display.play_images(sequence)
+    assert display.grab().toImage().pixelColor(40, 100) == COLORS[0]
+
+    deadline = time.monotonic() + 2
+    while display.is_playing() and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.005)
+    assert frames[:3] == [(255, 0, 0), (0, 255, 0), (0, 0, 255)]
+    # Back to the solid color when the sequence ends
+    assert display.grab().toImage().pixelColor(40, 100) == QColor(255, 255, 255)
+
+
+def test_cache_is_pruned_least_recently_used_first(qapp, tmp_path, monkeypatch):
+    _write_frames(tmp_path)
+    cache = tmp_path / "cache"
+    first = ImageSequence.load(tmp_path, size=(20, 10), cache_dir=cache)
+    second = ImageSequence.load(tmp_path, size=(30, 10), cache_dir=cache)
+    past = time.time() - 100
+    os.utime(second.frames.filename, (past, past))
+    # Loading the first again marks it as used, so the second goes first
+    ImageSequence.load(tmp_path, size=(20, 10), cache_dir=cache)
+    stale = cache / "left.npy.1.tmp"
+    stale.write_bytes(b"x")
+    os.utime(stale, (past - 7200, past - 7200))
+
+    monkeypatch.setattr("softbox.images.MAX_CACHE_BYTES", os.path.getsize(first.frames.filename) * 3)
+    third = ImageSequence.load(tmp_path, size=(40, 10), cache_dir=cache)
+    names = {path.name for path in cache.iterdir()}
+    assert names == {os.path.basename(first.frames.filename), os.path.basename(third.frames.filename)}
+
+
+def test_set_image_loads_in_background(qapp, tmp_path):
+    _write_frames(tmp_path)
+    display = ColorDisplay()
+    display.resize(80, 200)
+    errors = []
+    display.image_failed.connect(errors.append)
+    future = display.set_image(tmp_path / "frame001.png")
+    future.result(10)
+    deadline = time.monotonic() + 2
+    while display._image is None and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.005)
+    assert display.grab().toImage().pixelColor(40, 100) == COLORS[1]
+
+    with pytest.raises(OSError):
+        display.set_image(tmp_path / "missing.png").result(10)
+    deadline = time.monotonic() + 2
+    while not errors and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.005)
+    assert len(errors) == 1
+    display.deleteLater()
+    qapp.processEvents()
@@ -0,0 +1,39 @@
+import numpy as np
+
+from softbox import SoftBox
+from softbox.effects import effect_frames
+from softbox.kelvin import kelvin_ramp, kelvin_table, kelvin_to_rgb
+
+
+def test_locus_colors():
+    # D65 is close to display white; candlelight is orange; clear sky is blue
+    assert min(kelvin_to_rgb(6500)) >= 245
+    r, g, b = kelvin_to_rgb(1900)
+    assert r == 255 and 100 < g < 160 and b < 20
+    r, g, b = kelvin_to_rgb(15000)
+    assert b == 255 and r < 200
+    # Warmer is always redder relative to blue
+    ratios = [r / max(b, 1) for r, g, b in kelvin_table().rgb.tolist()[::50]]
+    assert all(x >= y for x, y in zip(ratios, ratios[1:]))
+
+
+def test_tint_and_ramps():
+    r, g, b = kelvin_to_rgb(5000, tint=60)
+    neutral = kelvin_to_rgb(5000)
+    assert g < neutral[1]  # magenta
+    assert kelvin_to_rgb(5000, tint=-60)[1] >= neutral[1]  # green
+    # Vectorized lookups
+    ramp = kelvin_ramp(2000, 6500, 64)
+    assert ramp.shape == (64, 3) and ramp.dtype == np.uint8
+    assert tuple(ramp[0]) == kelvin_to_rgb(2000) and tuple(ramp[-1]) == kelvin_to_rgb(6500)
+    assert effect_frames("Sun").shape == (100, 3)
+
+
+def test_kelvin_controls(qapp):
+    window = SoftBox()
+    window.kelvin_slider.setValue(2700)
+    window.apply_kelvin()
+    assert (window.color.red(), window.color.green(), window.color.blue()) == kelvin_to_rgb(2700)
+    window.close()
+    window.deleteLater()
+    qapp.processEvents()
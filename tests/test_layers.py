@@ -0,0 +1,87 @@
+import time
+
+import numpy as np
+from PySide6.QtGui import QColor
+
+from softbox import ColorDisplay, SoftBox
+from softbox.layers import LayerStack
+from softbox.presets import PresetLibrary
+
+
+def _reference(backdrop, layers):
+    """Straightforward layer-by-layer compositing to check against."""
+    out = np.array(backdrop, dtype=np.float64) / 255.0
+    for color, opacity, blend in layers:
+        c = np.array(color, dtype=np.float64) / 255.0
+        blended = {"Normal": c, "Add": out + c, "Multiply": out * c, "Screen": 1 - (1 - out) * (1 - c)}[blend]
+        out = out * (1 - opacity) + blended * opacity
+    return np.clip(np.rint(out * 255), 0, 255)
+
+
+def test_stack_matches_layer_by_layer():
+    stack = LayerStack(clock=lambda: 0.0)
+    spec = [((200, 120, 40), 0.5, "Normal"), ((30, 30, 90), 0.8, "Add"),
+            ((128, 255, 64), 0.7, "Multiply"), ((90, 0, 200), 0.4, "Screen"), ((10, 200, 10), 0.3, "Normal")]
+    for color, opacity, blend in spec:
+        # Custom frames alternate the base color with a dimmed copy; step 0 is the base
+        stack.add("Custom", color, 1000, opacity, blend)
+    backdrops = np.array([[0, 0, 0], [255, 255, 255], [100, 50, 25]], dtype=np.uint8)
+    result = stack.composite(backdrops, 0.1)
+    for backdrop, row in zip(backdrops, result):
+        assert np.abs(row.astype(int) - _reference(backdrop, spec)).max() <= 1
+
+
+def test_next_change_covers_every_layer():
+    stack = LayerStack(clock=lambda: 0.0)
+    assert stack.ms_until_next_change() is None
+    stack.add("Police", speed=300)
+    stack.add("Strobe", speed=70)
+    assert stack.ms_until_next_change(0.1) == 40.0
+
+
+def test_display_composites_layers_and_zones(qapp):
+    display = ColorDisplay()
+    display.setColor(QColor(100, 100, 100))
+    display.add_zone("left", (0, 0, 0.5, 1), QColor(0, 0, 200))
+    layer = display.add_layer("Police", speed=1000, opacity=0.5, blend="Add")
+    assert display.presented_color().getRgb()[:3] in ((227, 100, 100), (100, 100, 227))
+    deadline = time.monotonic() + 1
+    while display.zone("left").presented is None and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.005)
+    assert display.zone("left").presented.getRgb()[:3] in ((128, 0, 200), (0, 0, 255))
+
+    display.remove_layer(layer)
+    assert display.presented_color() == QColor(100, 100, 100)
+    display.start_effect("None")
+
+
+def test_display_setters_reach_layers(qapp):
+    display = ColorDisplay()
+    flicker = display.add_layer("Candle", speed=500)
+    display.set_palette([(10, 20, 30), (40, 50, 60)])
+    palette = display.add_layer("Palette", speed=500)
+    display.set_speed(200)
+    assert flicker.effect.speed == 200 and palette.effect.speed == 200
+    display.set_seed(9)
+    assert flicker.effect.frames.seed == 9
+    display.set_palette([(1, 2, 3)])
+    assert palette.effect.frames[0].tolist() == [1, 2, 3] and palette.effect.speed == 200
+    assert list(display.layers) == [flicker, palette]
+    display.deleteLater()
+    qapp.processEvents()
+
+
+def test_palette_layer_without_palette_keeps_current_layer(qapp, monkeypatch):
+    warnings = []
+    monkeypatch.setattr("softbox.QMessageBox.warning", lambda *args: warnings.append(args[2]))
+    window = SoftBox(presets=PresetLibrary(":memory:"))
+    window.layer_combo.setCurrentText("Police")
+    police = next(iter(window.color_display.layers))
+    window.layer_combo.setCurrentText("Palette")
+    assert warnings and "palette" in warnings[0]
+    assert list(window.color_display.layers) == [police]
+    assert window.layer_combo.currentText() == "Police"
+    window.close()
+    window.deleteLater()
+    qapp.processEvents()
@@ -0,0 +1,44 @@
+import numpy as np
+
+from softbox.calibration import Calibration
+from softbox.effects import EffectEngine, effect_frames, normalize_luminance, relative_luminance
+
+
+def test_neon_has_constant_luminance():
+    raw = relative_luminance(effect_frames("Neon"))
+    assert raw.max() / raw.min() > 10
+    frames = effect_frames("Neon", luminance="auto")
+    luminance = relative_luminance(frames)
+    assert np.all(np.abs(luminance / luminance.mean() - 1) < 0.05)
+    # Blue is the darkest primary, so it stays at full
+    assert tuple(frames[4]) == (0, 0, 255)
+
+
+def test_target_luminance():
+    frames = normalize_luminance(np.array([[255, 255, 0], [0, 0, 255], [0, 0, 0]], dtype=np.uint8), 0.2)
+    luminance = relative_luminance(frames)
+    assert abs(luminance[0] - 0.2) < 0.01
+    # Unreachable targets stop at the brightest version of the color
+    assert tuple(frames[1]) == (0, 0, 255)
+    assert tuple(frames[2]) == (0, 0, 0)
+    # Hue is kept
+    assert frames[0][0] == frames[0][1] and frames[0][2] == 0
+
+
+def test_normalized_before_calibration():
+    cal = Calibration(curves=np.stack([np.arange(256) // 2] * 3))
+    engine = EffectEngine(clock=lambda: 0.0)
+    engine.set_calibration(cal)
+    engine.start("Police", (255, 255, 255), 100, luminance="auto")
+    effect = engine.effect
+    assert np.array_equal(effect.frames, effect_frames("Police", luminance="auto"))
+    assert np.array_equal(effect.output, cal.apply_frames(effect.frames))
+    # Effects other than color cycles are left alone
+    assert np.array_equal(effect_frames("Sun", luminance="auto"), effect_frames("Sun"))
+
+
+def test_strobe_and_custom_keep_their_contrast():
+    custom = effect_frames("Custom", (200, 200, 200), luminance="auto")
+    assert custom.tolist() == [[200, 200, 200], [100, 100, 100]]
+    strobe = effect_frames("Strobe", (60, 60, 60), luminance="auto")
+    assert strobe.tolist() == [[60, 60, 60], [0, 0, 0]]
@@ -0,0 +1,125 @@
+import time
+
+import numpy as np
+import pytest
+
+from softbox.calibration import Calibration
+from softbox.effects import EffectEngine, hue_matrix
+from softbox.modulation import ModulationBank
+
+
+def test_shapes():
+    bank = ModulationBank()
+    bank.add("brightness", "Sine", rate=1.0, depth=1.0)
+    bank.add("hue", "Triangle", rate=1.0, depth=1.0)
+    bank.add("dim", "Envelope", rate=1.0, depth=1.0, attack=0.2)
+    values = np.array([bank.evaluate(t).copy() for t in np.arange(0, 1, 0.05)])
+    # Columns are speed, brightness, hue and dim
+    assert np.allclose(values[5, 1:], [1.0, 1.0, np.exp(-0.05 / 0.25)])
+    assert np.allclose(values[2, 3], 0.5)  # halfway up the attack
+    assert values[:, 1].min() >= -1 and values[:, 2].min() >= -1
+    assert np.all(values[:, 0] == 0)
+
+    walk = ModulationBank()
+    walk.add("speed", "Random Walk", rate=2.0, depth=1.0, seed=5)
+    samples = np.array([walk.evaluate(t)[0] for t in np.arange(0, 60, 0.01)])
+    assert samples.min() >= -1 and samples.max() <= 1 and samples.std() > 0.1
+    # Continuous: no jumps between neighbouring samples
+    assert np.abs(np.diff(samples)).max() < 0.2
+
+
+def test_targets_sum_and_slots_free():
+    bank = ModulationBank(capacity=4)
+    a = bank.add("brightness", "Sine", rate=0.0, depth=0.3, phase=0.25)
+    bank.add("brightness", "Sine", rate=0.0, depth=0.2, phase=0.25)
+    assert np.isclose(bank.evaluate(0.0)[1], 0.5)
+    bank.remove(a)
+    assert np.isclose(bank.evaluate(0.0)[1], 0.2)
+    assert len(bank) == 1 and bank.targets() == ["brightness"]
+
+
+def test_dozens_of_modulators_are_cheap():
+    bank = ModulationBank(capacity=48)
+    for n in range(48):
+        bank.add("hue", ["Sine", "Triangle", "Random Walk", "Envelope"][n % 4], rate=0.1 * n, seed=n)
+    started = time.perf_counter()
+    for n in range(1000):
+        bank.evaluate(n / 60.0)
+    assert (time.perf_counter() - started) / 1000 < 0.001
+
+
+def test_engine_applies_modulation():
+    now = [0.0]
+    engine = EffectEngine(clock=lambda: now[0])
+    engine.start("Custom", (200, 200, 200), 500)
+    engine.modulate("brightness", "Sine", rate=0.0, depth=-0.5, phase=0.25)
+    assert engine.frame_at() == (100, 100, 100)
+    assert engine.ms_until_next_change() < 20
+
+    engine.unmodulate()
+    engine.modulate("hue", "Sine", rate=0.0, depth=1 / 3, phase=0.25)
+    engine.show((0, 0, 0))
+    engine.start("Strobe", (255, 0, 0), 500)
+    # A third of a turn takes red to green
+    assert engine.frame_at() == (0, 255, 0)
+    assert np.allclose(hue_matrix(120) @ [0, 255, 0], [0, 0, 255])
+
+    # Speeding the step rate up by 90% almost doubles the steps
+    engine.unmodulate()
+    engine.start("Police", (255, 255, 255), 100)
+    engine.modulate("speed", "Sine", rate=0.0, depth=0.9, phase=0.25)
+    steps = []
+    for n in range(41):
+        now[0] = n * 0.01
+        steps.append(engine.frame_at())
+    changes = sum(1 for a, b in zip(steps, steps[1:]) if a != b)
+    assert 7 <= changes <= 9
+
+
+def test_integral_is_exact():
+    bank = ModulationBank()
+    bank.add("speed", "Sine", rate=0.7, depth=0.3, phase=0.1)
+    bank.add("speed", "Triangle", rate=1.3, depth=0.2)
+    bank.add("speed", "Random Walk", rate=0.5, depth=0.4, seed=3)
+    bank.add("speed", "Envelope", rate=2.0, depth=0.5, attack=0.2)
+    bank.add("hue", "Sine", rate=0.0, depth=0.25, phase=0.25)
+    times = np.linspace(1.0, 9.0, 20001)
+    values = np.array([bank.evaluate(t).copy() for t in times])
+    trapezoids = ((values[1:] + values[:-1]) / 2 * np.diff(times)[:, None]).sum(axis=0)
+    area = bank.integral(1.0, 9.0)
+    assert np.allclose(area[:3], trapezoids[:3], atol=1e-3)
+    assert np.isclose(area[2], 0.25 * 8.0)
+    assert np.allclose(bank.integral(0.0, 4.0) + bank.integral(4.0, 700.0), bank.integral(0.0, 700.0))
+
+
+def test_speed_modulation_follows_the_shared_clock():
+    now = [0.0]
+    engines = [EffectEngine(clock=lambda: now[0]) for _ in range(2)]
+    for engine in engines:
+        engine.set_clock(engine.clock, shared=True)
+        engine.start("Neon", (255, 255, 255), 50)
+        engine.modulate("speed", "Random Walk", rate=0.5, depth=0.6, seed=2)
+        engine.modulate("speed", "Sine", rate=0.3, depth=0.3)
+    # One engine samples every 5 ms, the other every 70 ms: same frames where both sample
+    for n in range(2000):
+        now[0] = 100.0 + n * 0.005
+        frame = engines[0].frame_at()
+        if n % 14 == 0:
+            assert engines[1].frame_at() == frame
+    with pytest.raises(ValueError):
+        engines[0].modulate("speed", "Sine", depth=0.2)
+
+
+def test_dim_frame_is_calibrated():
+    now = [0.0]
+    engine = EffectEngine(clock=lambda: now[0])
+    engine.start("Custom", (200, 120, 40), 100, luminance=0.2)
+    engine.modulate("dim", "Sine", rate=0.0, depth=0.5, phase=0.25)
+    now[0] = 0.15
+    # Step 1 shows the recomputed dim frame; Custom ignores luminance normalization
+    assert engine.frame_at() == (50, 0, 0)
+
+    calibration = Calibration(curves=np.tile(255 - np.arange(256), (3, 1)))
+    engine.set_calibration(calibration)
+    assert engine.output_at() == calibration.apply(engine.frame_at())
+    assert engine.ms_until_next_change(frame_ms=1000 / 144) == 1000 / 144
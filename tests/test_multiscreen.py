@@ -0,0 +1,60 @@
+import time
+
+from PySide6.QtGui import QColor, QGuiApplication
+
+from softbox import ColorDisplay
+from softbox.multiscreen import MultiScreenOutput
+
+
+def _pump(qapp, seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.005)
+
+
+def test_windows_share_engine_frame(qapp):
+    display = ColorDisplay()
+    screen = QGuiApplication.primaryScreen()
+    output = MultiScreenOutput(display.engine, [screen, screen, screen]).show()
+    try:
+        display.setColor(QColor(10, 20, 30))
+        _pump(qapp, 0.05)
+        assert all(w.presented_color() == QColor(10, 20, 30) for w in output.windows)
+        # Static frame: nothing keeps ticking
+        assert output.is_idle()
+
+        output.set_override(1, brightness=0.5)
+        output.set_override(2, color=QColor(255, 0, 0))
+        assert output.windows[1].presented_color() == QColor(5, 10, 15)
+        assert output.windows[2].presented_color() == QColor(255, 0, 0)
+
+        display.start_effect("Police", 50)
+        _pump(qapp, 0.3)
+        assert not output.is_idle()
+        # One timer for all three same-rate screens, about one tick per step
+        assert output.ticks < 20
+        assert output.windows[0].presented_color() in (QColor(255, 0, 0), QColor(0, 0, 255))
+    finally:
+        output.close()
+        display.start_effect("None")
+
+
+def test_windows_composite_display_layers(qapp):
+    display = ColorDisplay()
+    display.setColor(QColor(100, 100, 100))
+    screen = QGuiApplication.primaryScreen()
+    output = MultiScreenOutput(display.engine, [screen], layers=display.layers).show()
+    try:
+        layer = display.add_layer("Police", speed=50, opacity=0.5, blend="Add")
+        _pump(qapp, 0.05)
+        assert output.windows[0].presented_color().getRgb()[:3] in ((227, 100, 100), (100, 100, 227))
+        # The layer's steps keep the screens ticking over a static backdrop
+        assert not output.is_idle()
+        display.remove_layer(layer)
+        _pump(qapp, 0.05)
+        assert output.windows[0].presented_color() == QColor(100, 100, 100)
+        assert output.is_idle()
+    finally:
+        output.close()
+        display.start_effect("None")
@@ -0,0 +1,98 @@
+import socket
+import time
+
+import pytest
+
+import softbox
+from softbox.osc import MAX_BUNDLE_DEPTH, OscError, OscListener, encode_message, parse_packet
+
+
+def _bundle(*elements):
+    return b"#bundle\0" + b"\0" * 8 + b"".join(len(e).to_bytes(4, "big") + e for e in elements)
+
+
+def test_parse_round_trip():
+    """Messages and bundles decode back to their address and arguments."""
+    message = encode_message("/softbox/rgb", 1, 0.5, "x")
+    assert parse_packet(message) == [("/softbox/rgb", [1, 0.5, "x"])]
+
+    element = encode_message("/softbox/speed", 200)
+    bundle = b"#bundle\0" + b"\0" * 8 + len(element).to_bytes(4, "big") + element
+    assert parse_packet(bundle) == [("/softbox/speed", [200])]
+
+
+def test_loopback_burst_is_coalesced(qapp):
+    """A burst of fader messages is applied once with the last value."""
+    controller = softbox.embed(show=False)
+    listener = OscListener(controller, host="127.0.0.1", port=0).start()
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        for value in range(200):
+            sender.sendto(encode_message("/softbox/r", value), ("127.0.0.1", listener.port))
+        sender.sendto(encode_message("/softbox/effect", 2), ("127.0.0.1", listener.port))
+        sender.sendto(b"garbage", ("127.0.0.1", listener.port))
+
+        deadline = time.monotonic() + 5
+        while listener.stats()["packets"] < 202 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        while listener._flush_pending and time.monotonic() < deadline:
+            qapp.processEvents()
+    finally:
+        sender.close()
+        listener.stop()
+
+    stats = listener.stats()
+    assert stats["messages"] == 201
+    assert stats["malformed"] == 1
+    assert stats["coalesced"] > 0
+    state = controller.state()
+    assert state["color"][0] == 199
+    assert state["effect"] == "Police"
+
+
+def test_deeply_nested_bundles_are_rejected():
+    packet = encode_message("/softbox/r", 1)
+    for _ in range(MAX_BUNDLE_DEPTH):
+        packet = _bundle(packet)
+    assert parse_packet(packet) == [("/softbox/r", [1])]
+    with pytest.raises(OscError):
+        parse_packet(_bundle(packet))
+
+    # 3000 levels used to overflow the stack
+    packet = encode_message("/softbox/r", 1)
+    for _ in range(3000):
+        packet = _bundle(packet)
+    with pytest.raises(OscError):
+        parse_packet(packet)
+
+
+def test_listener_survives_bad_packets(qapp):
+    controller = softbox.embed(show=False)
+    listener = OscListener(controller, host="127.0.0.1", port=0).start()
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    nested = encode_message("/softbox/r", 1)
+    for _ in range(1000):
+        nested = _bundle(nested)
+    try:
+        sender.sendto(nested, ("127.0.0.1", listener.port))
+        sender.sendto(encode_message("/softbox/effect", 2.0), ("127.0.0.1", listener.port))
+        deadline = time.monotonic() + 5
+        while listener.stats()["packets"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        while listener._flush_pending and time.monotonic() < deadline:
+            qapp.processEvents()
+            time.sleep(0.005)
+        sender.sendto(encode_message("/softbox/g", 42), ("127.0.0.1", listener.port))
+        while controller.state()["color"][1] != 42 and time.monotonic() < deadline:
+            qapp.processEvents()
+            time.sleep(0.005)
+    finally:
+        sender.close()
+        listener.stop()
+
+    stats = listener.stats()
+    assert stats["malformed"] == 1
+    # A float effect index is rejected, not truncated
+    assert stats["errors"] == 1
+    assert controller.state()["effect"] != "Police"
+    assert controller.state()["color"][1] == 42
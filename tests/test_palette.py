@@ -0,0 +1,62 @@
+import time
+
+import numpy as np
+from PySide6.QtGui import QColor, QImage, QPainter
+
+from softbox import SoftBox
+from softbox.palette import extract_palette, kmeans
+
+COLORS = [QColor(200, 30, 40), QColor(20, 120, 200), QColor(240, 220, 180)]
+
+
+def _mood_board(path, width, height):
+    """Three vertical bands: 50%, 30% and 20% of the image."""
+    image = QImage(width, height, QImage.Format_RGB32)
+    painter = QPainter(image)
+    painter.fillRect(0, 0, width // 2, height, COLORS[0])
+    painter.fillRect(width // 2, 0, width * 3 // 10, height, COLORS[1])
+    painter.fillRect(width * 8 // 10, 0, width - width * 8 // 10, height, COLORS[2])
+    painter.end()
+    image.save(str(path), quality=95)
+
+
+def test_kmeans_orders_by_size():
+    rng = np.random.default_rng(1)
+    pixels = np.concatenate([rng.normal(c, 3, (n, 3)) for c, n in
+                             (((10, 10, 10), 600), ((250, 0, 0), 300), ((0, 0, 250), 100))]).astype(np.float32)
+    centers, weights = kmeans(pixels, 3)
+    assert np.abs(centers - [(10, 10, 10), (250, 0, 0), (0, 0, 250)]).max() < 3
+    assert np.allclose(weights, [0.6, 0.3, 0.1], atol=0.01)
+
+
+def test_extract_large_photo_fast_and_cached(qapp, tmp_path):
+    path = tmp_path / "board.jpg"
+    _mood_board(path, 6000, 4000)
+    started = time.perf_counter()
+    palette = extract_palette(path, 3, cache_dir=tmp_path / "cache")
+    assert time.perf_counter() - started < 1.0
+    for (r, g, b), expected in zip(palette, COLORS):
+        assert max(abs(r - expected.red()), abs(g - expected.green()), abs(b - expected.blue())) <= 6
+
+    # A copy under another name hits the cache
+    copy = tmp_path / "copy.jpg"
+    copy.write_bytes(path.read_bytes())
+    assert extract_palette(copy, 3, cache_dir=tmp_path / "cache") == palette
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+
+
+def test_palette_row_and_effect(qapp, tmp_path, monkeypatch):
+    monkeypatch.setattr("softbox.palette.default_cache_dir", lambda: str(tmp_path / "cache"))
+    path = tmp_path / "board.png"
+    _mood_board(path, 300, 200)
+    window = SoftBox()
+    window.load_palette(path, 3)
+    assert len(window.palette_buttons) == 3
+    window.effect_combo.setCurrentText("Palette")
+    frames = window.color_display.engine.effect.frames
+    assert [tuple(f) for f in frames.tolist()] == window.color_display.palette
+    window.palette_buttons[1].click()
+    assert window.color == COLORS[1]
+    window.close()
+    window.deleteLater()
+    qapp.processEvents()
@@ -0,0 +1,70 @@
+import csv
+import time
+
+from PySide6.QtGui import QColor, QGuiApplication
+
+from softbox.patterns import LOG_FIELDS, PatternWindow, pattern_patches, render_chart, render_patch
+
+
+def _pump(qapp, seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.005)
+
+
+def test_patches():
+    ramp = pattern_patches("Gray Ramp", 5)
+    assert [rgb for _, rgb in ramp] == [(0, 0, 0), (64, 64, 64), (128, 128, 128), (191, 191, 191), (255, 255, 255)]
+    assert len(pattern_patches("Primaries")) == 8
+    grid = pattern_patches("Patch Grid", 3)
+    assert len(grid) == 27 and grid[-1][1] == (255, 255, 255)
+
+
+def test_rendering():
+    image = render_patch((10, 20, 30), 100, 100, window=0.25)
+    assert image.pixelColor(50, 50) == QColor(10, 20, 30)
+    assert image.pixelColor(5, 5) == QColor(0, 0, 0)
+    chart = render_chart(pattern_patches("Gray Ramp", 4), 400, 100)
+    assert chart.pixelColor(10, 50) == QColor(0, 0, 0)
+    assert chart.pixelColor(390, 50) == QColor(255, 255, 255)
+
+
+def test_scheduled_stepping_is_logged(qapp, tmp_path):
+    log = tmp_path / "patches.csv"
+    window = PatternWindow("Gray Ramp", 5, QGuiApplication.primaryScreen(), interval_ms=30, log_path=log)
+    finished = []
+    window.finished.connect(lambda: finished.append(True))
+    try:
+        window.start()
+        deadline = time.monotonic() + 3
+        while not finished and time.monotonic() < deadline:
+            _pump(qapp, 0.01)
+        _pump(qapp, 0.05)
+        assert finished and window.index == 4
+    finally:
+        window.close()
+
+    with open(log, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == LOG_FIELDS
+    # Painted patches appear in order with rising timestamps
+    indices = [int(row["index"]) for row in rows]
+    assert indices == sorted(indices) and indices[0] == 0 and indices[-1] == 4
+    assert rows[-1]["r"] == "255"
+    times = [float(row["monotonic"]) for row in rows]
+    assert times == sorted(times)
+    # Each patch is rendered once
+    assert window.cache.misses <= 5
+
+
+def test_keypress_stepping(qapp):
+    window = PatternWindow("Primaries", screen=QGuiApplication.primaryScreen()).start()
+    try:
+        window.next_patch()
+        window.next_patch()
+        window.previous_patch()
+        assert window.current_patch() == ("Red", (255, 0, 0))
+        assert not window._timer.isActive()
+    finally:
+        window.close()
@@ -0,0 +1,98 @@
+import sqlite3
+import time
+
+import pytest
+
+from softbox import SoftBox
+from softbox.presets import PresetLibrary
+
+
+def test_new_library_has_defaults_and_persists(tmp_path):
+    path = tmp_path / "presets.sqlite"
+    library = PresetLibrary(path)
+    assert [p.name for p in library.tagged("designer")] == ["Prussian", "Hermès", "LV Brown", "Tiffany", "Louboutin"]
+    preset = library.add("Client Teal", (0, 128, 128), ["brand", "acme"])
+    library.set_favorite(preset.id)
+    library.close()
+
+    reopened = PresetLibrary(path)
+    assert len(reopened) == 12
+    saved = reopened.get(preset.id)
+    assert saved.rgb == (0, 128, 128) and saved.tags == ("brand", "acme") and saved.favorite
+    assert reopened.favorites() == [saved]
+    reopened.remove(preset.id)
+    reopened.close()
+    assert len(PresetLibrary(path)) == 11
+
+
+def test_saves_are_incremental(tmp_path):
+    path = tmp_path / "presets.sqlite"
+    library = PresetLibrary(path)
+    statements = []
+    library._db.set_trace_callback(statements.append)
+    library.add("Client Teal", (0, 128, 128))
+    writes = [s for s in statements if s.split()[0] in ("INSERT", "UPDATE", "DELETE")]
+    assert len(writes) == 1 and writes[0].startswith("INSERT")
+
+
+def test_prefix_and_fuzzy_search():
+    library = PresetLibrary(":memory:")
+    library.add("Acme Blue", (10, 20, 200), ["brand"])
+    favorite = library.add("Acme Red", (200, 20, 10), ["brand"], favorite=True)
+    assert library.search("acm")[0] is favorite
+    assert library.search("acme bl")[0].name == "Acme Blue"
+    assert [p.name for p in library.search("hermes")] == ["Hermès"]
+    assert [p.name for p in library.search("brand")] == ["Acme Red", "Acme Blue"]
+    # A typo still finds the preset through the trigram index
+    assert library.search("tifany")[0].name == "Tiffany"
+    assert library.search("acme", favorites_only=True) == [favorite]
+    assert [p.name for p in library.search("", tag="standard")][:2] == ["White", "Red"]
+
+
+def test_update_reindexes():
+    library = PresetLibrary(":memory:")
+    preset = library.add("Old Name", (1, 2, 3))
+    library.update(preset.id, name="New Name", tags=["renamed"])
+    assert library.search("old", fuzzy=0) == []
+    assert library.search("new") == [preset] and library.search("renamed") == [preset]
+    with pytest.raises(ValueError):
+        library.add("Bad", (0, 0, 300))
+    # Invalid updates leave the preset and its indexes untouched
+    with pytest.raises(ValueError):
+        library.update(preset.id, rgb=(0, 0, 256))
+    with pytest.raises(ValueError):
+        library.update(preset.id, name="Broken", tags=["a,b"])
+    assert preset.rgb == (1, 2, 3) and preset.name == "New Name"
+    assert library.search("renamed") == [preset] and library.tags().count("renamed") == 1
+
+
+def test_search_thousands_of_presets(tmp_path):
+    path = tmp_path / "presets.sqlite"
+    with sqlite3.connect(path) as db:
+        db.execute("CREATE TABLE presets (id INTEGER PRIMARY KEY, name TEXT NOT NULL, r INTEGER NOT NULL, "
+                   "g INTEGER NOT NULL, b INTEGER NOT NULL, tags TEXT NOT NULL DEFAULT '', "
+                   "favorite INTEGER NOT NULL DEFAULT 0)")
+        db.executemany("INSERT INTO presets (name, r, g, b, tags) VALUES (?, ?, ?, ?, ?)",
+                       [(f"Client {i:04d} Color", i % 256, i // 256, 0, f"client{i % 50}") for i in range(5000)])
+    library = PresetLibrary(path)
+    assert len(library) == 5000
+    started = time.perf_counter()
+    for _ in range(100):
+        results = library.search("client 012", limit=20)
+    assert (time.perf_counter() - started) / 100 < 0.01
+    assert [p.name for p in results][:3] == ["Client 0120 Color", "Client 0121 Color", "Client 0122 Color"]
+
+
+def test_window_saves_current_color(qapp):
+    library = PresetLibrary(":memory:")
+    window = SoftBox(presets=library)
+    assert window.preset_browser.model.rowCount() == 11
+    window.slider_r.setValue(12)
+    window.slider_g.setValue(34)
+    window.slider_b.setValue(56)
+    preset = window.save_preset("Studio Wall", ["studio"])
+    assert library.search("studio") == [preset] and preset.rgb == (12, 34, 56)
+    assert window.preset_browser.model.rowCount() == 12
+    window.close()
+    window.deleteLater()
+    qapp.processEvents()
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from softbox import ColorDisplay, ColorSequence
+
+
+def test_fixed_rate_lookup():
+    """Frames are looked up by time at a fixed frame rate."""
+    frames = np.arange(30, dtype=np.uint8).reshape(10, 3)
+    seq = ColorSequence(frames, fps=10)
+    assert seq.duration == 1.0
+    assert seq.rgb_at(0.0) == (0, 1, 2)
+    assert seq.rgb_at(0.55) == (15, 16, 17)
+    assert seq.rgb_at(1.0) is None
+    assert seq.rgb_at(1.05, loop=True) == (0, 1, 2)
+
+
+def test_timestamp_lookup():
+    """Per-frame timestamps pick the frame whose interval contains t."""
+    frames = np.array([[255, 0, 0], [0, 255, 0], [0, 0, 255]], dtype=np.uint8)
+    seq = ColorSequence(frames, timestamps=[0.0, 0.5, 0.6])
+    assert seq.rgb_at(0.49) == (255, 0, 0)
+    assert seq.rgb_at(0.5) == (0, 255, 0)
+    assert seq.rgb_at(0.65) == (0, 0, 255)
+    assert seq.rgb_at(0.7) is None
+
+
+def test_rejects_non_uint8():
+    with pytest.raises(ValueError):
+        ColorSequence(np.zeros((4, 3), dtype=np.float32), fps=30)
+
+
+def test_memory_mapped_npy(tmp_path):
+    """Sequences load from memory-mapped .npy files without a copy."""
+    path = tmp_path / "sweep.npy"
+    np.save(path, np.full((1000, 3), 7, dtype=np.uint8))
+    seq = ColorSequence.from_npy(path, fps=100)
+    assert isinstance(seq.frames.base, np.memmap) or isinstance(seq.frames, np.memmap)
+    assert seq.rgb_at(5.0) == (7, 7, 7)
+
+
+def test_display_playback(qapp):
+    """ColorDisplay presents the sequence frames and stops at the end."""
+    display = ColorDisplay()
+    frames = np.array([[10, 20, 30], [40, 50, 60]], dtype=np.uint8)
+    player = display.play_sequence(ColorSequence(frames, fps=1000))
+    assert display._presented.getRgb()[:3] == (10, 20, 30)
+    assert player.isActive()
+    display.stop_sequence()
+    assert not display.is_playing()
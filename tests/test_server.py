@@ -0,0 +1,167 @@
+import base64
+import http.client
+import json
+import os
+import socket
+import threading
+
+import softbox
+from softbox import RemoteServer
+
+
+def _pump_until(qapp, thread):
+    """Process Qt events on this (GUI) thread while the client thread runs."""
+    while thread.is_alive():
+        qapp.processEvents()
+        thread.join(0.001)
+
+
+def _ws_send(sock, data):
+    payload = json.dumps(data).encode()
+    mask = os.urandom(4)
+    masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    assert len(payload) < 126
+    sock.sendall(bytes([0x81, 0x80 | len(payload)]) + mask + masked)
+
+
+def _ws_recv(sock):
+    header = sock.recv(2)
+    length = header[1] & 0x7F
+    if length == 126:
+        length = int.from_bytes(sock.recv(2), "big")
+    data = b""
+    while len(data) < length:
+        data += sock.recv(length - len(data))
+    return json.loads(data)
+
+
+def test_http_batch(qapp):
+    """A batch over HTTP is applied and reports per-command latency."""
+    controller = softbox.embed(show=False)
+    server = RemoteServer(controller, port=0).start_in_thread()
+    replies = {}
+
+    def client():
+        conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+        batch = [
+            {"cmd": "set_color", "r": 1, "g": 2, "b": 3},
+            {"cmd": "start_effect", "effect": "Strobe", "speed": 100},
+            {"cmd": "bogus"},
+        ]
+        conn.request("POST", "/command", json.dumps(batch))
+        replies["command"] = json.loads(conn.getresponse().read())
+        conn.request("GET", "/stats")
+        replies["stats"] = json.loads(conn.getresponse().read())
+        conn.close()
+
+    thread = threading.Thread(target=client)
+    thread.start()
+    _pump_until(qapp, thread)
+    server.stop_thread()
+
+    results = replies["command"]["results"]
+    assert [r["ok"] for r in results] == [True, True, False]
+    assert results[0]["latency_ms"] >= 0
+    assert replies["command"]["state"]["color"] == [1, 2, 3]
+    assert replies["command"]["state"]["effect"] == "Strobe"
+    assert replies["stats"]["latency"]["set_color"]["count"] == 1
+
+
+def test_websocket_commands_and_push(qapp):
+    """WebSocket clients get the state on connect and after commands."""
+    controller = softbox.embed(show=False)
+    server = RemoteServer(controller, port=0).start_in_thread()
+    messages = []
+
+    def client():
+        sock = socket.create_connection(("127.0.0.1", server.port), timeout=5)
+        key = base64.b64encode(os.urandom(16)).decode()
+        sock.sendall((
+            "GET /ws HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\n"
+            f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        ).encode())
+        head = b""
+        while not head.endswith(b"\r\n\r\n"):
+            head += sock.recv(1)
+        assert b"101" in head.split(b"\r\n")[0]
+        messages.append(_ws_recv(sock))
+        _ws_send(sock, {"id": 7, "batch": [{"cmd": "set_speed", "speed": 250}]})
+        # One result and one state push, in either order
+        messages.append(_ws_recv(sock))
+        messages.append(_ws_recv(sock))
+        sock.close()
+
+    thread = threading.Thread(target=client)
+    thread.start()
+    _pump_until(qapp, thread)
+    server.stop_thread()
+
+    assert messages[0]["type"] == "state"
+    by_type = {m["type"]: m for m in messages[1:]}
+    assert by_type["result"]["id"] == 7
+    assert by_type["result"]["results"][0]["ok"]
+    assert by_type["state"]["state"]["speed"] == 250
+
+
+def test_oversized_headers_get_431(qapp):
+    controller = softbox.embed(show=False)
+    server = RemoteServer(controller, port=0).start_in_thread()
+    replies = {}
+
+    def client():
+        with socket.create_connection(("127.0.0.1", server.port), timeout=5) as sock:
+            sock.sendall(b"GET /state HTTP/1.1\r\nX-Padding: " + b"a" * 70000 + b"\r\n\r\n")
+            reply = b""
+            while chunk := sock.recv(4096):
+                reply += chunk
+            replies["oversized"] = reply
+        # The server keeps serving other clients
+        conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+        conn.request("GET", "/stats")
+        replies["stats"] = conn.getresponse().status
+        conn.close()
+
+    thread = threading.Thread(target=client)
+    thread.start()
+    _pump_until(qapp, thread)
+    server.stop_thread()
+
+    assert replies["oversized"].startswith(b"HTTP/1.1 431 ")
+    assert replies["stats"] == 200
+
+
+def test_websocket_limits_fragmented_messages(qapp, monkeypatch):
+    monkeypatch.setattr("softbox.server.MAX_BODY", 1000)
+    controller = softbox.embed(show=False)
+    server = RemoteServer(controller, port=0).start_in_thread()
+    replies = {}
+
+    def client():
+        sock = socket.create_connection(("127.0.0.1", server.port), timeout=5)
+        key = base64.b64encode(os.urandom(16)).decode()
+        sock.sendall((
+            "GET /ws HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\n"
+            f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        ).encode())
+        head = b""
+        while not head.endswith(b"\r\n\r\n"):
+            head += sock.recv(1)
+        _ws_recv(sock)
+        # Every frame is small, but the message never ends
+        try:
+            for index in range(100):
+                opcode = 0x1 if index == 0 else 0x0
+                sock.sendall(bytes([opcode, 0x80 | 100]) + bytes(4) + b"x" * 100)
+        except OSError:
+            pass
+        header = sock.recv(2)
+        replies["close"] = (header[0], sock.recv(header[1] & 0x7F))
+        sock.close()
+
+    thread = threading.Thread(target=client)
+    thread.start()
+    _pump_until(qapp, thread)
+    server.stop_thread()
+
+    opcode, payload = replies["close"]
+    assert opcode == 0x88 and int.from_bytes(payload[:2], "big") == 1009
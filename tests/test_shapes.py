@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from PySide6.QtGui import QColor
+
+from softbox import ColorDisplay
+from softbox.shapes import ShapeCache, mask_image, shape_mask
+
+
+def test_shape_masks():
+    radial = shape_mask("Radial", 101, 51)
+    assert radial.shape == (51, 101) and radial.dtype == np.float32
+    assert radial[25, 50] > 0.95 and radial[0, 0] == 0.0
+
+    ring = shape_mask("Ring", 100, 100, radius=0.5, thickness=0.1, softness=0.05)
+    # Bright on the ring, dark at the center
+    assert ring[50, 75] == 1.0 and ring[50, 50] == 0.0
+
+    linear = shape_mask("Linear", 10, 100, angle=90)
+    assert linear[-1, 5] < 0.05 and linear[0, 5] > 0.95
+
+    assert shape_mask("Gaussian", 20, 20, floor=0.25).min() >= 0.25
+    with pytest.raises(ValueError):
+        shape_mask("Radial", 10, 10, sigma=1)
+
+
+def test_mask_image_shares_memory(qapp):
+    image = mask_image(shape_mask("Gaussian", 64, 32))
+    assert (image.width(), image.height()) == (64, 32)
+    assert image.pixelColor(32, 16).red() > 240
+
+
+def test_cache_reuses_pixmaps(qapp):
+    cache = ShapeCache(capacity=2)
+    first = cache.get("Ring", {"radius": 0.5}, 80, 60)
+    assert cache.get("Ring", {"radius": 0.5}, 80, 60) is first
+    cache.get("Ring", {"radius": 0.5}, 80, 60, 2.0)
+    cache.get("Radial", {}, 80, 60)
+    assert cache.stats() == {"entries": 2, "hits": 1, "misses": 3}
+
+
+def test_display_tints_mask(qapp):
+    display = ColorDisplay()
+    display.resize(200, 200)
+    display.setColor(QColor(200, 100, 50))
+    display.set_shape("Radial")
+    image = display.grab().toImage()
+    center, corner = image.pixelColor(100, 100), image.pixelColor(3, 3)
+    assert abs(center.red() - 200) <= 8 and abs(center.green() - 100) <= 8
+    assert corner.red() < 20
+    # Changing only the color does not render a new mask
+    display.setColor(QColor(0, 0, 255))
+    display.grab()
+    assert display._shape_cache.stats()["misses"] == 1
@@ -0,0 +1,64 @@
+import pathlib
+import subprocess
+import sys
+import time
+
+from softbox.effects import Effect
+from softbox.sync import ClockLeader, SyncClock
+
+LEADER_SKEW = 100.0
+
+FOLLOWER = """
+import sys, time
+from softbox.sync import SyncClock
+skew = float(sys.argv[2])
+clock = SyncClock("127.0.0.1", int(sys.argv[1]), interval=0.05,
+                  local_clock=lambda: time.monotonic() + skew).start()
+time.sleep(1.0)
+# Leader time is monotonic() + {skew}; report how far off our estimate is
+print(clock.now() - (time.monotonic() + {skew}), clock.sent)
+clock.stop()
+""".format(skew=LEADER_SKEW)
+
+
+def test_offset_filter_prefers_low_delay():
+    """The sample with the smallest round trip wins."""
+    clock = SyncClock("127.0.0.1", 1, local_clock=lambda: 0.0)
+    clock.add_sample(0.0, 10.050, 10.050, 0.200)  # slow round trip, skewed
+    clock.add_sample(1.0, 11.001, 11.001, 1.002)
+    assert abs(clock.offset() - 10.0) < 1e-9
+    clock.stop()
+
+
+def test_followers_agree_across_processes():
+    """Several follower processes converge on the leader's clock."""
+    leader = ClockLeader("127.0.0.1", 0, local_clock=lambda: time.monotonic() + LEADER_SKEW).start()
+    try:
+        followers = [
+            subprocess.Popen([sys.executable, "-c", FOLLOWER, str(leader.port), str(skew)],
+                             stdout=subprocess.PIPE, text=True)
+            for skew in (-3.0, 0.0, 42.5)
+        ]
+        outputs = [follower.communicate(timeout=20)[0].split() for follower in followers]
+    finally:
+        leader.stop()
+
+    for error, sent in outputs:
+        assert abs(float(error)) < 0.005
+        # A few packets per second per interval, not a flood
+        assert int(sent) <= 25
+
+
+def test_shared_clock_gives_same_phase():
+    """Effects sampled from the same shared time show the same frame."""
+    a = Effect("Police", speed=100)
+    b = Effect("Police", speed=100)
+    assert a.rgb_at(12345.0) == b.rgb_at(12345.0)
+    assert a.rgb_at(12345.0) != a.rgb_at(12445.0)
+
+
+def test_toga_copy_matches():
+    # The Toga package ships its own copy of softbox/sync.py, which is the canonical one
+    root = pathlib.Path(__file__).resolve().parent.parent
+    canonical = (root / "softbox" / "sync.py").read_bytes()
+    assert (root / "softbox_toga" / "src" / "softbox_toga" / "sync.py").read_bytes() == canonical
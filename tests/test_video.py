@@ -0,0 +1,96 @@
+import time
+
+import numpy as np
+
+from softbox import ColorDisplay
+from softbox.video import VideoColorSource, Y4MReader, reduce_yuv
+
+# Full-range YUV for red, green and blue
+FRAMES = [(76, 85, 255), (150, 44, 21), (29, 255, 107)]
+
+
+def _write_y4m(path, count, width=32, height=16):
+    with open(path, "wb") as f:
+        f.write(f"YUV4MPEG2 W{width} H{height} F50:1 Ip A1:1 C420jpeg\n".encode())
+        for index in range(count):
+            y, u, v = FRAMES[index % len(FRAMES)]
+            f.write(b"FRAME\n")
+            f.write(bytes([y]) * (width * height))
+            f.write(bytes([u]) * (width * height // 4))
+            f.write(bytes([v]) * (width * height // 4))
+
+
+def test_y4m_reduce(tmp_path):
+    path = tmp_path / "clip.y4m"
+    _write_y4m(path, 3)
+    reader = Y4MReader(path)
+    assert (reader.width, reader.height, reader.fps) == (32, 16, 50.0)
+    colors = []
+    while reader.read():
+        colors.append(reduce_yuv(reader.planes, reader.subsampling, reader.full_range))
+    reader.close()
+    for color, expected in zip(colors, [(255, 0, 0), (0, 255, 0), (0, 0, 255)]):
+        assert np.abs(np.subtract(color, expected)).max() <= 3
+
+    # Dominant color ignores a minority of other pixels
+    planes = [np.full((16, 32), 76, np.uint8), np.full((8, 16), 85, np.uint8), np.full((8, 16), 255, np.uint8)]
+    planes[0][:4] = 255
+    planes[1][:2] = planes[2][:2] = 128
+    r, g, b = reduce_yuv(planes, (2, 2), True, mode="dominant", step=2)
+    assert r > 250 and g < 5 and b < 5
+
+
+def test_stream_is_bounded(tmp_path):
+    path = tmp_path / "long.y4m"
+    _write_y4m(path, 300)
+    source = VideoColorSource(path, buffer=8)
+    # Black until the worker has decoded the first frame, without blocking
+    started = time.monotonic()
+    assert source.rgb_at(0.0) in ((0, 0, 0), source._rgb)
+    assert time.monotonic() - started < 0.05
+    deadline = time.monotonic() + 5
+    while source.rgb_at(0.0) == (0, 0, 0) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert source.rgb_at(0.0)[0] > 250
+    time.sleep(0.2)
+    # The worker waits for the player instead of decoding the whole clip
+    assert source.decoded <= 8 + 2
+    assert source.rgb_at(0.03)[1] > 250
+    # Jumping ahead drains the queue as the worker catches up
+    deadline = time.monotonic() + 5
+    while source.rgb_at(6.1) is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert source.rgb_at(6.1) is None
+    assert source.dropped > 250
+    source.close()
+    assert source._reader.closed
+
+
+def test_close_releases_the_file(tmp_path):
+    path = tmp_path / "clip.y4m"
+    _write_y4m(path, 3)
+    source = VideoColorSource(path)
+    source.rgb_at(0.0)
+    source.close()
+    assert source._reader.closed
+    # Playing again reopens the clip
+    deadline = time.monotonic() + 5
+    while source.rgb_at(0.0) == (0, 0, 0) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert source.rgb_at(0.0)[0] > 250
+    source.close()
+
+
+def test_display_plays_video(qapp, tmp_path):
+    path = tmp_path / "clip.y4m"
+    _write_y4m(path, 6)
+    display = ColorDisplay()
+    frames = []
+    display.add_frame_listener(lambda r, g, b: frames.append((r, g, b)))
+    display.play_video(path)
+    deadline = time.monotonic() + 2
+    while display.is_playing() and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.002)
+    assert not display.is_playing()
+    assert len(frames) >= 4
@@ -0,0 +1,63 @@
+import time
+
+import pytest
+from PySide6.QtGui import QColor
+
+from softbox import ColorDisplay
+
+
+def _pump(qapp, seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.005)
+
+
+def test_zones_paint_and_update_independently(qapp):
+    display = ColorDisplay()
+    display.resize(200, 100)
+    display.show()
+    warm = display.add_zone("key", (0, 0, 0.5, 1), QColor(255, 180, 100))
+    cool = display.add_zone("rim", (0.8, 0, 0.2, 1), QColor(150, 200, 255))
+    with pytest.raises(ValueError):
+        display.add_zone("key", (0, 0, 1, 1))
+    _pump(qapp, 0.05)
+
+    image = display.grab().toImage()
+    assert image.pixelColor(50, 50) == QColor(255, 180, 100)
+    assert image.pixelColor(190, 50) == QColor(150, 200, 255)
+    assert image.pixelColor(130, 50) == QColor(255, 255, 255)
+
+    cool.start_effect("Strobe", 50)
+    _pump(qapp, 0.3)
+    # The animated zone is invalidated every step, the static one is not
+    assert cool.updates >= 4
+    assert warm.updates == 1
+
+    display.remove_zone("rim")
+    assert display.zones() == [warm]
+    display.close()
+
+
+def test_zone_effects_use_display_data(qapp):
+    display = ColorDisplay()
+    zone = display.add_zone("key", (0, 0, 0.5, 1))
+    with pytest.raises(ValueError, match="palette"):
+        zone.start_effect("Palette")
+    with pytest.raises(ValueError, match="music"):
+        zone.start_effect("Music")
+
+    display.set_palette([(10, 20, 30), (40, 50, 60)])
+    zone.start_effect("Palette", 100)
+    assert zone.engine.effect.frames[:2].tolist() == [[10, 20, 30], [40, 50, 60]]
+    display.set_palette([(1, 2, 3)])
+    assert zone.engine.effect.frames[0].tolist() == [1, 2, 3]
+
+    # Flicker follows the display seed, also when it changes later
+    display.set_seed(11)
+    zone.start_effect("Candle")
+    assert zone.engine.effect.frames.seed == 11
+    display.set_seed(12)
+    assert zone.engine.effect.frames.seed == 12
+    display.deleteLater()
+    qapp.processEvents()